@@ -1,12 +1,20 @@
 from flask import Flask
 from flask_cors import CORS
 from .utils.firebase_admin import initialize_firebase
+from .utils.json_provider import init_json_provider
+from .utils.query_counter import init_query_counter
+from .utils.metrics import init_metrics
+from .utils.slow_queries import init_slow_query_log
+from .utils.tracing import init_tracing
 from .extensions import ma, limiter, cache, migrate
 from .models import db
 from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.service_tickets import service_tickets_bp
 from .blueprints.inventory import inventory_bp
+from .blueprints.vehicles import vehicles_bp
+from .blueprints.events import events_bp
+from .blueprints.admin import admin_bp
 from flask_swagger_ui import get_swaggerui_blueprint
 
 SWAGGER_URL = '/api/docs'
@@ -24,6 +32,8 @@ def create_app(config_name):
     app = Flask(__name__)
     app.url_map.strict_slashes = False
     app.config.from_object(f'config.{config_name}')
+    init_json_provider(app)
+    init_query_counter(app)
 
     # Init Firebase Admin SDK (optional - will work without it for testing)
     if initialize_firebase():
@@ -37,6 +47,9 @@ def create_app(config_name):
     limiter.init_app(app)
     cache.init_app(app)
     migrate.init_app(app, db)
+    init_metrics(app)
+    init_slow_query_log(app)
+    init_tracing(app)
 
     # Configure CORS
     CORS(app, origins=[
@@ -49,6 +62,9 @@ def create_app(config_name):
     app.register_blueprint(mechanics_bp, url_prefix='/mechanics')
     app.register_blueprint(service_tickets_bp, url_prefix='/service_tickets')
     app.register_blueprint(inventory_bp, url_prefix='/inventory')
+    app.register_blueprint(vehicles_bp, url_prefix='/vehicles')
+    app.register_blueprint(events_bp, url_prefix='/events')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
     return app
\ No newline at end of file
@@ -0,0 +1,35 @@
+from app.utils.util import mechanic_token_required
+from app.utils.slow_queries import explain, ExplainUnavailable
+from flask import request, jsonify, current_app
+from . import admin_bp
+
+
+# Get Recent Slow Queries, Newest First (Requires Mechanic Token)
+@admin_bp.route('/slow-queries', methods=['GET'])
+@mechanic_token_required
+def get_slow_queries():
+    """
+    Query Params (all optional):
+        limit: most records to return (default 50)
+        explain: true to add each statement's query plan (needs SLOW_QUERY_EXPLAIN)
+    """
+    log = current_app.extensions.get('slow_query_log')
+    if log is None:
+        return jsonify({'error': 'Slow query log is disabled'}), 404
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    explain_plans = request.args.get('explain', '').lower() in ('1', 'true', 'yes')
+    if explain_plans and not current_app.config['SLOW_QUERY_EXPLAIN']:
+        return jsonify({'error': 'EXPLAIN is disabled (SLOW_QUERY_EXPLAIN)'}), 400
+
+    records = log.records(limit)
+    if explain_plans:
+        for record in records:
+            try:
+                record['plan'] = explain(record)
+            except ExplainUnavailable as e:
+                record['plan_error'] = str(e)
+    return jsonify({'threshold_ms': log.threshold_ms, 'queries': records}), 200
@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from bcrypt import gensalt
+from marshmallow import ValidationError
+from sqlalchemy import select, insert
+from app.models import Customer, Vehicle, db
+from app.utils.firebase_admin import set_user_claims
+from app.utils.metrics import BCRYPT_QUEUE_DEPTH
+from app.utils.tracing import bind
+from app.utils.util import hashpw
+from .schemas import customer_import_schema
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+VEHICLE_COLUMNS = ('vin', 'make', 'model', 'year', 'color', 'license_plate')
+
+# bcrypt releases the GIL, so a thread pool hashes a batch in parallel
+_hash_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('BCRYPT_WORKERS', os.cpu_count() or 2)))
+
+
+def _hash_password(password: str) -> str:
+    BCRYPT_QUEUE_DEPTH.dec()
+    return hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    BCRYPT_QUEUE_DEPTH.inc(len(passwords))
+    return list(_hash_pool.map(bind(_hash_password), passwords))
+
+
+def iter_records(stream, import_format: str):
+    """
+    Lazily parse a CSV or NDJSON byte stream into (row_number, dict) pairs.
+
+    CSV rows are flat: customer columns plus optional vin/make/model/year/
+    color/license_plate columns for a single vehicle. NDJSON rows may carry
+    a 'vehicles' list. Blank CSV cells are treated as missing.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if import_format == 'csv':
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            record = {k: v for k, v in row.items() if k and v not in (None, '')}
+            vehicle = {k: record.pop(k) for k in VEHICLE_COLUMNS if k in record}
+            if vehicle:
+                record['vehicles'] = [vehicle]
+            yield row_number, record
+    elif import_format == 'ndjson':
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, e
+    else:
+        raise ValueError(f'Unsupported import format: {import_format}')
+
+
+def _batches(records, batch_size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _existing(column, values) -> set:
+    if not values:
+        return set()
+    return set(db.session.execute(select(column).where(column.in_(values))).scalars())
+
+
+def _import_batch(batch) -> tuple[int, int, list[dict]]:
+    """Validate, de-duplicate and insert one batch. Returns (customers, vehicles, errors)."""
+    errors = []
+    valid = []
+    for row_number, record in batch:
+        if isinstance(record, Exception):
+            errors.append({'row': row_number, 'errors': {'_row': [f'Invalid JSON: {record}']}})
+            continue
+        try:
+            valid.append((row_number, customer_import_schema.load(record)))
+        except ValidationError as e:
+            errors.append({'row': row_number, 'errors': e.messages})
+
+    # Set-Based Uniqueness Checks (One Query Per Column)
+    taken_emails = _existing(Customer.email, {r['email'] for _, r in valid})
+    taken_uids = _existing(Customer.firebase_uid, {r['firebase_uid'] for _, r in valid if r['firebase_uid']})
+    taken_vins = _existing(Vehicle.vin, {v['vin'] for _, r in valid for v in r['vehicles']})
+
+    accepted = []
+    for row_number, row in valid:
+        row_errors = {}
+        vins = [v['vin'] for v in row['vehicles']]
+        if row['email'] in taken_emails:
+            row_errors['email'] = ['Customer with this email already exists.']
+        if row['firebase_uid'] and row['firebase_uid'] in taken_uids:
+            row_errors['firebase_uid'] = ['Customer with this Firebase UID already exists.']
+        if any(vin in taken_vins for vin in vins) or len(set(vins)) != len(vins):
+            row_errors['vehicles'] = ['Vehicle with this VIN already exists.']
+        if row_errors:
+            errors.append({'row': row_number, 'errors': row_errors})
+            continue
+        # Later rows in the same batch must not reuse these values either
+        taken_emails.add(row['email'])
+        if row['firebase_uid']:
+            taken_uids.add(row['firebase_uid'])
+        taken_vins.update(vins)
+        accepted.append(row)
+
+    if not accepted:
+        return 0, 0, errors
+
+    hashes = hash_passwords([row['password'] for row in accepted])
+    db.session.execute(insert(Customer), [
+        {
+            'name': row['name'],
+            'email': row['email'],
+            'phone': row['phone'],
+            'password': password_hash,
+            'firebase_uid': row['firebase_uid']
+        }
+        for row, password_hash in zip(accepted, hashes)
+    ])
+
+    ids_by_email = dict(db.session.execute(
+        select(Customer.email, Customer.id).where(Customer.email.in_([row['email'] for row in accepted]))
+    ).all())
+    vehicles = [
+        dict(vehicle, customer_id=ids_by_email[row['email']])
+        for row in accepted for vehicle in row['vehicles']
+    ]
+    if vehicles:
+        db.session.execute(insert(Vehicle), vehicles)
+    db.session.commit()
+
+    for row in accepted:
+        if row['firebase_uid']:
+            if not set_user_claims(firebase_uid=row['firebase_uid'], role='customer', db_id=ids_by_email[row['email']]):
+                print(f"Warning: Failed to set Firebase claims for user {ids_by_email[row['email']]}")
+
+    return len(accepted), len(vehicles), errors
+
+
+def import_customers(records, start_row: int = 1, batch_size: int = DEFAULT_BATCH_SIZE, on_batch=None) -> dict:
+    """
+    Import customers (and their vehicles) from (row_number, record) pairs.
+
+    Each batch is committed on its own, so a failed import can be resumed by
+    passing the returned next_row as start_row. Rows that were already
+    imported are reported as duplicates rather than inserted twice.
+
+    on_batch, if given, is called with the running summary after every commit.
+    """
+    summary = {'processed': 0, 'imported': 0, 'vehicles_imported': 0, 'error_count': 0, 'errors': [], 'next_row': start_row}
+    pending = ((n, r) for n, r in records if n >= start_row)
+
+    for batch in _batches(pending, batch_size):
+        customers, vehicles, errors = _import_batch(batch)
+        summary['processed'] += len(batch)
+        summary['imported'] += customers
+        summary['vehicles_imported'] += vehicles
+        summary['error_count'] += len(errors)
+        summary['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(summary['errors'])])
+        summary['next_row'] = batch[-1][0] + 1
+        if on_batch:
+            on_batch(summary)
+
+    return summary
@@ -1,15 +1,26 @@
-from app.utils.util import encode_customer_token, customer_token_required
+from app.utils.util import encode_customer_token, customer_token_required, mechanic_token_required, hashpw, checkpw
+from app.utils.export import export_response, UnsupportedExportFormat
 from app.utils.firebase_admin import set_user_claims, delete_firebase_user
-from .schemas import customer_schema, customers_schema
-from app.blueprints.service_tickets.schemas import service_tickets_schema
-from flask import request, jsonify
+from .schemas import customer_schema, customers_schema, customer_serializer, customers_serializer
+from .bulk_import import iter_records, import_customers
+from app.blueprints.service_tickets.schemas import service_tickets_serializer, TICKET_LOAD_OPTIONS
+from app.utils.pagination import paginate_query, PaginationError, RowLimitExceeded
+from app.utils.multiget import multiget_response, InvalidIds
+from flask import request, jsonify, redirect, url_for
 from marshmallow import ValidationError
-from sqlalchemy import select
-from app.models import Customer, ServiceTicket, db
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+from app.models import Customer, ServiceTicket, ServiceInventory, db
 from app.extensions import limiter, cache
-from bcrypt import hashpw, gensalt, checkpw
+from bcrypt import gensalt
 from . import customers_bp
 
+# Eager loads for everything CustomerSchema nests (tickets without their customer)
+CUSTOMER_LOAD_OPTIONS = (
+    selectinload(Customer.service_tickets).selectinload(ServiceTicket.mechanics),
+    selectinload(Customer.service_tickets).selectinload(ServiceTicket.service_inventories).selectinload(ServiceInventory.inventory),
+)
+
 
 # Login Customer
 @customers_bp.route('/login', methods=['POST'])
@@ -84,28 +95,67 @@ def create_customer():
     return customer_schema.jsonify(new_customer), 201
 
 
+# Bulk Import Customers & Vehicles From CSV or NDJSON (Requires Mechanic Token)
+@customers_bp.route('/import', methods=['POST'])
+@limiter.limit('10 per hour')
+@mechanic_token_required
+def bulk_import_customers():
+    """
+    Query Params:
+        format: 'csv' or 'ndjson' (default: 'ndjson')
+        start_row: resume from this row number (default: 1)
+
+    Body: The file contents, streamed (not multipart)
+    """
+    import_format = request.args.get('format', 'ndjson')
+    if import_format not in ('csv', 'ndjson'):
+        return jsonify({'error': f'Unsupported import format: {import_format}'}), 400
+    try:
+        start_row = int(request.args.get('start_row', 1))
+    except ValueError:
+        return jsonify({'error': 'start_row must be an integer'}), 400
+
+    summary = import_customers(iter_records(request.stream, import_format), start_row=start_row)
+    return jsonify(summary), 200
+
+
 # Get All Customers (W/ Pagination and Caching)
 @customers_bp.route('/', methods=['GET'])
-@cache.cached(timeout=1)
+@cache.cached(timeout=1, query_string=True)
 def get_customers():
+    if 'ids' in request.args:
+        try:
+            return multiget_response(Customer, customers_serializer, *CUSTOMER_LOAD_OPTIONS), 200
+        except InvalidIds as e:
+            return jsonify({'error': str(e)}), 400
+
+    query = select(Customer).order_by(Customer.id).options(*CUSTOMER_LOAD_OPTIONS)
+    try:
+        customers = paginate_query(query, 'customers')
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except RowLimitExceeded:
+        # Unbounded Reads Go Through The Streaming Export
+        return redirect(url_for('customers_bp.export_customers'), 303)
+    return customers_serializer.jsonify(customers), 200
+
+
+# Export All Customers As NDJSON or CSV (Streamed (Requires Mechanic Token))
+@customers_bp.route('/export', methods=['GET'])
+@mechanic_token_required
+def export_customers():
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page', 10))
-        query = select(Customer)
-        customers = db.paginate(query, page=page, per_page=per_page)
-        return customers_schema.jsonify(customers), 200
-    except:
-        query = select(Customer)
-        customers = db.session.execute(query).scalars().all()
-        return customers_schema.jsonify(customers), 200
+        return export_response(Customer, customer_schema, request.args.get('format', 'ndjson'), 'customers')
+    except UnsupportedExportFormat as e:
+        return jsonify({'error': str(e)}), 400
 
 
 # Get a Specific Customer
 @customers_bp.route('/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
-    customer = db.session.get(Customer, customer_id)
+    customer = db.session.get(Customer, customer_id, options=CUSTOMER_LOAD_OPTIONS)
     if customer:
-        return customer_schema.jsonify(customer), 200
+        return customer_serializer.jsonify(customer), 200
     return jsonify({"message": "Customer not found."}), 404
 
 
@@ -114,9 +164,15 @@ def get_customer(customer_id):
 @customer_token_required
 def get_my_tickets():
     customer = request.current_customer
-    query = select(ServiceTicket).where(ServiceTicket.customer_id == customer.id)
-    tickets = db.session.execute(query).scalars().all()
-    return service_tickets_schema.jsonify(tickets), 200
+    query = (
+        select(ServiceTicket).where(ServiceTicket.customer_id == customer.id)
+        .order_by(ServiceTicket.id).options(*TICKET_LOAD_OPTIONS)
+    )
+    try:
+        tickets = paginate_query(query, 'service_tickets')
+    except (PaginationError, RowLimitExceeded) as e:
+        return jsonify({'error': str(e)}), 400
+    return service_tickets_serializer.jsonify(tickets), 200
 
 
 # Update Customer
@@ -143,6 +199,8 @@ def update_customer(customer_id):
         return jsonify(e.messages), 400
 
     db.session.commit()
+    # The commit expired everything; reload the nested tickets in one pass
+    customer = db.session.get(Customer, customer_id, options=CUSTOMER_LOAD_OPTIONS, populate_existing=True)
     return customer_schema.jsonify(customer), 200
 
 
@@ -175,7 +233,15 @@ def delete_customer(customer_id):
 # List Customers With Most Tickets (Top 3)
 @customers_bp.route('/top', methods=['GET'])
 def get_top_customers():
-    query = select(Customer)
-    customers = db.session.execute(query).scalars().all()
-    customers.sort(key=lambda c: len(c.service_tickets), reverse=True)
-    return customers_schema.jsonify(customers[:3]), 200
\ No newline at end of file
+    # Rank in SQL rather than loading every customer's tickets to len() them
+    # A derived table, since MySQL rejects LIMIT inside an IN subquery
+    ticket_count = func.count(ServiceTicket.id)
+    top = (
+        select(Customer.id, ticket_count.label('ticket_count')).outerjoin(Customer.service_tickets)
+        .group_by(Customer.id).order_by(ticket_count.desc(), Customer.id).limit(3)
+    ).subquery()
+    customers = db.session.execute(
+        select(Customer).join(top, Customer.id == top.c.id)
+        .order_by(top.c.ticket_count.desc(), Customer.id).options(*CUSTOMER_LOAD_OPTIONS)
+    ).scalars().all()
+    return customers_serializer.jsonify(customers), 200
\ No newline at end of file
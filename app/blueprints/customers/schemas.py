@@ -1,6 +1,8 @@
 from app.models import Customer
 from app.extensions import ma
-from marshmallow import fields, validate
+from app.utils.vin import VIN_PATTERN, fill_from_vin
+from app.utils.serializers import compile_schema
+from marshmallow import fields, validate, pre_load
 
 
 class CustomerSchema(ma.SQLAlchemyAutoSchema):
@@ -15,5 +17,33 @@ class CustomerSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         include_fk = True
 
+
+class VehicleImportSchema(ma.Schema):
+    vin = fields.String(required=True, validate=validate.Regexp(VIN_PATTERN, error='Not a valid 17 character VIN.'))
+    make = fields.String(required=True, validate=validate.Length(min=1, max=50))
+    model = fields.String(required=True, validate=validate.Length(min=1, max=50))
+    year = fields.Integer(required=True, validate=validate.Range(min=1900, max=2100))
+    color = fields.String(load_default=None, validate=validate.Length(max=30))
+    license_plate = fields.String(load_default=None, validate=validate.Length(max=15))
+
+    @pre_load
+    def decode_vin(self, data, **kwargs):
+        # make and year may be left out when the VIN decodes them
+        return fill_from_vin(data)
+
+
+class CustomerImportSchema(ma.Schema):
+    """One customer row of a bulk import, with any vehicles they own"""
+    name = fields.String(required=True, validate=validate.Length(min=1, max=255))
+    email = fields.Email(required=True)
+    phone = fields.String(required=True, validate=validate.Length(min=1, max=20))
+    password = fields.String(required=True, validate=validate.Length(min=1))
+    firebase_uid = fields.String(load_default=None, validate=validate.Length(max=128))
+    vehicles = fields.List(fields.Nested(VehicleImportSchema), load_default=list)
+
+
 customer_schema = CustomerSchema()
-customers_schema = CustomerSchema(many=True)
\ No newline at end of file
+customers_schema = CustomerSchema(many=True)
+customer_serializer = compile_schema(customer_schema)
+customers_serializer = compile_schema(customers_schema)
+customer_import_schema = CustomerImportSchema()
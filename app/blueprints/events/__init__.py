@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+events_bp = Blueprint('events_bp', __name__)
+
+from . import routes
\ No newline at end of file
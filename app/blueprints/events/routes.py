@@ -0,0 +1,53 @@
+from app.utils.util import mechanic_token_required
+from app.utils.events import event_broker, format_sse, DEFAULT_BUFFER_SIZE, DEFAULT_HEARTBEAT_SECONDS
+from flask import request, jsonify, current_app, Response
+from app.models import db
+from . import events_bp
+
+
+# Stream Service Ticket Events (Server-Sent Events (Requires Mechanic Token))
+@events_bp.route('/', methods=['GET'])
+@mechanic_token_required
+def stream_events():
+    """
+    Query Params (all optional filters):
+        customer_id: int
+        mechanic_id: int
+        status: str
+    """
+    try:
+        customer_id = int(request.args['customer_id']) if 'customer_id' in request.args else None
+        mechanic_id = int(request.args['mechanic_id']) if 'mechanic_id' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'customer_id and mechanic_id must be integers'}), 400
+
+    buffer_size = current_app.config.get('EVENTS_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS)
+
+    # Subscribe before returning so nothing published after this request is missed
+    subscription = event_broker.subscribe(
+        buffer_size,
+        customer_id=customer_id,
+        mechanic_id=mechanic_id,
+        status=request.args.get('status')
+    )
+
+    # Release the DB connection used for auth - the stream itself never touches the DB
+    db.session.close()
+
+    def generate():
+        try:
+            yield f'retry: {heartbeat * 1000}\n\n'
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ': heartbeat\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -1,6 +1,10 @@
-from .schemas import inventory_schema, inventories_schema
+from .schemas import inventory_schema, inventories_schema, inventory_serializer, inventories_serializer
 from app.utils.util import mechanic_token_required
-from flask import request, jsonify
+from app.utils.sync import changes_since, InvalidCursor
+from app.utils.export import export_response, UnsupportedExportFormat
+from app.utils.pagination import paginate_query, PaginationError, RowLimitExceeded
+from app.utils.multiget import multiget_response, InvalidIds
+from flask import request, jsonify, redirect, url_for
 from marshmallow import ValidationError
 from sqlalchemy import select
 from app.models import Inventory, db
@@ -33,16 +37,41 @@ def create_inventory():
 @inventory_bp.route('/', methods=['GET'])
 @cache.cached(timeout=60, query_string=True)
 def get_all_inventory():
+    if 'ids' in request.args:
+        try:
+            return multiget_response(Inventory, inventories_serializer), 200
+        except InvalidIds as e:
+            return jsonify({'error': str(e)}), 400
+
+    query = select(Inventory).order_by(Inventory.part_name, Inventory.id)
+    try:
+        inventories = paginate_query(query, 'inventory')
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except RowLimitExceeded:
+        # Unbounded Reads Go Through The Streaming Export
+        return redirect(url_for('inventory_bp.export_inventory'), 303)
+    return inventories_serializer.jsonify(inventories), 200
+
+
+# Export All Inventory Parts As NDJSON or CSV (Streamed (Requires Mechanic Token))
+@inventory_bp.route('/export', methods=['GET'])
+@mechanic_token_required
+def export_inventory():
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page', 10))
-        query = select(Inventory).order_by(Inventory.part_name)
-        inventories = db.paginate(query, page=page, per_page=per_page)
-        return inventories_schema.jsonify(inventories), 200
-    except:
-        query = select(Inventory).order_by(Inventory.part_name)
-        inventories = db.session.execute(query).scalars().all()
-        return inventories_schema.jsonify(inventories), 200
+        return export_response(Inventory, inventory_schema, request.args.get('format', 'ndjson'), 'inventory')
+    except UnsupportedExportFormat as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Get Inventory Changes Since A Sync Cursor (Delta Sync)
+@inventory_bp.route('/changes', methods=['GET'])
+def get_inventory_changes():
+    try:
+        changes = changes_since(Inventory, inventories_serializer, request.args.get('since'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(changes), 200
 
 
 # Get Single Inventory Part
@@ -50,7 +79,7 @@ def get_all_inventory():
 def get_inventory(inventory_id):
     inventory = db.session.get(Inventory, inventory_id)
     if inventory:
-        return inventory_schema.jsonify(inventory), 200
+        return inventory_serializer.jsonify(inventory), 200
     return jsonify({"message": "Inventory part not found."}), 404
 
 
@@ -97,9 +126,12 @@ def delete_inventory(inventory_id):
 @mechanic_token_required
 def search_inventory():
     part_name = request.args.get('part_name', '')
-    query = select(Inventory).where(Inventory.part_name.ilike(f'%{part_name}%'))
-    inventories = db.session.execute(query).scalars().all()
-    return inventories_schema.jsonify(inventories), 200
+    query = select(Inventory).where(Inventory.part_name.ilike(f'%{part_name}%')).order_by(Inventory.id)
+    try:
+        inventories = paginate_query(query, 'inventory')
+    except (PaginationError, RowLimitExceeded) as e:
+        return jsonify({'error': str(e)}), 400
+    return inventories_serializer.jsonify(inventories), 200
 
 
 # Get Low Stock Inventory Parts (Below Threshold (Default: 5))
@@ -107,11 +139,14 @@ def search_inventory():
 @mechanic_token_required
 def get_low_stock():
     threshold = int(request.args.get('threshold', 5))
-    query = select(Inventory).where(Inventory.quantity_in_stock <= threshold).order_by(Inventory.quantity_in_stock)
-    low_stock_parts = db.session.execute(query).scalars().all()
+    query = select(Inventory).where(Inventory.quantity_in_stock <= threshold).order_by(Inventory.quantity_in_stock, Inventory.id)
+    try:
+        low_stock_parts = list(paginate_query(query, 'inventory'))
+    except (PaginationError, RowLimitExceeded) as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
         'threshold': threshold,
         'count': len(low_stock_parts),
-        'parts': inventories_schema.dump(low_stock_parts)
+        'parts': inventories_serializer.dump(low_stock_parts)
     }), 200
\ No newline at end of file
@@ -1,11 +1,14 @@
 from app.models import Inventory, ServiceInventory
 from app.extensions import ma
+from app.utils.serializers import compile_schema
 from marshmallow import fields, validate
 
 class InventorySchema(ma.SQLAlchemyAutoSchema):
     part_name = fields.Str(required=True, validate=validate.Length(min=1, max=255))
     price = fields.Float(required=True, validate=validate.Range(min=0.01))
     quantity_in_stock = fields.Int(required=True, validate=validate.Range(min=0))
+    updated_at = fields.DateTime(dump_only=True)
+
     class Meta:
         model = Inventory
         load_instance = True
@@ -30,4 +33,7 @@ inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
 service_inventory_schema = ServiceInventorySchema()
 service_inventories_schema = ServiceInventorySchema(many=True)
+inventory_serializer = compile_schema(inventory_schema)
+inventories_serializer = compile_schema(inventories_schema)
+service_inventories_serializer = compile_schema(service_inventories_schema)
 add_part_to_ticket_schema = AddPartToTicketSchema()
\ No newline at end of file
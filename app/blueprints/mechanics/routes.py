@@ -1,14 +1,25 @@
-from .schemas import mechanic_schema, mechanics_schema
-from app.utils.util import encode_mechanic_token, mechanic_token_required
+from .schemas import mechanic_schema, mechanics_schema, mechanic_serializer, mechanics_serializer, mechanic_history_serializer
+from app.blueprints.service_tickets.schemas import service_tickets_serializer, TICKET_LOAD_OPTIONS
+from app.blueprints.service_tickets.lifecycle import STATUSES
+from app.utils.util import encode_mechanic_token, mechanic_token_required, hashpw, checkpw
 from app.utils.firebase_admin import set_user_claims, delete_firebase_user
+from app.utils.pagination import paginate_query, keyset_paginate, PaginationError, RowLimitExceeded
+from app.utils.multiget import multiget_response, InvalidIds
 from flask import request, jsonify
 from marshmallow import ValidationError
-from sqlalchemy import select
-from app.models import Mechanic, db
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+from app.models import Mechanic, ServiceTicket, ServiceInventory, service_mechanics, db
 from app.extensions import limiter, cache
-from bcrypt import hashpw, gensalt, checkpw
+from bcrypt import gensalt
 from . import mechanics_bp
 
+# Eager loads for a mechanic's ticket history (?include=service_tickets)
+MECHANIC_LOAD_OPTIONS = (
+    selectinload(Mechanic.service_tickets).selectinload(ServiceTicket.customer),
+    selectinload(Mechanic.service_tickets).selectinload(ServiceTicket.service_inventories).selectinload(ServiceInventory.inventory),
+)
+
 
 # Login Mechanic
 @mechanics_bp.route('/login', methods=['POST'])
@@ -83,32 +94,79 @@ def create_mechanic():
 
 # Get All Mechanics (W/ Pagination and Caching)
 @mechanics_bp.route('/', methods=['GET'])
-@cache.cached(timeout=60)
 @mechanic_token_required
+@cache.cached(timeout=60, query_string=True)
 def get_all_mechanics():
-    try:
-        page = int(request.args.get('page'))
+    if 'ids' in request.args:
+        try:
+            return multiget_response(Mechanic, mechanics_serializer), 200
+        except InvalidIds as e:
+            return jsonify({'error': str(e)}), 400
 
-        per_page = int(request.args.get('per_page', 10))
-        query = select(Mechanic)
-        mechanics = db.paginate(query, page=page, per_page=per_page)
-        return mechanics_schema.jsonify(mechanics), 200
-    except:
-        query = select(Mechanic)
-        mechanics = db.session.execute(query).scalars().all()
-        return mechanics_schema.jsonify(mechanics), 200
+    query = select(Mechanic).order_by(Mechanic.id)
+    try:
+        mechanics = paginate_query(query, 'mechanics')
+    except (PaginationError, RowLimitExceeded) as e:
+        return jsonify({'error': str(e)}), 400
+    return mechanics_serializer.jsonify(mechanics), 200
 
 
 # Get a Specific Mechanic
 @mechanics_bp.route('/<int:mechanic_id>', methods=['GET'])
 @mechanic_token_required
 def get_mechanic(mechanic_id):
-    mechanic = db.session.get(Mechanic, mechanic_id)
+    """
+    Query Params:
+        include: 'service_tickets' to also dump every ticket the mechanic has worked
+    """
+    include = request.args.get('include')
+    if include not in (None, 'service_tickets'):
+        return jsonify({'error': f'Unknown include: {include} (allowed: service_tickets)'}), 400
+
+    if include:
+        mechanic = db.session.execute(
+            select(Mechanic).where(Mechanic.id == mechanic_id).options(*MECHANIC_LOAD_OPTIONS)
+        ).scalar_one_or_none()
+    else:
+        mechanic = db.session.get(Mechanic, mechanic_id)
     if mechanic:
-        return mechanic_schema.jsonify(mechanic), 200
+        serializer = mechanic_history_serializer if include else mechanic_serializer
+        return serializer.jsonify(mechanic), 200
     return jsonify({"message": "Mechanic not found."}), 404
 
 
+# Get My Service Tickets (Keyset Paginated (Requires Mechanic Token))
+@mechanics_bp.route('/my-tickets', methods=['GET'])
+@mechanic_token_required
+def get_my_tickets():
+    """
+    Query Params:
+        status: str (optional)
+        after: cursor from the previous page's 'next'
+        per_page: int
+    Walks the service_mechanics (mechanic_id, service_ticket_id) covering
+    index in ticket id order, so a page never reads the mechanic's whole history.
+    """
+    mechanic = request.current_mechanic
+    query = (
+        select(ServiceTicket)
+        .join(service_mechanics, service_mechanics.c.service_ticket_id == ServiceTicket.id)
+        .where(service_mechanics.c.mechanic_id == mechanic.id)
+        .options(*TICKET_LOAD_OPTIONS)
+    )
+    status = request.args.get('status')
+    if status is not None:
+        if status not in STATUSES:
+            return jsonify({'error': f"Unknown status: {status} (allowed: {', '.join(STATUSES)})"}), 400
+        query = query.where(ServiceTicket.status == status)
+
+    try:
+        tickets, next_cursor = keyset_paginate(query, (service_mechanics.c.service_ticket_id,), lambda t: (t.id,))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'tickets': service_tickets_serializer.dump(tickets), 'next': next_cursor}), 200
+
+
 # Update Mechanic
 @mechanics_bp.route('/<int:mechanic_id>', methods=['PUT'])
 @mechanic_token_required
@@ -167,9 +225,12 @@ def delete_mechanic(mechanic_id):
 # List Mechanics With Most Tickets (Top 3)
 @mechanics_bp.route('/top', methods=['GET'])
 def get_top_mechanics():
-    query = select(Mechanic)
-    mechanics = db.session.execute(query).scalars().all()
-    mechanics.sort(key=lambda m: len(m.service_tickets), reverse=True)
+    # Count in SQL rather than loading every mechanic's tickets to len() them
+    ticket_count = func.count(service_mechanics.c.service_ticket_id)
+    query = (
+        select(Mechanic, ticket_count).outerjoin(service_mechanics, service_mechanics.c.mechanic_id == Mechanic.id)
+        .group_by(Mechanic.id).order_by(ticket_count.desc(), Mechanic.id).limit(3)
+    )
 
     # Build response with ticket counts
     top_mechanics = [
@@ -178,9 +239,9 @@ def get_top_mechanics():
             'name': m.name,
             'email': m.email,
             'phone': m.phone,
-            'ticket_count': len(m.service_tickets)
+            'ticket_count': count
         }
-        for m in mechanics[:3]
+        for m, count in db.session.execute(query)
     ]
 
     return jsonify(top_mechanics), 200
\ No newline at end of file
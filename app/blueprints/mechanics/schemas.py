@@ -1,5 +1,6 @@
 from app.models import Mechanic
 from app.extensions import ma
+from app.utils.serializers import compile_schema
 from marshmallow import fields, validate
 
 class MechanicSchema(ma.SQLAlchemyAutoSchema):
@@ -24,6 +25,10 @@ class TopMechanicSchema(ma.Schema):
     ticket_count = fields.Integer()
 
 
-mechanic_schema = MechanicSchema()
-mechanics_schema = MechanicSchema(many=True)
+# A mechanic's ticket history is unbounded, so it is only dumped on request
+mechanic_schema = MechanicSchema(exclude=('service_tickets',))
+mechanics_schema = MechanicSchema(many=True, exclude=('service_tickets',))
+mechanic_serializer = compile_schema(mechanic_schema)
+mechanic_history_serializer = compile_schema(MechanicSchema())
+mechanics_serializer = compile_schema(mechanics_schema)
 top_mechanics_schema = TopMechanicSchema(many=True)
\ No newline at end of file
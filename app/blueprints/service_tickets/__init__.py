@@ -1,5 +1,5 @@
 from flask import Blueprint
 
-service_tickets_bp = Blueprint('service_tickets_bp', __name__)
+service_tickets_bp = Blueprint('service_tickets_bp', __name__, template_folder='templates')
 
 from . import routes
\ No newline at end of file
@@ -0,0 +1,85 @@
+from flask import request
+from app.models import Customer, Vehicle, ServiceCategory, Mechanic, Inventory, ServiceInventory, service_mechanics
+from app.utils.export import scalar_fields
+from app.utils.loader import get_loader
+from app.utils.serializers import compile_schema
+from app.blueprints.customers.schemas import customers_schema
+from app.blueprints.vehicles.schemas import vehicles_serializer
+from app.blueprints.mechanics.schemas import mechanics_schema
+from app.blueprints.inventory.schemas import inventories_serializer
+from .schemas import service_tickets_schema, service_categories_serializer
+
+INCLUDES = ('customer', 'vehicle', 'category', 'mechanics', 'parts')
+
+
+class InvalidInclude(ValueError):
+    pass
+
+
+def parse_includes() -> tuple[str, ...] | None:
+    """
+    Parse ?include=customer,mechanics into relation names, or None when absent.
+
+    Raises:
+        InvalidInclude on names outside INCLUDES
+    """
+    raw = request.args.get('include')
+    if raw is None:
+        return None
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in INCLUDES]
+    if unknown:
+        raise InvalidInclude(f"Unknown include: {', '.join(unknown)} (allowed: {', '.join(INCLUDES)})")
+    return tuple(dict.fromkeys(names))
+
+
+def _scalar_serializer(schema):
+    return compile_schema(schema, only=scalar_fields(schema))
+
+
+def compound_document(tickets, includes: tuple[str, ...], many: bool = True) -> dict:
+    """
+    Dump tickets as {'data': ..., 'included': {...}}.
+
+    Tickets carry only their own columns plus references (customer_id,
+    mechanic_ids, parts); each related entity is dumped once into the
+    'included' side table no matter how many tickets point at it. Every
+    relation is resolved with one batched query via the request Loader.
+    """
+    loader = get_loader()
+    ticket_ids = [t.id for t in tickets]
+    data = _scalar_serializer(service_tickets_schema).dump(tickets, many=True)
+    included = {}
+
+    for name, model, column, serializer in (
+        ('customer', Customer, 'customer_id', _scalar_serializer(customers_schema)),
+        ('vehicle', Vehicle, 'vehicle_id', vehicles_serializer),
+        ('category', ServiceCategory, 'category_id', service_categories_serializer),
+    ):
+        if name in includes:
+            rows = loader.load(model, sorted({getattr(t, column) for t in tickets if getattr(t, column) is not None}))
+            included[f'{name}s' if name != 'category' else 'categories'] = serializer.dump(list(rows.values()), many=True)
+
+    if 'mechanics' in includes:
+        links = loader.load_grouped(service_mechanics.c.service_ticket_id, service_mechanics.c.mechanic_id, ticket_ids)
+        for ticket in data:
+            ticket['mechanic_ids'] = sorted(links[ticket['id']])
+        mechanics = loader.load(Mechanic, sorted({m for ids in links.values() for m in ids}))
+        included['mechanics'] = _scalar_serializer(mechanics_schema).dump(list(mechanics.values()), many=True)
+
+    if 'parts' in includes:
+        used = loader.load_grouped(ServiceInventory.service_ticket_id, ServiceInventory, ticket_ids)
+        for ticket in data:
+            ticket['parts'] = [
+                {
+                    'service_inventory_id': si.id,
+                    'inventory_id': si.inventory_id,
+                    'quantity_used': si.quantity_used,
+                    'price_at_service': si.price_at_service
+                }
+                for si in sorted(used[ticket['id']], key=lambda si: si.id)
+            ]
+        parts = loader.load(Inventory, sorted({si.inventory_id for rows in used.values() for si in rows}))
+        included['parts'] = inventories_serializer.dump(list(parts.values()), many=True)
+
+    return {'data': data if many else data[0], 'included': included}
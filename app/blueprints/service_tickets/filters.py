@@ -0,0 +1,43 @@
+from datetime import date
+from app.models import ServiceTicket, service_mechanics
+from app.utils.query_language import Filterable, QuerySpec
+
+RANGE = ('eq', 'gt', 'gte', 'lt', 'lte')
+
+# Every filterable field leads at least one of the indexes, so any accepted
+# query can seek instead of scanning. Indexes are listed most selective
+# first, which is how the planner breaks ties. Keep them in sync with the
+# __table_args__ on ServiceTicket and service_mechanics.
+ticket_query = QuerySpec(
+    ServiceTicket,
+    fields={
+        'status': Filterable(ServiceTicket.status, str, ('eq', 'in')),
+        'service_date': Filterable(ServiceTicket.service_date, date.fromisoformat, RANGE),
+        'customer_id': Filterable(ServiceTicket.customer_id, int, ('eq', 'in')),
+        'vehicle_id': Filterable(ServiceTicket.vehicle_id, int),
+        'category_id': Filterable(ServiceTicket.category_id, int),
+        'VIN': Filterable(ServiceTicket.VIN, str.upper),
+        'mechanic_id': Filterable(
+            service_mechanics.c.mechanic_id, int,
+            join=(service_mechanics, service_mechanics.c.service_ticket_id == ServiceTicket.id),
+            order_by={'id': service_mechanics.c.service_ticket_id}
+        ),
+    },
+    sorts={
+        'id': ServiceTicket.id,
+        'service_date': ServiceTicket.service_date,
+        'updated_at': ServiceTicket.updated_at,
+    },
+    indexes={
+        'service_tickets_pkey': ('id',),
+        'ix_service_tickets_vin': ('VIN',),
+        'ix_service_tickets_vehicle_id_service_date': ('vehicle_id', 'service_date'),
+        'ix_service_tickets_customer_id_service_date': ('customer_id', 'service_date'),
+        # The junction's second column is the ticket id, so rows come back in id order
+        'ix_service_mechanics_mechanic_id_service_ticket_id': ('mechanic_id', 'id'),
+        'ix_service_tickets_category_id_service_date': ('category_id', 'service_date'),
+        'ix_service_tickets_status_service_date': ('status', 'service_date'),
+        'ix_service_tickets_service_date': ('service_date',),
+        'ix_service_tickets_updated_at': ('updated_at',),
+    },
+)
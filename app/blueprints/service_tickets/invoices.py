@@ -0,0 +1,235 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from flask import current_app, render_template
+from sqlalchemy import select, func
+from app.extensions import cache
+from app.models import ServiceTicket, Customer, Vehicle, ServiceCategory, ServiceInventory, Inventory, db
+from .lifecycle import COMPLETED
+from .totals import labor_total, _money
+
+FORMATS = ('json', 'html')
+MIMETYPES = {'json': 'application/json', 'html': 'text/html'}
+DEFAULT_INVOICE_CACHE_TIMEOUT = 24 * 60 * 60
+DEFAULT_INVOICE_WORKERS = 4
+# Tickets per worker task - each chunk costs two queries however large it is
+INVOICE_CHUNK_SIZE = 200
+# Columns of the joined rows that build_invoice prints. Customers, vehicles and
+# categories have no updated_at, so their values go into the cache version instead
+VERSION_COLUMNS = (
+    Customer.name, Customer.email, Customer.phone,
+    Vehicle.vin, Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.license_plate,
+    ServiceCategory.name, ServiceCategory.default_labor_hours,
+)
+
+
+class UnsupportedInvoiceFormat(ValueError):
+    pass
+
+
+def _check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise UnsupportedInvoiceFormat(f"Unsupported invoice format: {fmt} (allowed: {', '.join(FORMATS)})")
+
+
+def load_invoices(ticket_ids) -> dict:
+    """
+    Build invoice dicts for ticket_ids in two queries, whatever the count:
+    the tickets joined to their customer, vehicle and category, then every
+    line item joined to its part.
+
+    Returns:
+        dict of ticket id -> invoice (missing ids are left out)
+    """
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(ServiceTicket, Customer, Vehicle, ServiceCategory)
+        .outerjoin(Customer, Customer.id == ServiceTicket.customer_id)
+        .outerjoin(Vehicle, Vehicle.id == ServiceTicket.vehicle_id)
+        .outerjoin(ServiceCategory, ServiceCategory.id == ServiceTicket.category_id)
+        .where(ServiceTicket.id.in_(ticket_ids))
+    ).all()
+
+    lines = {}
+    for line in db.session.execute(
+        select(
+            ServiceInventory.id, ServiceInventory.service_ticket_id, ServiceInventory.quantity_used,
+            ServiceInventory.price_at_service, Inventory.id.label('inventory_id'),
+            Inventory.part_name, Inventory.part_number, Inventory.price
+        )
+        .join(Inventory, Inventory.id == ServiceInventory.inventory_id)
+        .where(ServiceInventory.service_ticket_id.in_(ticket_ids))
+        .order_by(ServiceInventory.id)
+    ):
+        lines.setdefault(line.service_ticket_id, []).append(line)
+
+    return {
+        ticket.id: build_invoice(ticket, customer, vehicle, category, lines.get(ticket.id, []))
+        for ticket, customer, vehicle, category in rows
+    }
+
+
+def build_invoice(ticket, customer, vehicle, category, lines) -> dict:
+    """
+    Assemble one invoice from already-loaded rows; touches no relationships.
+
+    Completed tickets are invoices; anything else is an estimate, which
+    falls back to the category's default labor hours until hours are logged.
+    Line items are charged at the price snapshotted when the part was added.
+    """
+    is_invoice = ticket.status == COMPLETED
+    hours = ticket.labor_hours or 0.0
+    estimated_hours = not is_invoice and not hours and category is not None
+    if estimated_hours:
+        hours = category.default_labor_hours or 0.0
+
+    line_items = []
+    for line in lines:
+        unit_price = line.price_at_service if line.price_at_service is not None else line.price
+        line_items.append({
+            'service_inventory_id': line.id,
+            'inventory_id': line.inventory_id,
+            'part_name': line.part_name,
+            'part_number': line.part_number,
+            'quantity': line.quantity_used,
+            'unit_price': _money(unit_price),
+            'amount': _money(line.quantity_used * unit_price),
+        })
+
+    parts = _money(sum(item['amount'] for item in line_items))
+    labor = labor_total(hours, ticket.labor_rate)
+    return {
+        'invoice_number': f'INV-{ticket.id:06d}',
+        'document': 'invoice' if is_invoice else 'estimate',
+        'ticket_id': ticket.id,
+        'status': ticket.status,
+        'service_date': ticket.service_date.isoformat(),
+        'completed_at': ticket.completed_at.isoformat() if ticket.completed_at else None,
+        'version': ticket.updated_at.isoformat() if ticket.updated_at else None,
+        'description': ticket.service_desc,
+        'mileage': ticket.mileage,
+        'customer': {
+            'id': customer.id, 'name': customer.name, 'email': customer.email, 'phone': customer.phone
+        } if customer else None,
+        'vehicle': {
+            'id': vehicle.id, 'vin': vehicle.vin, 'year': vehicle.year, 'make': vehicle.make,
+            'model': vehicle.model, 'license_plate': vehicle.license_plate
+        } if vehicle else {'vin': ticket.VIN},
+        'category': {'id': category.id, 'name': category.name} if category else None,
+        'line_items': line_items,
+        'labor': {
+            'hours': hours,
+            'rate': ticket.labor_rate,
+            'amount': labor,
+            'estimated': estimated_hours,
+        },
+        'totals': {'parts': parts, 'labor': labor, 'total': _money(parts + labor)},
+    }
+
+
+def render_invoice(invoice: dict, fmt: str) -> str:
+    _check_format(fmt)
+    if fmt == 'html':
+        return render_template('invoice.html', invoice=invoice)
+    return current_app.json.dumps(invoice)
+
+
+def _cache_key(ticket_id: int, version: str, fmt: str) -> str:
+    return f'invoice:{ticket_id}:{version}:{fmt}'
+
+
+def _cache_timeout() -> int:
+    return current_app.config.get('INVOICE_CACHE_TIMEOUT', DEFAULT_INVOICE_CACHE_TIMEOUT)
+
+
+def _invoice_version(ticket_id: int) -> str | None:
+    """
+    Fingerprint of every row an invoice is built from, in one query: the
+    ticket's updated_at, the newest updated_at of its parts, and the printed
+    customer, vehicle and category columns. None if the ticket doesn't exist.
+    """
+    parts_updated_at = (
+        select(func.max(Inventory.updated_at))
+        .join(ServiceInventory, ServiceInventory.inventory_id == Inventory.id)
+        .where(ServiceInventory.service_ticket_id == ServiceTicket.id)
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        select(ServiceTicket.updated_at, parts_updated_at, *VERSION_COLUMNS)
+        .outerjoin(Customer, Customer.id == ServiceTicket.customer_id)
+        .outerjoin(Vehicle, Vehicle.id == ServiceTicket.vehicle_id)
+        .outerjoin(ServiceCategory, ServiceCategory.id == ServiceTicket.category_id)
+        .where(ServiceTicket.id == ticket_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    return hashlib.sha1(repr(tuple(row)).encode('utf-8')).hexdigest()
+
+
+def get_rendered_invoice(ticket_id: int, fmt: str) -> str | None:
+    """
+    Rendered invoice for one ticket, or None if the ticket doesn't exist.
+
+    The cache key carries _invoice_version, so a change to the ticket, its
+    parts, or the customer, vehicle or category it prints moves it to a new
+    key and a stale render is never served; a hit costs one primary-key
+    lookup joined to those rows.
+
+    Raises:
+        UnsupportedInvoiceFormat
+    """
+    _check_format(fmt)
+    version = _invoice_version(ticket_id)
+    if version is None:
+        return None
+
+    rendered = cache.get(_cache_key(ticket_id, version, fmt))
+    if rendered is None:
+        invoice = load_invoices([ticket_id]).get(ticket_id)
+        if invoice is None:
+            return None
+        rendered = render_invoice(invoice, fmt)
+        # Rows read after the version can only be newer, and a newer version misses this key
+        cache.set(_cache_key(ticket_id, version, fmt), rendered, timeout=_cache_timeout())
+    return rendered
+
+
+def _render_chunk(app, ticket_ids, fmt) -> dict:
+    # Each worker gets its own app context and so its own database session
+    with app.app_context():
+        return {ticket_id: render_invoice(invoice, fmt) for ticket_id, invoice in load_invoices(ticket_ids).items()}
+
+
+def render_invoices_for_day(day: date, fmt: str = 'html', workers: int = DEFAULT_INVOICE_WORKERS,
+                            chunk_size: int = INVOICE_CHUNK_SIZE) -> dict:
+    """
+    Render every invoice for tickets serviced on day. The invoice cache is
+    left alone: the default SimpleCache is per process, so warming it from a
+    script would not reach the web workers.
+
+    Ticket ids are read with one query on the service_date index, then
+    rendered in chunks across a pool of worker threads.
+
+    Returns:
+        dict of ticket id -> rendered invoice, in id order
+
+    Raises:
+        UnsupportedInvoiceFormat
+    """
+    _check_format(fmt)
+    ticket_ids = list(db.session.execute(
+        select(ServiceTicket.id).where(ServiceTicket.service_date == day).order_by(ServiceTicket.id)
+    ).scalars())
+    if not ticket_ids:
+        return {}
+
+    app = current_app._get_current_object()
+    chunks = [ticket_ids[i:i + chunk_size] for i in range(0, len(ticket_ids), chunk_size)]
+    rendered = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        for result in pool.map(lambda chunk: _render_chunk(app, chunk, fmt), chunks):
+            rendered.update(result)
+    return dict(sorted(rendered.items()))
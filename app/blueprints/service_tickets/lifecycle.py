@@ -0,0 +1,46 @@
+from datetime import datetime
+from .totals import refresh_labor
+
+PENDING = 'Pending'
+IN_PROGRESS = 'In Progress'
+ON_HOLD = 'On Hold'
+COMPLETED = 'Completed'
+CANCELLED = 'Cancelled'
+
+STATUSES = (PENDING, IN_PROGRESS, ON_HOLD, COMPLETED, CANCELLED)
+
+# Allowed next statuses. Completed and Cancelled are terminal.
+TRANSITIONS = {
+    PENDING: (IN_PROGRESS, CANCELLED),
+    IN_PROGRESS: (ON_HOLD, COMPLETED, CANCELLED),
+    ON_HOLD: (IN_PROGRESS, CANCELLED),
+    COMPLETED: (),
+    CANCELLED: (),
+}
+
+
+class InvalidTransition(ValueError):
+    def __init__(self, current: str, requested: str):
+        allowed = ', '.join(TRANSITIONS.get(current, ())) or 'none (terminal status)'
+        super().__init__(f"Cannot move a ticket from '{current}' to '{requested}' (allowed: {allowed})")
+        self.allowed = TRANSITIONS.get(current, ())
+
+
+def transition(ticket, status: str, labor_hours: float | None = None):
+    """
+    Move ticket to status, enforcing TRANSITIONS.
+
+    Completing a ticket stamps completed_at; labor_hours, if given, is recorded
+    with the transition. The caller commits.
+
+    Raises:
+        InvalidTransition
+    """
+    if status not in TRANSITIONS.get(ticket.status, ()):
+        raise InvalidTransition(ticket.status, status)
+    ticket.status = status
+    if status == COMPLETED:
+        ticket.completed_at = datetime.now()
+    if labor_hours is not None:
+        ticket.labor_hours = labor_hours
+        refresh_labor(ticket)
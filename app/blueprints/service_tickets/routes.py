@@ -1,10 +1,22 @@
-from .schemas import service_ticket_schema, service_tickets_schema, edit_service_ticket_schema
+from .filters import ticket_query
+from .lifecycle import STATUSES, PENDING, transition, InvalidTransition
+from .totals import initial_totals, refresh_labor, snapshot_prices, apply_part_change
+from .compound import compound_document, parse_includes, InvalidInclude
+from .invoices import get_rendered_invoice, UnsupportedInvoiceFormat, MIMETYPES
+from .schemas import service_ticket_schema, service_tickets_schema, edit_service_ticket_schema, service_ticket_serializer, service_tickets_serializer, batch_service_tickets_schema, status_transition_schema, TICKET_LOAD_OPTIONS
 from app.blueprints.inventory.schemas import add_part_to_ticket_schema
 from app.utils.util import mechanic_token_required
-from flask import request, jsonify
+from app.utils.sync import changes_since, InvalidCursor
+from app.utils.export import export_response, UnsupportedExportFormat
+from app.utils.events import publish_ticket_event, ticket_payload
+from app.utils.pagination import paginate_query, keyset_paginate, PaginationError, RowLimitExceeded
+from app.utils.multiget import multiget_response, get_by_ids, InvalidIds
+from app.utils.query_language import QueryError, RESERVED_PARAMS
+from flask import request, jsonify, redirect, url_for, current_app
+from datetime import datetime
 from marshmallow import ValidationError
-from sqlalchemy import select
-from app.models import ServiceTicket, Mechanic, Inventory, ServiceInventory, db
+from sqlalchemy import select, insert
+from app.models import ServiceTicket, Mechanic, Inventory, ServiceInventory, Customer, Vehicle, ServiceCategory, service_mechanics, db
 from app.extensions import limiter, cache
 from . import service_tickets_bp
 
@@ -19,35 +31,232 @@ def create_service_ticket():
         return jsonify(e.messages), 400
 
     db.session.add(new_service_ticket)
+    refresh_labor(new_service_ticket)
     db.session.commit()
+    publish_ticket_event('ticket.created', new_service_ticket)
     return service_ticket_schema.jsonify(new_service_ticket), 201
 
 
+# Create Many Service Tickets In One Transaction (Requires Mechanic Token)
+@service_tickets_bp.route('/batch', methods=['POST'])
+@mechanic_token_required
+def create_service_tickets_batch():
+    """
+    Request Body: A list of service tickets (same fields as POST /service_tickets)
+    All tickets are created, or none are.
+    """
+    if not isinstance(request.json, list) or not request.json:
+        return jsonify({'error': 'Request body must be a non-empty list of service tickets'}), 400
+    max_batch = current_app.config.get('MAX_TICKET_BATCH', 100)
+    if len(request.json) > max_batch:
+        return jsonify({'error': f'At most {max_batch} service tickets per batch'}), 400
+
+    try:
+        tickets = batch_service_tickets_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    # Verify Every Referenced Row Exists (One Query Per Foreign Key)
+    errors = {}
+    for field, model in (('customer_id', Customer), ('vehicle_id', Vehicle), ('category_id', ServiceCategory)):
+        ids = {t[field] for t in tickets if t.get(field) is not None}
+        found = set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars()) if ids else set()
+        for index, ticket in enumerate(tickets):
+            if ticket.get(field) is not None and ticket[field] not in found:
+                errors.setdefault(index, {})[field] = [f'{model.__name__} {ticket[field]} not found.']
+    if errors:
+        return jsonify(errors), 400
+
+    tickets = [dict(ticket, **initial_totals(ticket)) for ticket in tickets]
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        created_ids = list(db.session.execute(
+            insert(ServiceTicket).returning(ServiceTicket.id, sort_by_parameter_order=True),
+            tickets
+        ).scalars())
+    else:
+        # Driver can't return ids from executemany - the ORM still batches the INSERTs
+        new_tickets = [ServiceTicket(**ticket) for ticket in tickets]
+        db.session.add_all(new_tickets)
+        db.session.flush()
+        created_ids = [t.id for t in new_tickets]
+    db.session.commit()
+
+    for ticket_id, ticket in zip(created_ids, tickets):
+        publish_ticket_event('ticket.created', payload={
+            'id': ticket_id,
+            'status': PENDING,
+            'customer_id': ticket['customer_id'],
+            'vehicle_id': ticket.get('vehicle_id'),
+            'mechanic_ids': [],
+            'updated_at': None
+        })
+    return jsonify({'created_ids': created_ids, 'count': len(created_ids)}), 201
+
+
 # Get All Service Tickets (With Pagination and Caching)
 @service_tickets_bp.route('/', methods=['GET'])
 @cache.cached(timeout=60, query_string=True)
 def get_all_service_tickets():
+    """
+    Query Params (all optional):
+        ids: comma-separated ids (multi-get)
+        include: customer,vehicle,category,mechanics,parts (compound document)
+        status, service_date, customer_id, vehicle_id, category_id, VIN, mechanic_id:
+            filters - field=value or field[op]=value, see filters.py for allowed ops
+        sort: id, service_date or updated_at (prefix with - for descending)
+        page, per_page
+    """
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page', 10))
-        query = select(ServiceTicket)
-        service_tickets = db.paginate(query, page=page, per_page=per_page)
-        return service_tickets_schema.jsonify(service_tickets), 200
-    except:
-        query = select(ServiceTicket)
-        service_tickets = db.session.execute(query).scalars().all()
-        return service_tickets_schema.jsonify(service_tickets), 200
+        includes = parse_includes()
+    except InvalidInclude as e:
+        return jsonify({'error': str(e)}), 400
+
+    if 'ids' in request.args:
+        try:
+            if includes is None:
+                return multiget_response(ServiceTicket, service_tickets_serializer, *TICKET_LOAD_OPTIONS), 200
+            service_tickets, missing = get_by_ids(ServiceTicket)
+        except InvalidIds as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(dict(compound_document(service_tickets, includes), missing=missing)), 200
+
+    try:
+        query, _ = ticket_query.compile(request.args)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    if includes is None:
+        query = query.options(*TICKET_LOAD_OPTIONS)
+    try:
+        service_tickets = paginate_query(query, 'service_tickets')
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except RowLimitExceeded as e:
+        if set(request.args) - RESERVED_PARAMS:
+            # The export ignores filters, so a filtered read has to page instead
+            return jsonify({'error': str(e)}), 400
+        # Unbounded Reads Go Through The Streaming Export
+        return redirect(url_for('service_tickets_bp.export_service_tickets'), 303)
+    if includes is not None:
+        return jsonify(compound_document(list(service_tickets), includes)), 200
+    return service_tickets_serializer.jsonify(service_tickets), 200
+
+
+# Export All Service Tickets As NDJSON or CSV (Streamed (Requires Mechanic Token))
+@service_tickets_bp.route('/export', methods=['GET'])
+@mechanic_token_required
+def export_service_tickets():
+    try:
+        return export_response(ServiceTicket, service_ticket_schema, request.args.get('format', 'ndjson'), 'service_tickets')
+    except UnsupportedExportFormat as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Get Service Ticket Changes Since A Sync Cursor (Delta Sync)
+@service_tickets_bp.route('/changes', methods=['GET'])
+def get_service_ticket_changes():
+    try:
+        changes = changes_since(ServiceTicket, service_tickets_serializer, request.args.get('since'), *TICKET_LOAD_OPTIONS)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(changes), 200
 
 
 # Get a Specific Service Ticket
 @service_tickets_bp.route('/<int:ticket_id>', methods=['GET'])
 def get_service_ticket(ticket_id):
-    service_ticket = db.session.get(ServiceTicket, ticket_id)
+    try:
+        includes = parse_includes()
+    except InvalidInclude as e:
+        return jsonify({'error': str(e)}), 400
+
+    service_ticket = db.session.get(ServiceTicket, ticket_id, options=TICKET_LOAD_OPTIONS if includes is None else ())
     if service_ticket:
-        return service_ticket_schema.jsonify(service_ticket), 200
+        if includes is not None:
+            return jsonify(compound_document([service_ticket], includes, many=False)), 200
+        return service_ticket_serializer.jsonify(service_ticket), 200
     return jsonify({"message": "Service Ticket not found."}), 404
 
 
+# Get A Service Ticket's Invoice Or Estimate As JSON or HTML (Requires Mechanic Token)
+@service_tickets_bp.route('/<int:ticket_id>/invoice', methods=['GET'])
+@mechanic_token_required
+def get_service_ticket_invoice(ticket_id):
+    """
+    Query Params:
+        format: json (default) or html
+    Completed tickets render as an invoice, anything else as an estimate.
+    """
+    fmt = request.args.get('format', 'json')
+    try:
+        rendered = get_rendered_invoice(ticket_id, fmt)
+    except UnsupportedInvoiceFormat as e:
+        return jsonify({'error': str(e)}), 400
+    if rendered is None:
+        return jsonify({'error': 'Service Ticket not found'}), 404
+    return current_app.response_class(rendered, status=200, mimetype=MIMETYPES[fmt])
+
+
+# Move A Service Ticket Through Its Lifecycle (Requires Mechanic Token)
+@service_tickets_bp.route('/<int:ticket_id>/status', methods=['PUT'])
+@mechanic_token_required
+def update_service_ticket_status(ticket_id):
+    """
+    Request Body:
+        status: str - next status, see lifecycle.TRANSITIONS
+        labor_hours: float (optional)
+    """
+    try:
+        data = status_transition_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    service_ticket = db.session.get(ServiceTicket, ticket_id)
+    if not service_ticket:
+        return jsonify({'error': 'Service Ticket not found'}), 404
+
+    try:
+        transition(service_ticket, data['status'], data.get('labor_hours'))
+    except InvalidTransition as e:
+        return jsonify({'error': str(e), 'allowed': list(e.allowed)}), 409
+    db.session.commit()
+    publish_ticket_event('ticket.status_changed', service_ticket)
+    return service_ticket_serializer.jsonify(service_ticket), 200
+
+
+# Work Queue: Tickets In A Status, Oldest First (Keyset Paginated (Requires Mechanic Token))
+@service_tickets_bp.route('/queue/<status>', methods=['GET'])
+@mechanic_token_required
+def get_work_queue(status):
+    """
+    Query Params:
+        mechanic_id: int (optional) - only tickets assigned to this mechanic
+        after: cursor from the previous page's 'next'
+        per_page: int
+    Served by ix_service_tickets_status_service_date; the per-mechanic queue
+    also probes the service_mechanics (mechanic_id, service_ticket_id) index.
+    """
+    if status not in STATUSES:
+        return jsonify({'error': f"Unknown status: {status} (allowed: {', '.join(STATUSES)})"}), 404
+
+    query = select(ServiceTicket).where(ServiceTicket.status == status).options(*TICKET_LOAD_OPTIONS)
+    mechanic_id = request.args.get('mechanic_id')
+    if mechanic_id is not None:
+        try:
+            mechanic_id = int(mechanic_id)
+        except ValueError:
+            return jsonify({'error': 'mechanic_id must be an integer'}), 400
+        query = query.join(service_mechanics, service_mechanics.c.service_ticket_id == ServiceTicket.id)
+        query = query.where(service_mechanics.c.mechanic_id == mechanic_id)
+
+    try:
+        tickets, next_cursor = keyset_paginate(
+            query, (ServiceTicket.service_date, ServiceTicket.id), lambda t: (t.service_date, t.id)
+        )
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'tickets': service_tickets_serializer.dump(tickets), 'next': next_cursor}), 200
+
+
 # Assign Mechanic to Service Ticket (Requires Mechanic Token)
 @service_tickets_bp.route('/<int:ticket_id>/assign-mechanic/<int:mechanic_id>', methods=['PUT'])
 @mechanic_token_required
@@ -67,7 +276,9 @@ def assign_mechanic(ticket_id, mechanic_id):
 
     # Append mechanic to the service ticket's mechanics list
     service_ticket.mechanics.append(mechanic)
+    service_ticket.updated_at = datetime.now()
     db.session.commit()
+    publish_ticket_event('ticket.assigned', service_ticket)
     return service_ticket_schema.jsonify(service_ticket), 200
 
 
@@ -90,7 +301,9 @@ def remove_mechanic(ticket_id, mechanic_id):
 
     # Remove mechanic from the service ticket's mechanics list
     service_ticket.mechanics.remove(mechanic)
+    service_ticket.updated_at = datetime.now()
     db.session.commit()
+    publish_ticket_event('ticket.unassigned', service_ticket)
     return service_ticket_schema.jsonify(service_ticket), 200
 
 
@@ -103,8 +316,10 @@ def delete_service_ticket(ticket_id):
     if not service_ticket:
         return jsonify({'error': 'Service Ticket not found'}), 404
 
+    payload = ticket_payload(service_ticket)
     db.session.delete(service_ticket)
     db.session.commit()
+    publish_ticket_event('ticket.deleted', payload=payload)
     return jsonify({'message': 'Service Ticket deleted successfully'}), 200
 
 
@@ -132,7 +347,9 @@ def edit_service_ticket_mechanics(ticket_id):
         mechanic = db.session.get(Mechanic, mechanic_id)
         if mechanic and mechanic in service_ticket.mechanics:
             service_ticket.mechanics.remove(mechanic)
+    service_ticket.updated_at = datetime.now()
     db.session.commit()
+    publish_ticket_event('ticket.assigned', service_ticket)
     return service_ticket_schema.jsonify(service_ticket), 200
 
 
@@ -180,9 +397,13 @@ def add_inventory_to_ticket(ticket_id):
 
     if existing:
         # Update Quantity
+        snapshot_prices(existing, inventory)
         existing.quantity_used += data['quantity_used']
+        apply_part_change(service_ticket, existing, data['quantity_used'])
         inventory.quantity_in_stock -= data['quantity_used'] # Deduct From Stock
+        service_ticket.updated_at = datetime.now()
         db.session.commit()
+        publish_ticket_event('ticket.parts_changed', service_ticket)
         return jsonify({
             'message': f'Updated quantity for {inventory.part_name}',
             'part': inventory.part_name,
@@ -196,9 +417,13 @@ def add_inventory_to_ticket(ticket_id):
             inventory_id=data['inventory_id'],
             quantity_used=data['quantity_used']
         )
+        snapshot_prices(new_service_inventory, inventory)
+        apply_part_change(service_ticket, new_service_inventory, data['quantity_used'])
         inventory.quantity_in_stock -= data['quantity_used'] # Deduct From Stock
         db.session.add(new_service_inventory)
+        service_ticket.updated_at = datetime.now()
         db.session.commit()
+        publish_ticket_event('ticket.parts_changed', service_ticket)
         return jsonify({
             'message': f'Added {data['quantity_used']}x {inventory.part_name} to service ticket',
             'part': inventory.part_name,
@@ -221,8 +446,13 @@ def remove_inventory_from_ticket(ticket_id, service_inventory_id):
     # Restore Stock
     inventory = service_inventory.inventory
     inventory.quantity_in_stock += service_inventory.quantity_used
+    service_ticket = service_inventory.service_ticket
+    snapshot_prices(service_inventory, inventory)
+    apply_part_change(service_ticket, service_inventory, -service_inventory.quantity_used)
+    service_ticket.updated_at = datetime.now()
     db.session.delete(service_inventory)
     db.session.commit()
+    publish_ticket_event('ticket.parts_changed', service_ticket)
     return jsonify({
         'message': f'Removed {inventory.part_name} from ticket & restored stock',
         'part': inventory.part_name,
@@ -1,11 +1,22 @@
-from app.models import ServiceTicket
+from app.models import ServiceTicket, ServiceCategory, ServiceInventory
 from app.extensions import ma
-from marshmallow import fields
+from app.utils.serializers import compile_schema
+from marshmallow import fields, validate
+from sqlalchemy.orm import selectinload
+from .lifecycle import STATUSES
 
 class ServiceTicketSchema(ma.SQLAlchemyAutoSchema):
     customer = fields.Nested('CustomerSchema', dump_only=True, exclude=('service_tickets',))
     mechanics = fields.Nested('MechanicSchema', many=True, dump_only=True, exclude=('service_tickets',))
     service_inventories = fields.Nested('ServiceInventorySchema', many=True, dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+    # Set by lifecycle.transition() through PUT /<id>/status, never on create
+    status = fields.String(dump_only=True)
+    completed_at = fields.DateTime(dump_only=True)
+    parts_total = fields.Float(dump_only=True)
+    parts_cost = fields.Float(dump_only=True)
+    labor_total = fields.Float(dump_only=True)
+    grand_total = fields.Float(dump_only=True)
 
     class Meta:
         model = ServiceTicket
@@ -13,6 +24,17 @@ class ServiceTicketSchema(ma.SQLAlchemyAutoSchema):
         include_fk = True
 
 
+class ServiceCategorySchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = ServiceCategory
+        load_instance = True
+
+
+class StatusTransitionSchema(ma.Schema):
+    status = fields.String(required=True, validate=validate.OneOf(STATUSES))
+    labor_hours = fields.Float(validate=validate.Range(min=0))
+
+
 class EditServiceTicketSchema(ma.Schema):
     add_ids = fields.List(fields.Int(), required=True)
     remove_ids = fields.List(fields.Int(), required=True)
@@ -22,4 +44,16 @@ class EditServiceTicketSchema(ma.Schema):
 
 service_ticket_schema = ServiceTicketSchema()
 service_tickets_schema = ServiceTicketSchema(many=True)
-edit_service_ticket_schema = EditServiceTicketSchema()
\ No newline at end of file
+batch_service_tickets_schema = ServiceTicketSchema(many=True, load_instance=False)
+service_ticket_serializer = compile_schema(service_ticket_schema)
+service_tickets_serializer = compile_schema(service_tickets_schema)
+service_categories_serializer = compile_schema(ServiceCategorySchema(many=True))
+edit_service_ticket_schema = EditServiceTicketSchema()
+status_transition_schema = StatusTransitionSchema()
+
+# Eager loads for everything ServiceTicketSchema nests
+TICKET_LOAD_OPTIONS = (
+    selectinload(ServiceTicket.customer),
+    selectinload(ServiceTicket.mechanics),
+    selectinload(ServiceTicket.service_inventories).selectinload(ServiceInventory.inventory),
+)
@@ -0,0 +1,137 @@
+from sqlalchemy import select, update, func
+from app.models import ServiceTicket, ServiceInventory, Inventory, db
+
+TOTAL_COLUMNS = ('parts_total', 'parts_cost', 'labor_total', 'grand_total')
+DEFAULT_REBUILD_BATCH_SIZE = 1000
+
+# Differences below half a cent are float noise, not drift
+TOLERANCE = 0.005
+
+
+def _money(value) -> float:
+    return round(value or 0.0, 2)
+
+
+def _column_default(name: str):
+    return ServiceTicket.__table__.c[name].default.arg
+
+
+def labor_total(labor_hours, labor_rate) -> float:
+    """Labor charge, falling back to the column defaults for values not set yet."""
+    hours = labor_hours if labor_hours is not None else _column_default('labor_hours')
+    rate = labor_rate if labor_rate is not None else _column_default('labor_rate')
+    return _money(hours * rate)
+
+
+def initial_totals(ticket: dict) -> dict:
+    """Total columns for a new ticket given as a dict of column values (no parts yet)."""
+    labor = labor_total(ticket.get('labor_hours'), ticket.get('labor_rate'))
+    return {'parts_total': 0.0, 'parts_cost': 0.0, 'labor_total': labor, 'grand_total': labor}
+
+
+def refresh_labor(ticket):
+    """Recompute labor_total and grand_total after labor_hours or labor_rate changed."""
+    ticket.labor_total = labor_total(ticket.labor_hours, ticket.labor_rate)
+    ticket.grand_total = _money((ticket.parts_total or 0.0) + ticket.labor_total)
+
+
+def snapshot_prices(service_inventory, inventory):
+    """Freeze the part's price and cost on the ticket line the first time it is used."""
+    if service_inventory.price_at_service is None:
+        service_inventory.price_at_service = inventory.price
+    if service_inventory.cost_at_service is None:
+        service_inventory.cost_at_service = inventory.cost or 0.0
+
+
+def apply_part_change(ticket, service_inventory, quantity: int):
+    """
+    Add (or with a negative quantity, remove) quantity units of a ticket line to
+    the ticket's totals, at the line's snapshot price and cost. Call in the same
+    transaction as the ServiceInventory change.
+    """
+    ticket.parts_total = _money((ticket.parts_total or 0.0) + quantity * service_inventory.price_at_service)
+    ticket.parts_cost = _money((ticket.parts_cost or 0.0) + quantity * (service_inventory.cost_at_service or 0.0))
+    if ticket.labor_total is None:
+        ticket.labor_total = labor_total(ticket.labor_hours, ticket.labor_rate)
+    ticket.grand_total = _money(ticket.parts_total + ticket.labor_total)
+
+
+def rebuild_totals(batch_size: int = DEFAULT_REBUILD_BATCH_SIZE, dry_run: bool = False, on_batch=None) -> dict:
+    """
+    Recompute every ticket's totals from its lines and fix any that drifted.
+
+    Lines without a price/cost snapshot (added before snapshots existed) are
+    first stamped with the part's current price and cost. Tickets are walked
+    by id in batches, each batch one grouped query and one commit.
+
+    Returns:
+        dict with 'checked', 'fixed', 'snapshots_filled' and up to 100 'drifted' samples
+    """
+    summary = {'checked': 0, 'fixed': 0, 'snapshots_filled': 0, 'drifted': []}
+
+    summary['snapshots_filled'] = db.session.execute(
+        select(func.count()).select_from(ServiceInventory).where(
+            ServiceInventory.price_at_service.is_(None) | ServiceInventory.cost_at_service.is_(None)
+        )
+    ).scalar_one()
+    if summary['snapshots_filled'] and not dry_run:
+        for column, source in (('price_at_service', Inventory.price), ('cost_at_service', Inventory.cost)):
+            current = select(func.coalesce(source, 0.0)).where(Inventory.id == ServiceInventory.inventory_id).scalar_subquery()
+            db.session.execute(
+                update(ServiceInventory)
+                .where(getattr(ServiceInventory, column).is_(None))
+                .values({column: current})
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    last_id = 0
+    while True:
+        tickets = db.session.execute(
+            select(ServiceTicket.id, ServiceTicket.labor_hours, ServiceTicket.labor_rate,
+                   *[getattr(ServiceTicket, c) for c in TOTAL_COLUMNS])
+            .where(ServiceTicket.id > last_id)
+            .order_by(ServiceTicket.id)
+            .limit(batch_size)
+        ).all()
+        if not tickets:
+            break
+        last_id = tickets[-1].id
+
+        parts = {
+            row.service_ticket_id: row
+            for row in db.session.execute(
+                select(
+                    ServiceInventory.service_ticket_id,
+                    func.sum(ServiceInventory.quantity_used * func.coalesce(ServiceInventory.price_at_service, Inventory.price)).label('parts_total'),
+                    func.sum(ServiceInventory.quantity_used * func.coalesce(ServiceInventory.cost_at_service, Inventory.cost, 0.0)).label('parts_cost')
+                )
+                .join(Inventory, Inventory.id == ServiceInventory.inventory_id)
+                .where(ServiceInventory.service_ticket_id.in_([t.id for t in tickets]))
+                .group_by(ServiceInventory.service_ticket_id)
+            )
+        }
+
+        fixes = []
+        for ticket in tickets:
+            line = parts.get(ticket.id)
+            expected = {
+                'parts_total': _money(line.parts_total if line else 0.0),
+                'parts_cost': _money(line.parts_cost if line else 0.0),
+                'labor_total': labor_total(ticket.labor_hours, ticket.labor_rate),
+            }
+            expected['grand_total'] = _money(expected['parts_total'] + expected['labor_total'])
+            if any(getattr(ticket, c) is None or abs(getattr(ticket, c) - expected[c]) > TOLERANCE for c in TOTAL_COLUMNS):
+                fixes.append(dict(expected, id=ticket.id))
+                if len(summary['drifted']) < 100:
+                    summary['drifted'].append({'id': ticket.id, 'stored': {c: getattr(ticket, c) for c in TOTAL_COLUMNS}, 'expected': expected})
+
+        summary['checked'] += len(tickets)
+        summary['fixed'] += len(fixes)
+        if fixes and not dry_run:
+            db.session.execute(update(ServiceTicket), fixes)
+            db.session.commit()
+        if on_batch:
+            on_batch(summary)
+
+    return summary
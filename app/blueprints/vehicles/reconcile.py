@@ -0,0 +1,82 @@
+from sqlalchemy import select, update
+from app.models import ServiceTicket, Vehicle, db
+from app.utils.vin import normalize_vin
+
+DEFAULT_RECONCILE_BATCH_SIZE = 1000
+
+
+def reconcile_ticket_vehicles(batch_size: int = DEFAULT_RECONCILE_BATCH_SIZE, dry_run: bool = False, on_batch=None) -> dict:
+    """
+    Bring every ServiceTicket.VIN in line with its vehicle_id.
+
+    vehicle_id is authoritative: a linked ticket whose VIN copy disagrees
+    with its vehicle gets the vehicle's VIN. An unlinked ticket is linked to
+    the vehicle registered under its VIN when that vehicle belongs to the
+    ticket's customer; if it belongs to someone else it is reported as a
+    conflict and left alone. Tickets are walked by id in batches, each batch
+    two lookups and one commit.
+
+    Returns:
+        dict with 'checked', 'vin_fixed', 'linked', 'conflicts', 'unmatched'
+        and up to 100 'samples' of what changed or was skipped
+    """
+    summary = {'checked': 0, 'vin_fixed': 0, 'linked': 0, 'conflicts': 0, 'unmatched': 0, 'samples': []}
+
+    def sample(kind, ticket, **details):
+        if len(summary['samples']) < 100:
+            summary['samples'].append(dict(details, kind=kind, id=ticket.id, VIN=ticket.VIN, vehicle_id=ticket.vehicle_id))
+
+    last_id = 0
+    while True:
+        tickets = db.session.execute(
+            select(ServiceTicket.id, ServiceTicket.VIN, ServiceTicket.vehicle_id, ServiceTicket.customer_id)
+            .where(ServiceTicket.id > last_id)
+            .order_by(ServiceTicket.id)
+            .limit(batch_size)
+        ).all()
+        if not tickets:
+            break
+        last_id = tickets[-1].id
+
+        linked_ids = {t.vehicle_id for t in tickets if t.vehicle_id is not None}
+        unlinked_vins = {normalize_vin(t.VIN) for t in tickets if t.vehicle_id is None and t.VIN}
+        vehicles = db.session.execute(
+            select(Vehicle.id, Vehicle.vin, Vehicle.customer_id)
+            .where(Vehicle.id.in_(linked_ids) | Vehicle.vin.in_(unlinked_vins))
+        ).all() if linked_ids or unlinked_vins else []
+        by_id = {v.id: v for v in vehicles}
+        by_vin = {v.vin: v for v in vehicles}
+
+        fixes = []
+        for ticket in tickets:
+            if ticket.vehicle_id is not None:
+                vehicle = by_id.get(ticket.vehicle_id)
+                if vehicle is None:
+                    summary['unmatched'] += 1
+                    sample('missing_vehicle', ticket)
+                elif ticket.VIN != vehicle.vin:
+                    fixes.append({'id': ticket.id, 'VIN': vehicle.vin})
+                    summary['vin_fixed'] += 1
+                    sample('vin_fixed', ticket, new_VIN=vehicle.vin)
+                continue
+
+            vehicle = by_vin.get(normalize_vin(ticket.VIN)) if ticket.VIN else None
+            if vehicle is None:
+                summary['unmatched'] += 1
+                sample('unmatched', ticket)
+            elif vehicle.customer_id != ticket.customer_id:
+                summary['conflicts'] += 1
+                sample('conflict', ticket, vehicle_customer_id=vehicle.customer_id, ticket_customer_id=ticket.customer_id)
+            else:
+                fixes.append({'id': ticket.id, 'VIN': vehicle.vin, 'vehicle_id': vehicle.id})
+                summary['linked'] += 1
+                sample('linked', ticket, new_vehicle_id=vehicle.id)
+
+        summary['checked'] += len(tickets)
+        if fixes and not dry_run:
+            db.session.execute(update(ServiceTicket), fixes)
+            db.session.commit()
+        if on_batch:
+            on_batch(summary)
+
+    return summary
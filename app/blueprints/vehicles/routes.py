@@ -0,0 +1,160 @@
+from .schemas import vehicle_schema, vehicle_serializer, vehicles_serializer
+from app.utils.vin import normalize_vin
+from app.blueprints.service_tickets.schemas import service_tickets_serializer, TICKET_LOAD_OPTIONS
+from app.utils.util import mechanic_token_required
+from app.utils.pagination import paginate_query, keyset_paginate, PaginationError, RowLimitExceeded
+from app.utils.multiget import multiget_response, InvalidIds
+from flask import request, jsonify
+from marshmallow import ValidationError
+from sqlalchemy import select, update
+from app.models import Vehicle, Customer, ServiceTicket, db
+from app.extensions import limiter, cache
+from . import vehicles_bp
+
+
+def _get_by_vin(vin):
+    # vehicles.vin is unique, so this is a single index seek
+    return db.session.execute(select(Vehicle).where(Vehicle.vin == normalize_vin(vin))).scalar_one_or_none()
+
+
+# Create A Vehicle (Requires Mechanic Token)
+@vehicles_bp.route('/', methods=['POST'])
+@mechanic_token_required
+def create_vehicle():
+    """
+    Request Body:
+    {
+        'vin': '1HGCM82633A123456',
+        'make': 'Honda',
+        'model': 'Accord',
+        'year': 2003,
+        'customer_id': 1
+    }
+    """
+    try:
+        new_vehicle = vehicle_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if not db.session.get(Customer, new_vehicle.customer_id):
+        return jsonify({'error': 'Customer not found'}), 404
+    if _get_by_vin(new_vehicle.vin):
+        return jsonify({'message': 'Vehicle with this VIN already exists.'}), 400
+
+    db.session.add(new_vehicle)
+    db.session.commit()
+    return vehicle_schema.jsonify(new_vehicle), 201
+
+
+# Get All Vehicles (With Pagination and Caching)
+@vehicles_bp.route('/', methods=['GET'])
+@cache.cached(timeout=60, query_string=True)
+def get_vehicles():
+    if 'ids' in request.args:
+        try:
+            return multiget_response(Vehicle, vehicles_serializer), 200
+        except InvalidIds as e:
+            return jsonify({'error': str(e)}), 400
+
+    query = select(Vehicle).order_by(Vehicle.id)
+    try:
+        vehicles = paginate_query(query, 'vehicles')
+    except (PaginationError, RowLimitExceeded) as e:
+        return jsonify({'error': str(e)}), 400
+    return vehicles_serializer.jsonify(vehicles), 200
+
+
+# Get A Vehicle By VIN
+@vehicles_bp.route('/<vin>', methods=['GET'])
+def get_vehicle(vin):
+    vehicle = _get_by_vin(vin)
+    if vehicle:
+        return vehicle_serializer.jsonify(vehicle), 200
+    return jsonify({'message': 'Vehicle not found.'}), 404
+
+
+# Get A Vehicle's Service History, Newest First (Keyset Paginated)
+@vehicles_bp.route('/<vin>/history', methods=['GET'])
+def get_vehicle_history(vin):
+    """
+    Query Params:
+        after: cursor from the previous page's 'next'
+        per_page: int
+    The VIN is resolved once through the unique vehicles.vin index; tickets
+    are then read by vehicle_id through ix_service_tickets_vehicle_id_service_date,
+    never by the denormalized service_tickets.VIN copy.
+    """
+    vehicle = _get_by_vin(vin)
+    if not vehicle:
+        return jsonify({'message': 'Vehicle not found.'}), 404
+
+    query = select(ServiceTicket).where(ServiceTicket.vehicle_id == vehicle.id).options(*TICKET_LOAD_OPTIONS)
+    try:
+        tickets, next_cursor = keyset_paginate(
+            query, (ServiceTicket.service_date, ServiceTicket.id), lambda t: (t.service_date, t.id), descending=True
+        )
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'vehicle': vehicle_serializer.dump(vehicle),
+        'tickets': service_tickets_serializer.dump(tickets),
+        'next': next_cursor
+    }), 200
+
+
+# Update A Vehicle (Requires Mechanic Token)
+@vehicles_bp.route('/<vin>', methods=['PUT'])
+@mechanic_token_required
+def update_vehicle(vin):
+    vehicle = _get_by_vin(vin)
+    if not vehicle:
+        return jsonify({'message': 'Vehicle not found.'}), 404
+
+    old_vin = vehicle.vin
+    try:
+        vehicle_schema.load(request.json, instance=vehicle, partial=True)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    # Check before anything flushes the edited row
+    with db.session.no_autoflush:
+        if not db.session.get(Customer, vehicle.customer_id):
+            db.session.rollback()
+            return jsonify({'error': 'Customer not found'}), 404
+        if vehicle.vin != old_vin and db.session.execute(
+            select(Vehicle.id).where(Vehicle.vin == vehicle.vin, Vehicle.id != vehicle.id)
+        ).first():
+            db.session.rollback()
+            return jsonify({'message': 'Vehicle with this VIN already exists.'}), 400
+
+    if vehicle.vin != old_vin:
+        # Keep the tickets' denormalized VIN copy in step
+        db.session.execute(
+            update(ServiceTicket).where(ServiceTicket.vehicle_id == vehicle.id).values(VIN=vehicle.vin)
+        )
+
+    db.session.commit()
+    return vehicle_schema.jsonify(vehicle), 200
+
+
+# Delete A Vehicle (Requires Mechanic Token)
+@vehicles_bp.route('/<vin>', methods=['DELETE'])
+@limiter.limit('10 per hour')
+@mechanic_token_required
+def delete_vehicle(vin):
+    vehicle = _get_by_vin(vin)
+    if not vehicle:
+        return jsonify({'message': 'Vehicle not found.'}), 404
+
+    has_history = db.session.execute(
+        select(ServiceTicket.id).where(ServiceTicket.vehicle_id == vehicle.id).limit(1)
+    ).first()
+    if has_history:
+        return jsonify({
+            'error': 'Cannot delete a vehicle with service history',
+            'suggestion': 'Reassign or delete its service tickets first'
+        }), 400
+
+    db.session.delete(vehicle)
+    db.session.commit()
+    return jsonify({'message': 'Vehicle deleted successfully.'}), 200
@@ -0,0 +1,30 @@
+from app.models import Vehicle
+from app.extensions import ma
+from app.utils.serializers import compile_schema
+from app.utils.vin import VIN_PATTERN, normalize_vin, fill_from_vin
+from marshmallow import fields, validate, pre_load
+
+
+class VehicleSchema(ma.SQLAlchemyAutoSchema):
+    vin = fields.String(required=True, validate=validate.Regexp(VIN_PATTERN, error='Not a valid 17 character VIN.'))
+    year = fields.Integer(required=True, validate=validate.Range(min=1900, max=2100))
+
+    class Meta:
+        model = Vehicle
+        load_instance = True
+        include_fk = True
+
+    @pre_load
+    def normalize(self, data, partial=None, **kwargs):
+        if isinstance(data, dict) and isinstance(data.get('vin'), str):
+            data = dict(data, vin=normalize_vin(data['vin']))
+            if not partial:
+                # make and year may be left out when the VIN decodes them
+                data = fill_from_vin(data)
+        return data
+
+
+vehicle_schema = VehicleSchema()
+vehicles_schema = VehicleSchema(many=True)
+vehicle_serializer = compile_schema(vehicle_schema)
+vehicles_serializer = compile_schema(vehicles_schema)
@@ -11,6 +11,6 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
-cache = Cache(config={'CACHE_TYPE': 'SimpleCache'})
+cache = Cache()
 
 migrate = Migrate()
\ No newline at end of file
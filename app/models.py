@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from datetime import date, datetime
 from typing import List
@@ -9,6 +11,10 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class = Base)
 
+# MySQL's DATETIME drops fractions of a second unless asked, which would leave
+# the sync feeds ordering a second's worth of changes by id alone
+PreciseDateTime = db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
 # ============================================================================
 # CUSTOMER
 # ============================================================================
@@ -71,7 +77,9 @@ service_mechanics = db.Table(
     'service_mechanics',
     Base.metadata,
     db.Column('service_ticket_id', db.ForeignKey('service_tickets.id')),
-    db.Column('mechanic_id', db.ForeignKey('mechanics.id'))
+    db.Column('mechanic_id', db.ForeignKey('mechanics.id')),
+    # Covers "tickets for mechanic X" without touching the ticket table
+    db.Index('ix_service_mechanics_mechanic_id_service_ticket_id', 'mechanic_id', 'service_ticket_id')
 )
 
 class ServiceTicket(Base):
@@ -85,12 +93,17 @@ class ServiceTicket(Base):
     category_id: Mapped[int | None] = mapped_column(db.ForeignKey('service_categories.id'), nullable=True)
     status: Mapped[str] = mapped_column(db.String(20), default='Pending')
     created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
-    updated_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(PreciseDateTime, default=datetime.now, onupdate=datetime.now, index=True)
     completed_at: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
     labor_hours: Mapped[float] = mapped_column(db.Float, default=0.0)
     labor_rate: Mapped[float] = mapped_column(db.Float, default=75.0)
     mileage: Mapped[int | None] = mapped_column(db.Integer, nullable=True)
     notes: Mapped[str | None] = mapped_column(db.Text, nullable=True)
+    # Denormalized totals, kept in step by service_tickets/totals.py
+    parts_total: Mapped[float] = mapped_column(db.Float, default=0.0)
+    parts_cost: Mapped[float] = mapped_column(db.Float, default=0.0)
+    labor_total: Mapped[float] = mapped_column(db.Float, default=0.0)
+    grand_total: Mapped[float] = mapped_column(db.Float, default=0.0)
 
     # Relationships
     customer: Mapped["Customer"] = db.relationship(back_populates='service_tickets')
@@ -99,6 +112,16 @@ class ServiceTicket(Base):
     mechanics: Mapped[List['Mechanic']] = db.relationship(secondary=service_mechanics, back_populates='service_tickets')
     service_inventories: Mapped[List['ServiceInventory']] = db.relationship(back_populates='service_ticket', cascade='all, delete-orphan')
 
+    # Backing indexes for the filter/sort API (app/blueprints/service_tickets/filters.py)
+    __table_args__ = (
+        db.Index('ix_service_tickets_status_service_date', 'status', 'service_date'),
+        db.Index('ix_service_tickets_customer_id_service_date', 'customer_id', 'service_date'),
+        db.Index('ix_service_tickets_vehicle_id_service_date', 'vehicle_id', 'service_date'),
+        db.Index('ix_service_tickets_category_id_service_date', 'category_id', 'service_date'),
+        db.Index('ix_service_tickets_vin', 'VIN'),
+        db.Index('ix_service_tickets_service_date', 'service_date'),
+    )
+
 # ============================================================================
 # MECHANIC
 # ============================================================================
@@ -132,6 +155,7 @@ class Inventory(Base):
     part_number: Mapped[str | None] = mapped_column(db.String(100), unique=True, nullable=True)
     reorder_point: Mapped[int] = mapped_column(db.Integer, default=5)
     created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(PreciseDateTime, default=datetime.now, onupdate=datetime.now, index=True)
 
     # Relationships
     service_inventories: Mapped[List['ServiceInventory']] = db.relationship(back_populates='inventory')
@@ -151,4 +175,47 @@ class ServiceInventory(Base):
 
     # Relationships
     service_ticket: Mapped['ServiceTicket'] = db.relationship(back_populates='service_inventories')
-    inventory: Mapped['Inventory'] = db.relationship(back_populates='service_inventories')
\ No newline at end of file
+    inventory: Mapped['Inventory'] = db.relationship(back_populates='service_inventories')
+
+
+# ============================================================================
+# DELETED RECORD (Tombstones for the delta sync feeds)
+# ============================================================================
+
+class DeletedRecord(Base):
+    __tablename__ = 'deleted_records'
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    table_name: Mapped[str] = mapped_column(db.String(50), nullable=False)
+    record_id: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(PreciseDateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_deleted_records_table_name_id', 'table_name', 'id'),
+    )
+
+
+# Record a tombstone in the same flush as the DELETE so cascaded deletes
+# (e.g. a customer taking their tickets with them) are tracked as well.
+@event.listens_for(ServiceTicket, 'after_delete')
+@event.listens_for(Inventory, 'after_delete')
+def record_deletion(mapper, connection, target):
+    connection.execute(
+        insert(DeletedRecord).values(
+            table_name=target.__tablename__,
+            record_id=target.id,
+            deleted_at=datetime.now()
+        )
+    )
+
+
+# ============================================================================
+# BACKFILL CHECKPOINT (Progress of the resumable data backfills)
+# ============================================================================
+
+class BackfillCheckpoint(Base):
+    __tablename__ = 'backfill_checkpoints'
+    name: Mapped[str] = mapped_column(db.String(100), primary_key=True)
+    last_id: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    rows_changed: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    completed_at: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import select, func
+from app.models import BackfillCheckpoint, db
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class BackfillStep:
+    """
+    One named, re-runnable unit of a backfill.
+
+    With a key (an integer primary key column), run(lo, hi) is called once per
+    chunk of rows with lo < key <= hi and must return the number of rows it
+    changed. Without a key, run() is called once. Either way run should be
+    set-based (UPDATE ... WHERE, INSERT ... SELECT) and idempotent: only
+    touch rows that still need it, so a re-run or a replayed chunk is a no-op.
+    """
+
+    def __init__(self, name: str, run, key=None):
+        self.name = name
+        self.run = run
+        self.key = key
+
+
+def _chunk_end(key, lo: int, chunk_size: int) -> int | None:
+    """Upper bound of the next chunk after lo: the chunk_size-th key, or the last one. One index seek."""
+    hi = db.session.execute(
+        select(key).where(key > lo).order_by(key).offset(chunk_size - 1).limit(1)
+    ).scalar()
+    if hi is None:
+        hi = db.session.execute(select(func.max(key)).where(key > lo)).scalar()
+    return hi
+
+
+def _run_step(step: BackfillStep, chunk_size: int, dry_run: bool, restart: bool, on_progress) -> dict:
+    checkpoint = db.session.get(BackfillCheckpoint, step.name)
+    result = {'name': step.name, 'rows': 0, 'chunks': 0, 'skipped': False, 'last_id': 0}
+    if checkpoint is not None and checkpoint.completed_at is not None and not restart:
+        result.update(skipped=True, rows=checkpoint.rows_changed, last_id=checkpoint.last_id)
+        return result
+    if checkpoint is None:
+        checkpoint = BackfillCheckpoint(name=step.name, last_id=0, rows_changed=0)
+        if not dry_run:
+            db.session.add(checkpoint)
+    elif restart:
+        checkpoint.last_id, checkpoint.rows_changed, checkpoint.completed_at = 0, 0, None
+
+    def finish_chunk(rows: int, last_id: int):
+        result['rows'] += rows
+        result['chunks'] += 1
+        result['last_id'] = last_id
+        if dry_run:
+            db.session.rollback()
+        else:
+            # The checkpoint commits with the chunk's changes, so progress is never ahead of the data
+            checkpoint.last_id = last_id
+            checkpoint.rows_changed += rows
+            db.session.commit()
+
+    if step.key is None:
+        finish_chunk(step.run(), 0)
+        if on_progress:
+            on_progress(step.name, result, None)
+    else:
+        lo = checkpoint.last_id
+        result['last_id'] = lo
+        max_id = db.session.execute(select(func.max(step.key))).scalar()
+        while True:
+            hi = _chunk_end(step.key, lo, chunk_size)
+            if hi is None:
+                break
+            finish_chunk(step.run(lo, hi), hi)
+            if on_progress:
+                on_progress(step.name, result, max_id)
+            lo = hi
+
+    if not dry_run:
+        checkpoint.completed_at = datetime.now()
+        db.session.commit()
+    return result
+
+
+def run_backfill(steps, chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False, restart: bool = False,
+                 only=None, on_progress=None) -> list[dict]:
+    """
+    Run steps in order, each in primary-key chunks with one commit per chunk.
+
+    Every chunk commits together with the step's checkpoint row, so an
+    interrupted run resumes after the last committed chunk, and completed
+    steps are skipped unless restart is set. dry_run executes every chunk
+    and rolls it back, reporting how many rows would change (later chunks
+    can't see earlier ones, so counts for steps that build on their own
+    output are upper bounds).
+
+    on_progress(step name, result so far, max key or None) is called after
+    every chunk.
+
+    Returns:
+        one dict per step with 'name', 'rows', 'chunks', 'skipped' and 'last_id'
+    """
+    if only:
+        unknown = set(only) - {step.name for step in steps}
+        if unknown:
+            raise ValueError(f"Unknown backfill step: {', '.join(sorted(unknown))}")
+        steps = [step for step in steps if step.name in only]
+    return [_run_step(step, chunk_size, dry_run, restart, on_progress) for step in steps]
@@ -0,0 +1,142 @@
+import itertools
+import json
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+
+TICKET_EVENTS_CHANNEL = 'ticket-events'
+DEFAULT_BUFFER_SIZE = 100
+DEFAULT_HEARTBEAT_SECONDS = 15
+
+
+class LocalPubSub:
+    """
+    In-process stand-in for a pub/sub server (e.g. Redis PUBLISH/SUBSCRIBE).
+
+    Messages cross it as JSON strings, exactly as they would cross a network
+    broker, so swapping in a backend with the same publish/subscribe methods
+    is all it takes to fan events out across gunicorn workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = defaultdict(list)
+
+    def publish(self, channel: str, message: str):
+        with self._lock:
+            handlers = list(self._handlers[channel])
+        for handler in handlers:
+            handler(message)
+
+    def subscribe(self, channel: str, handler):
+        with self._lock:
+            self._handlers[channel].append(handler)
+
+
+class Subscription:
+    """
+    A single SSE client: its filters plus a bounded event buffer.
+
+    When a slow client falls behind, the oldest events are dropped rather
+    than letting the buffer grow without bound.
+    """
+
+    def __init__(self, buffer_size: int, customer_id: int | None = None,
+                 mechanic_id: int | None = None, status: str | None = None):
+        self.customer_id = customer_id
+        self.mechanic_id = mechanic_id
+        self.status = status
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._ready = threading.Condition()
+
+    def matches(self, event: dict) -> bool:
+        ticket = event['ticket']
+        if self.customer_id is not None and ticket['customer_id'] != self.customer_id:
+            return False
+        if self.mechanic_id is not None and self.mechanic_id not in ticket['mechanic_ids']:
+            return False
+        if self.status is not None and ticket['status'] != self.status:
+            return False
+        return True
+
+    def push(self, event: dict):
+        with self._ready:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: float) -> dict | None:
+        """Wait up to timeout seconds for the next event, None if there was none."""
+        with self._ready:
+            if not self._buffer:
+                self._ready.wait(timeout)
+            return self._buffer.popleft() if self._buffer else None
+
+
+class EventBroker:
+    """Fans ticket events from the pub/sub backend out to SSE subscriptions."""
+
+    def __init__(self, pubsub=None):
+        self.pubsub = pubsub or LocalPubSub()
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+        self.pubsub.subscribe(TICKET_EVENTS_CHANNEL, self._dispatch)
+
+    def publish(self, event_type: str, ticket: dict):
+        event = {
+            'id': next(self._ids),
+            'type': event_type,
+            'ticket': ticket,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.pubsub.publish(TICKET_EVENTS_CHANNEL, json.dumps(event))
+
+    def subscribe(self, buffer_size: int = DEFAULT_BUFFER_SIZE, **filters) -> Subscription:
+        subscription = Subscription(buffer_size, **filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _dispatch(self, message: str):
+        event = json.loads(message)
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                subscription.push(event)
+
+
+event_broker = EventBroker()
+
+
+def ticket_payload(service_ticket) -> dict:
+    """Snapshot the fields SSE subscribers filter and render on."""
+    return {
+        'id': service_ticket.id,
+        'status': service_ticket.status,
+        'customer_id': service_ticket.customer_id,
+        'vehicle_id': service_ticket.vehicle_id,
+        'mechanic_ids': [m.id for m in service_ticket.mechanics],
+        'updated_at': service_ticket.updated_at.isoformat() if service_ticket.updated_at else None
+    }
+
+
+def publish_ticket_event(event_type: str, service_ticket=None, payload: dict | None = None):
+    """
+    Publish a ticket event to every SSE subscriber.
+
+    Call after the commit so subscribers never see uncommitted state. Pass a
+    pre-built payload when the ticket is about to be deleted.
+    """
+    event_broker.publish(event_type, payload or ticket_payload(service_ticket))
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,74 @@
+import csv
+import io
+from flask import current_app, Response, stream_with_context
+from marshmallow import fields
+from sqlalchemy import select
+from app.models import db
+from app.utils.serializers import compile_schema
+
+DEFAULT_EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class UnsupportedExportFormat(ValueError):
+    pass
+
+
+def scalar_fields(schema) -> tuple[str, ...]:
+    """The schema's dumped fields that map straight onto columns (no Nested relationships)."""
+    return tuple(
+        name for name, field in schema.dump_fields.items()
+        if not isinstance(field, fields.Nested)
+    )
+
+
+def export_response(model, schema, export_format: str, filename: str) -> Response:
+    """
+    Stream every row of model as NDJSON or CSV, one chunk at a time.
+
+    Selects only the schema's scalar columns with yield_per, which turns on
+    server-side cursors (stream_results) where the driver supports them. At
+    most one chunk of rows is held in memory, however large the table is.
+
+    Raises:
+        UnsupportedExportFormat if export_format is not 'ndjson' or 'csv'
+    """
+    if export_format not in EXPORT_MIMETYPES:
+        raise UnsupportedExportFormat(f'Unsupported export format: {export_format}')
+
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+    columns = scalar_fields(schema)
+    serializer = compile_schema(schema, only=columns)
+    query = (
+        select(*[getattr(model, name) for name in columns])
+        .order_by(model.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        for partition in db.session.execute(query).partitions():
+            yield ''.join(dumps(row) + '\n' for row in serializer.dump(partition, many=True))
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        for partition in db.session.execute(query).partitions():
+            writer.writerows(serializer.dump(partition, many=True))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    generate = generate_ndjson if export_format == 'ndjson' else generate_csv
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
@@ -1,11 +1,28 @@
 import firebase_admin
 from firebase_admin import credentials, auth
+from contextlib import contextmanager
+from app.utils.metrics import FIREBASE_CALL_SECONDS
+from app.utils.tracing import span, KIND_CLIENT
 import os
 import json
+import time
 
 _initialized = False
 
 
+@contextmanager
+def _timed(call: str):
+    """Record how long a Firebase Admin SDK call took and whether it raised, and trace it."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        with span(f'firebase.{call}', KIND_CLIENT):
+            yield
+        outcome = 'ok'
+    finally:
+        FIREBASE_CALL_SECONDS.labels(call, outcome).observe(time.perf_counter() - started)
+
+
 def initialize_firebase():
     """
     Initialize Firebase Admin SDK.
@@ -31,7 +48,8 @@ def initialize_firebase():
         return False
 
     try:
-        firebase_admin.initialize_app(cred)
+        with _timed('initialize_app'):
+            firebase_admin.initialize_app(cred)
         _initialized = True
         return True
     except Exception as e:
@@ -60,7 +78,8 @@ def verify_firebase_token(id_token: str) -> dict | None:
         return None
 
     try:
-        decoded_token = auth.verify_id_token(id_token)
+        with _timed('verify_id_token'):
+            decoded_token = auth.verify_id_token(id_token)
         return decoded_token
     except auth.InvalidIdTokenError as e:
         print(f'Invalid Firebase token: {e}')
@@ -94,10 +113,11 @@ def set_user_claims(firebase_uid: str, role: str, db_id: int) -> bool:
         return False
 
     try:
-        auth.set_custom_user_claims(firebase_uid, {
-            'role': role,
-            'db_id': db_id
-        })
+        with _timed('set_custom_user_claims'):
+            auth.set_custom_user_claims(firebase_uid, {
+                'role': role,
+                'db_id': db_id
+            })
         return True
     except auth.UserNotFoundError:
         print(f'Firebase user not found: {firebase_uid}')
@@ -113,7 +133,8 @@ def get_user_claims(firebase_uid: str) -> dict | None:
         return None
 
     try:
-        user = auth.get_user(firebase_uid)
+        with _timed('get_user'):
+            user = auth.get_user(firebase_uid)
         return user.custom_claims or {}
     except auth.UserNotFoundError:
         print(f'Firebase user not found: {firebase_uid}')
@@ -145,7 +166,8 @@ def delete_firebase_user(firebase_uid: str) -> bool:
         return True  # Not an error, user may not have Firebase account
 
     try:
-        auth.delete_user(firebase_uid)
+        with _timed('delete_user'):
+            auth.delete_user(firebase_uid)
         print(f'Successfully deleted Firebase user: {firebase_uid}')
         return True
     except auth.UserNotFoundError:
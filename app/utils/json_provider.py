@@ -0,0 +1,75 @@
+import decimal
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib provider
+    orjson = None
+
+
+def _default(o):
+    # orjson handles str/int/float/bool/None, dict/list, date/datetime/time,
+    # UUID and dataclasses natively - this only sees the leftovers
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Dates and datetimes are encoded natively as ISO-8601 strings and
+    response() writes orjson's bytes straight into the response body
+    without an intermediate str. Keys are sorted like Flask's default
+    provider so switching providers does not reorder response bodies.
+    """
+
+    sort_keys = True
+    compact: bool | None = None
+    mimetype = 'application/json'
+
+    def _options(self, indent: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(indent))
+        if indent:
+            body += b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'default': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def init_json_provider(app):
+    """Install the JSON provider named by the JSON_PROVIDER config key (default: 'default')."""
+    name = app.config.get('JSON_PROVIDER', 'default')
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Unknown JSON_PROVIDER: {name}')
+
+    if name == 'orjson' and orjson is None:
+        app.logger.warning('orjson is not installed - using the default JSON provider')
+        name = 'default'
+
+    app.json = JSON_PROVIDERS[name](app)
@@ -0,0 +1,214 @@
+"""
+Backfill steps that bring rows from the legacy schema up to the current one.
+Run through scripts/migrate_existing_data.py.
+"""
+from datetime import datetime, time
+from sqlalchemy import select, update, insert, func, case, cast, or_, exists
+from app.models import (
+    db, Customer, Vehicle, ServiceCategory, ServiceTicket,
+    Mechanic, Inventory, ServiceInventory
+)
+from app.blueprints.service_tickets.totals import TOLERANCE
+from app.utils.vin import decode_vin, normalize_vin
+from .backfill import BackfillStep
+
+GENERAL_CATEGORY = 'General Maintenance'
+DEFAULT_MILEAGE = 50000
+MIGRATED_NOTE = 'Migrated from legacy system'
+
+# First match wins, in this order
+PART_CATEGORY_KEYWORDS = (
+    ('oil', 'Fluids'),
+    ('filter', 'Filters'),
+    ('brake', 'Brakes'),
+    ('pad', 'Brakes'),
+    ('rotor', 'Brakes'),
+    ('tire', 'Tires'),
+    ('battery', 'Electrical'),
+    ('spark', 'Engine'),
+    ('belt', 'Engine'),
+    ('hose', 'Cooling'),
+    ('coolant', 'Cooling'),
+    ('wiper', 'Body'),
+    ('light', 'Electrical'),
+    ('bulb', 'Electrical'),
+)
+
+
+def _rowcount(statement) -> int:
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+
+
+def _midnight(date_column):
+    """The date column as a DATETIME at 00:00, in SQL."""
+    if db.engine.dialect.name == 'sqlite':
+        return func.datetime(date_column)
+    return cast(date_column, db.DateTime)
+
+
+def _general_category_id() -> int | None:
+    return db.session.execute(
+        select(ServiceCategory.id).where(ServiceCategory.name == GENERAL_CATEGORY)
+    ).scalar()
+
+
+def _created_at(model):
+    def run(lo, hi):
+        return _rowcount(
+            update(model)
+            .where(model.id > lo, model.id <= hi, model.created_at.is_(None))
+            .values(created_at=datetime.now())
+        )
+    return run
+
+
+def vehicles_from_ticket_vins(lo, hi) -> int:
+    """Create a vehicle for every VIN in the chunk with none registered, then link the chunk's tickets by VIN."""
+    unlinked = db.session.execute(
+        select(ServiceTicket.VIN, ServiceTicket.customer_id, ServiceTicket.service_date)
+        .where(ServiceTicket.id > lo, ServiceTicket.id <= hi, ServiceTicket.vehicle_id.is_(None))
+        .order_by(ServiceTicket.id)
+    ).all()
+    first_seen = {}
+    for row in unlinked:
+        first_seen.setdefault(normalize_vin(row.VIN), row)
+    registered = set(db.session.execute(
+        select(Vehicle.vin).where(Vehicle.vin.in_(first_seen))
+    ).scalars()) if first_seen else set()
+
+    new_vehicles = []
+    for vin, row in first_seen.items():
+        if vin in registered:
+            continue
+        decoded = decode_vin(vin)
+        new_vehicles.append({
+            'vin': vin,
+            'make': (decoded and decoded.make) or 'Unknown',
+            'model': 'Unknown',
+            'year': (decoded and decoded.year) or 2020,
+            'color': 'Unknown',
+            'customer_id': row.customer_id,
+            'created_at': datetime.combine(row.service_date, time.min),
+        })
+    if new_vehicles:
+        db.session.execute(insert(Vehicle), new_vehicles)
+
+    # normalize_vin in SQL, so tickets match the vehicles created for them
+    ticket_vin = func.upper(func.trim(ServiceTicket.VIN))
+    vehicle_id = select(Vehicle.id).where(Vehicle.vin == ticket_vin).scalar_subquery()
+    return len(new_vehicles) + _rowcount(
+        update(ServiceTicket)
+        .where(ServiceTicket.id > lo, ServiceTicket.id <= hi, ServiceTicket.vehicle_id.is_(None),
+               exists().where(Vehicle.vin == ticket_vin))
+        .values(vehicle_id=vehicle_id)
+    )
+
+
+def general_category() -> int:
+    if db.session.execute(select(ServiceCategory.id).where(ServiceCategory.name == GENERAL_CATEGORY)).first():
+        return 0
+    db.session.add(ServiceCategory(
+        name=GENERAL_CATEGORY,
+        description='Inspections and general maintenance',
+        default_labor_hours=1.0,
+        default_labor_rate=75.0
+    ))
+    return 1
+
+
+def ticket_fields(lo, hi) -> int:
+    """Fill every legacy ticket column with one UPDATE per column, each only touching rows still missing it."""
+    in_chunk = (ServiceTicket.id > lo, ServiceTicket.id <= hi)
+    completed = ServiceTicket.status == 'Completed'
+    category_default = lambda column: select(column).where(
+        ServiceCategory.id == ServiceTicket.category_id
+    ).scalar_subquery()
+    statements = [
+        # Old tickets are likely completed
+        update(ServiceTicket).where(
+            *in_chunk, or_(ServiceTicket.status.is_(None), ServiceTicket.status.in_(('', 'pending')))
+        ).values(status='Completed'),
+    ]
+    general = _general_category_id()
+    if general is not None:  # Missing only in a dry run, where creating it was rolled back
+        statements.append(
+            update(ServiceTicket).where(*in_chunk, ServiceTicket.category_id.is_(None)).values(category_id=general)
+        )
+    statements += [
+        update(ServiceTicket).where(*in_chunk, ServiceTicket.created_at.is_(None))
+            .values(created_at=_midnight(ServiceTicket.service_date)),
+        update(ServiceTicket).where(*in_chunk, ServiceTicket.updated_at.is_(None))
+            .values(updated_at=func.coalesce(ServiceTicket.created_at, datetime.now())),
+        update(ServiceTicket).where(*in_chunk, ServiceTicket.completed_at.is_(None), completed)
+            .values(completed_at=_midnight(ServiceTicket.service_date)),
+        # Only finished work gets default hours - an open ticket with 0 hours just hasn't logged any yet
+        update(ServiceTicket).where(*in_chunk, completed, or_(ServiceTicket.labor_hours.is_(None), ServiceTicket.labor_hours == 0))
+            .values(labor_hours=func.coalesce(category_default(ServiceCategory.default_labor_hours), 1.0)),
+        update(ServiceTicket).where(*in_chunk, or_(ServiceTicket.labor_rate.is_(None), ServiceTicket.labor_rate == 0))
+            .values(labor_rate=func.coalesce(category_default(ServiceCategory.default_labor_rate), 75.0)),
+        update(ServiceTicket).where(*in_chunk, ServiceTicket.mileage.is_(None))
+            .values(mileage=DEFAULT_MILEAGE),
+        update(ServiceTicket).where(*in_chunk, or_(ServiceTicket.notes.is_(None), ServiceTicket.notes == ''))
+            .values(notes=MIGRATED_NOTE),
+    ]
+    changed = sum(_rowcount(statement) for statement in statements)
+
+    # Labor may have just changed, so bring the denormalized totals along
+    labor = func.round(ServiceTicket.labor_hours * ServiceTicket.labor_rate, 2)
+    changed += _rowcount(
+        update(ServiceTicket)
+        .where(*in_chunk, or_(ServiceTicket.labor_total.is_(None), func.abs(ServiceTicket.labor_total - labor) > TOLERANCE))
+        .values(labor_total=labor, grand_total=func.round(func.coalesce(ServiceTicket.parts_total, 0.0) + labor, 2))
+    )
+    return changed
+
+
+def inventory_fields(lo, hi) -> int:
+    in_chunk = (Inventory.id > lo, Inventory.id <= hi)
+    name = func.lower(Inventory.part_name)
+    changed = sum(_rowcount(statement) for statement in (
+        # Estimate cost as 60% of price (40% markup)
+        update(Inventory).where(*in_chunk, or_(Inventory.cost.is_(None), Inventory.cost == 0))
+            .values(cost=func.round(Inventory.price * 0.6, 2)),
+        update(Inventory).where(*in_chunk, or_(Inventory.category.is_(None), Inventory.category == ''))
+            .values(category=case(
+                *[(name.contains(keyword), category) for keyword, category in PART_CATEGORY_KEYWORDS],
+                else_='General'
+            )),
+        update(Inventory).where(*in_chunk, or_(Inventory.reorder_point.is_(None), Inventory.reorder_point == 0))
+            .values(reorder_point=5),
+        update(Inventory).where(*in_chunk, Inventory.created_at.is_(None))
+            .values(created_at=datetime.now()),
+    ))
+
+    # Zero-padded part numbers are formatted differently per database, so build them here
+    missing = db.session.execute(
+        select(Inventory.id).where(*in_chunk, or_(Inventory.part_number.is_(None), Inventory.part_number == ''))
+    ).scalars().all()
+    if missing:
+        db.session.execute(update(Inventory), [{'id': part_id, 'part_number': f'PART-{part_id:04d}'} for part_id in missing])
+    return changed + len(missing)
+
+
+def service_inventory_snapshots(lo, hi) -> int:
+    in_chunk = (ServiceInventory.id > lo, ServiceInventory.id <= hi)
+    current = lambda column: func.coalesce(
+        select(column).where(Inventory.id == ServiceInventory.inventory_id).scalar_subquery(), 0.0
+    )
+    return sum(_rowcount(statement) for statement in (
+        update(ServiceInventory).where(*in_chunk, ServiceInventory.price_at_service.is_(None))
+            .values(price_at_service=current(Inventory.price)),
+        update(ServiceInventory).where(*in_chunk, ServiceInventory.cost_at_service.is_(None))
+            .values(cost_at_service=current(Inventory.cost)),
+    ))
+
+
+LEGACY_STEPS = [
+    BackfillStep('customers.created_at', _created_at(Customer), key=Customer.id),
+    BackfillStep('mechanics.created_at', _created_at(Mechanic), key=Mechanic.id),
+    BackfillStep('vehicles.from_ticket_vins', vehicles_from_ticket_vins, key=ServiceTicket.id),
+    BackfillStep('service_categories.general', general_category),
+    BackfillStep('service_tickets.fields', ticket_fields, key=ServiceTicket.id),
+    BackfillStep('inventory.fields', inventory_fields, key=Inventory.id),
+    BackfillStep('service_inventories.snapshots', service_inventory_snapshots, key=ServiceInventory.id),
+]
@@ -0,0 +1,53 @@
+from flask import g
+from sqlalchemy import select
+from app.models import db
+
+
+class Loader:
+    """
+    Per-request batching loader for related rows.
+
+    Callers hand over every key they will need up front - for example the
+    customer_id of every ticket on the page - and each relation is resolved
+    with one IN query instead of one lazy load per row. Results are memoized
+    for the rest of the request, so asking for the same keys again (or for a
+    subset of them) never goes back to the database.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._groups = {}
+
+    def load(self, model, ids) -> dict:
+        """Map each id to its model instance, fetching only ids not seen yet. Unknown ids are left out."""
+        cache = self._rows.setdefault(model, {})
+        pending = {i for i in ids if i is not None and i not in cache}
+        if pending:
+            for row in db.session.execute(select(model).where(model.id.in_(pending))).scalars():
+                cache[row.id] = row
+            for i in pending:
+                cache.setdefault(i, None)
+        return {i: cache[i] for i in ids if i is not None and cache.get(i) is not None}
+
+    def load_grouped(self, key_column, target, keys) -> dict:
+        """
+        Map each key to the list of target values whose key_column matches it.
+
+        target is a model (one-to-many children) or a column (e.g. the other
+        side of an association table).
+        """
+        cache = self._groups.setdefault((str(key_column), str(target)), {})
+        pending = {k for k in keys if k not in cache}
+        if pending:
+            for k in pending:
+                cache[k] = []
+            for k, value in db.session.execute(select(key_column, target).where(key_column.in_(pending))):
+                cache[k].append(value)
+        return {k: cache[k] for k in keys}
+
+
+def get_loader() -> Loader:
+    """The Loader for the current request, created on first use."""
+    if 'loader' not in g:
+        g.loader = Loader()
+    return g.loader
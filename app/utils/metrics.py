@@ -0,0 +1,478 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import Response, current_app, g, jsonify, request
+from sqlalchemy import event
+from app.extensions import cache, limiter
+from app.models import db
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0, float('inf'))
+# Under gunicorn every worker writes its own file here and /metrics sums them (see gunicorn.conf.py)
+MULTIPROC_DIR_ENV = 'METRICS_MULTIPROC_DIR'
+
+_USED = struct.Struct('i')
+_VALUE = struct.Struct('d')
+_INITIAL_SIZE = 1 << 16
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+class _DictStore:
+    """Values for a single-process server."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float):
+        with self._lock:
+            self._values[key] = value
+
+    def items(self) -> list[tuple[str, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+def _entries(data, used: int):
+    """(key, value, value offset) for every entry in a store file's first used bytes."""
+    pos = 8
+    while pos < used:
+        length = _USED.unpack_from(data, pos)[0]
+        key_end = pos + 4 + length
+        value_pos = key_end + (-key_end % 8)
+        yield bytes(data[pos + 4:key_end]).decode('utf-8'), _VALUE.unpack_from(data, value_pos)[0], value_pos
+        pos = value_pos + 8
+
+
+class _MmapStore:
+    """
+    One process's values, in a memory-mapped file other workers can read.
+
+    The file starts with the number of bytes in use, followed by entries of
+    (key length, key, padding, 8-byte double). A new key is appended before
+    the length is bumped, so a reader never sees half an entry. Updates are
+    stores into the mapping, with no syscall on the request path.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        if self._capacity == 0:
+            self._file.truncate(_INITIAL_SIZE)
+            self._capacity = _INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _USED.unpack_from(self._map, 0)[0] or 8
+        self._positions = {key: pos for key, _, pos in _entries(self._map, self._used)}
+
+    def _append(self, key: str) -> int:
+        encoded = key.encode('utf-8')
+        key_end = self._used + 4 + len(encoded)
+        value_pos = key_end + (-key_end % 8)
+        if value_pos + 8 > self._capacity:
+            capacity = self._capacity
+            while capacity < value_pos + 8:
+                capacity *= 2
+            self._map.close()
+            self._file.truncate(capacity)
+            self._map = mmap.mmap(self._file.fileno(), capacity)
+            self._capacity = capacity
+        self._map[self._used:value_pos] = _USED.pack(len(encoded)) + encoded + bytes(value_pos - key_end)
+        _VALUE.pack_into(self._map, value_pos, 0.0)
+        self._used = value_pos + 8
+        _USED.pack_into(self._map, 0, self._used)
+        self._positions[key] = value_pos
+        return value_pos
+
+    def add(self, key: str, amount: float):
+        with self._lock:
+            pos = self._positions.get(key)
+            if pos is None:
+                pos = self._append(key)
+            _VALUE.pack_into(self._map, pos, _VALUE.unpack_from(self._map, pos)[0] + amount)
+
+    def set(self, key: str, value: float):
+        with self._lock:
+            pos = self._positions.get(key)
+            if pos is None:
+                pos = self._append(key)
+            _VALUE.pack_into(self._map, pos, value)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _read_file(path: str) -> list[tuple[str, float]]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 8:
+        return []
+    used = min(_USED.unpack_from(data, 0)[0], len(data))
+    return [(key, value) for key, value, _ in _entries(data, used)]
+
+
+# 'counter' holds counters and histograms, 'gauge' holds gauges. They are
+# separate files so a dead worker's gauges can be dropped while its counts,
+# which must never go backwards, are kept.
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _store(kind: str):
+    store = _stores.get(kind)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(kind)
+            if store is None:
+                directory = os.environ.get(MULTIPROC_DIR_ENV)
+                if directory:
+                    store = _MmapStore(os.path.join(directory, f'{kind}_{os.getpid()}.db'))
+                else:
+                    store = _DictStore()
+                _stores[kind] = store
+    return store
+
+
+def _reset_stores():
+    for store in _stores.values():
+        if isinstance(store, _MmapStore):
+            store.close()
+    _stores.clear()
+
+
+# A forked worker starts its own files rather than writing into its parent's
+os.register_at_fork(after_in_child=_reset_stores)
+
+
+def _collect() -> dict[str, float]:
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if not directory:
+        totals = {}
+        for store in list(_stores.values()):
+            totals.update(store.items())
+        return totals
+
+    # Counters add up across workers, live or dead; gauges add up across live workers
+    totals = {}
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        for key, value in _read_file(path):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def mark_process_dead(pid: int, directory: str | None = None):
+    """Drop an exited worker's gauges. Call from gunicorn's child_exit hook."""
+    directory = directory or os.environ.get(MULTIPROC_DIR_ENV)
+    if directory:
+        path = os.path.join(directory, f'gauge_{pid}.db')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ============================================================================
+# METRIC TYPES
+# ============================================================================
+
+_registry = {}
+
+
+def _key(sample: str, labels: tuple) -> str:
+    return json.dumps([sample, labels])
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') + '"'
+        for name, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        _registry[name] = self
+
+    def labels(self, *values):
+        """The child for one set of label values, in labelnames order. Cached, so hold onto it on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}')
+            child = self._children.setdefault(values, self._child(self, tuple(zip(self.labelnames, map(str, values)))))
+        return child
+
+    def _render(self, samples: dict) -> list[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('_key',)
+
+    def __init__(self, metric, labels):
+        self._key = _key(metric.name + '_total', labels)
+
+    def inc(self, amount: float = 1.0):
+        _store('counter').add(self._key, amount)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    _child = _CounterChild
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render(self, samples):
+        sample = self.name + '_total'
+        return [f'{sample}{_format_labels(labels)} {_format_value(value)}' for labels, value in sorted(samples.get(sample, []))]
+
+
+class _GaugeChild:
+    __slots__ = ('_key',)
+
+    def __init__(self, metric, labels):
+        self._key = _key(metric.name, labels)
+
+    def inc(self, amount: float = 1.0):
+        _store('gauge').add(self._key, amount)
+
+    def dec(self, amount: float = 1.0):
+        _store('gauge').add(self._key, -amount)
+
+    def set(self, value: float):
+        _store('gauge').set(self._key, value)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down. With several workers the exposed value is the sum across live ones."""
+    kind = 'gauge'
+    _child = _GaugeChild
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def _render(self, samples):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}' for labels, value in sorted(samples.get(self.name, []))]
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_buckets', '_sum', '_count')
+
+    def __init__(self, metric, labels):
+        self._bounds = metric.buckets
+        self._buckets = [_key(metric.name + '_bucket', labels + (('le', _format_bound(b)),)) for b in metric.buckets]
+        self._sum = _key(metric.name + '_sum', labels)
+        self._count = _key(metric.name + '_count', labels)
+
+    def observe(self, value: float):
+        store = _store('counter')
+        store.add(self._buckets[bisect_left(self._bounds, value)], 1.0)
+        store.add(self._sum, value)
+        store.add(self._count, 1.0)
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into buckets. Each bucket is stored on its own and
+    made cumulative when rendered, so an observation costs three additions.
+    """
+    kind = 'histogram'
+    _child = _HistogramChild
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        buckets = tuple(sorted(float(b) for b in buckets))
+        if buckets[-1] != float('inf'):
+            buckets += (float('inf'),)
+        self.buckets = buckets
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render(self, samples):
+        def grouped(suffix):
+            return {tuple(map(tuple, labels)): value for labels, value in samples.get(self.name + suffix, [])}
+
+        buckets = {}
+        for labels, value in samples.get(self.name + '_bucket', []):
+            *rest, (_, le) = labels
+            buckets.setdefault(tuple(map(tuple, rest)), {})[le] = value
+        sums, counts = grouped('_sum'), grouped('_count')
+
+        lines = []
+        for labels in sorted(buckets.keys() | counts.keys()):
+            cumulative = 0.0
+            observed = buckets.get(labels, {})
+            for bound in self.buckets:
+                le = _format_bound(bound)
+                cumulative += observed.get(le, 0.0)
+                lines.append(f'{self.name}_bucket{_format_labels(labels + (("le", le),))} {_format_value(cumulative)}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(sums.get(labels, 0.0))}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(counts.get(labels, 0.0))}')
+        return lines
+
+
+def generate_latest() -> str:
+    """Every registered metric in the text exposition format, summed across workers."""
+    samples = {}
+    for key, value in _collect().items():
+        sample, labels = json.loads(key)
+        samples.setdefault(sample, []).append((tuple(map(tuple, labels)), value))
+
+    lines = []
+    for metric in list(_registry.values()):
+        documentation = metric.documentation.replace('\\', r'\\').replace('\n', r'\n')
+        lines.append(f'# HELP {metric.name} {documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric._render(samples))
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# APPLICATION METRICS
+# ============================================================================
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to handle a request, by route (endpoint name).', ['route', 'method'])
+REQUESTS = Counter('http_requests', 'Requests handled, by route and response status.', ['route', 'method', 'status'])
+REQUEST_DB_SECONDS = Histogram('http_request_db_seconds', 'Time a request spent waiting on SQL statements.', ['route'])
+REQUEST_QUERIES = Counter('http_request_queries', 'SQL statements run while handling requests.', ['route'])
+RATE_LIMITED = Counter('rate_limit_rejections', 'Requests rejected by the rate limiter.', ['route'])
+CACHE_LOOKUPS = Counter('cache_lookups', 'Cache reads, by result.', ['result'])
+BCRYPT_QUEUE_DEPTH = Gauge('bcrypt_pool_queue_depth', 'Passwords waiting for a thread in the bcrypt hashing pool.')
+FIREBASE_CALL_SECONDS = Histogram('firebase_call_duration_seconds', 'Firebase Admin SDK call latency, by call and outcome.', ['call', 'outcome'])
+SLOW_QUERIES = Counter('db_slow_queries', 'Statements over SLOW_QUERY_THRESHOLD_MS, by route.', ['route'])
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'db_pool_checkout_seconds', 'Time to get a connection from the pool, including waiting for a free one.',
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1.0, 5.0, 30.0)
+)
+
+_CACHE_HIT = CACHE_LOOKUPS.labels('hit')
+_CACHE_MISS = CACHE_LOOKUPS.labels('miss')
+
+
+def _instrument_cache(backend):
+    """Count hits and misses on the cache backend, which @cache.cached and cache.get both read through."""
+    get = backend.get
+
+    def counted_get(key):
+        value = get(key)
+        (_CACHE_MISS if value is None else _CACHE_HIT).inc()
+        return value
+
+    backend.get = counted_get
+
+
+def _instrument_pool(engine):
+    """Time pool checkouts. dispose() swaps in a new pool, so that one is wrapped too."""
+    def wrap(pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+        pool.connect = timed_connect
+
+    wrap(engine.pool)
+    event.listen(engine, 'engine_disposed', lambda engine: wrap(engine.pool))
+
+
+@limiter.exempt
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(generate_latest(), mimetype=CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """
+    Record request, cache, rate limit and DB pool metrics and serve them at
+    /metrics. Call after the extensions are initialised.
+
+    Set METRICS_TOKEN to require 'Authorization: Bearer <token>' on /metrics.
+    Latency for a streamed response stops when the handler returns.
+    """
+    app.config.setdefault('METRICS_TOKEN', None)
+
+    # First in line, so requests the rate limiter turns away are timed too
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request_timer)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        route = request.endpoint or 'unmatched'
+        if started is not None:
+            REQUEST_SECONDS.labels(route, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        if response.status_code == 429:
+            RATE_LIMITED.labels(route).inc()
+        stats = g.get('query_stats')
+        if stats is not None:
+            REQUEST_DB_SECONDS.labels(route).observe(stats.duration)
+            REQUEST_QUERIES.labels(route).inc(stats.count)
+        return response
+
+    _instrument_cache(app.extensions['cache'][cache])
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrument_pool(engine)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,68 @@
+from flask import current_app, jsonify, request
+from sqlalchemy import select
+from app.models import db
+
+DEFAULT_MAX_IDS = 100
+
+
+class InvalidIds(ValueError):
+    pass
+
+
+def parse_ids() -> list[int]:
+    """
+    Parse ?ids=1,2,3 into a list of unique positive integers, in request order.
+
+    Raises:
+        InvalidIds on malformed values or more than MAX_MULTIGET_IDS ids
+    """
+    ids = []
+    for value in request.args.get('ids', '').split(','):
+        value = value.strip()
+        if not value:
+            continue
+        try:
+            number = int(value)
+        except ValueError:
+            raise InvalidIds(f'ids must be a comma-separated list of integers, got {value!r}')
+        if number < 1:
+            raise InvalidIds('ids must be at least 1')
+        if number not in ids:
+            ids.append(number)
+
+    if not ids:
+        raise InvalidIds('ids must contain at least one id')
+    max_ids = current_app.config.get('MAX_MULTIGET_IDS', DEFAULT_MAX_IDS)
+    if len(ids) > max_ids:
+        raise InvalidIds(f'At most {max_ids} ids per request')
+    return ids
+
+
+def get_by_ids(model, *options) -> tuple[list, list[int]]:
+    """
+    Load every row named in ?ids with one IN query.
+
+    options are loader options (selectinload etc.) for the relationships the
+    caller will serialize, so the whole response costs a fixed number of queries.
+
+    Returns:
+        (rows in request order, requested ids with no matching row)
+
+    Raises:
+        InvalidIds
+    """
+    ids = parse_ids()
+    rows = db.session.execute(select(model).where(model.id.in_(ids)).options(*options)).scalars().all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id], [i for i in ids if i not in by_id]
+
+
+def multiget_response(model, serializer, *options):
+    """
+    Respond to ?ids with {'results': [...], 'missing': [...]}, results in request order.
+
+    Raises:
+        InvalidIds
+    """
+    rows, missing = get_by_ids(model, *options)
+    return jsonify({'results': serializer.dump(rows, many=True), 'missing': missing})
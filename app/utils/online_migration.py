@@ -0,0 +1,236 @@
+"""
+Lock-light schema changes for Alembic revisions that touch large, busy tables.
+
+op.batch_alter_table copies the whole table on SQLite, and on Postgres a NOT
+NULL column with a default, a foreign key or an index holds a lock that
+blocks writes for as long as the table takes to scan. These helpers split
+each change into short steps instead:
+
+    from app.utils.online_migration import add_column, add_foreign_key, create_index
+
+    def upgrade():
+        add_column('service_tickets', sa.Column('priority', sa.Integer(), nullable=False, server_default='0'))
+        create_index('ix_service_tickets_priority', 'service_tickets', ['priority'])
+
+Every helper commits its own work (backfills commit chunk by chunk), so a
+revision using them should not mix in changes that must be atomic with the
+rest, and the environment should run with transaction_per_migration.
+benchmarks/migration_locks.py measures the difference.
+"""
+import logging
+import time
+from contextlib import contextmanager
+import sqlalchemy as sa
+from alembic import op
+
+log = logging.getLogger('alembic.online')
+
+DEFAULT_CHUNK_SIZE = 5000
+# Seconds to sleep between backfill chunks, so queued writers get the table
+DEFAULT_PAUSE = 0.05
+# Postgres: give up waiting for a DDL lock after this long and retry, rather than queueing every query behind it
+DEFAULT_LOCK_TIMEOUT = '2s'
+DDL_RETRIES = 5
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def _dialect() -> str:
+    return op.get_bind().dialect.name
+
+
+def _quote(name: str) -> str:
+    return op.get_bind().dialect.identifier_preparer.quote(name)
+
+
+@contextmanager
+def _autocommit():
+    """Every statement inside commits on its own. Not re-entrant."""
+    with op.get_context().autocommit_block():
+        yield
+
+
+def _is_lock_timeout(error: sa.exc.OperationalError) -> bool:
+    orig = error.orig
+    return LOCK_NOT_AVAILABLE in (getattr(orig, 'pgcode', None), getattr(orig, 'sqlstate', None))
+
+
+def _ddl(statement, lock_timeout: str = DEFAULT_LOCK_TIMEOUT):
+    """
+    Run one DDL statement (SQL string, or a callable issuing op calls). On
+    Postgres it waits at most lock_timeout for its lock, backing off and
+    retrying up to DDL_RETRIES times. Call inside _autocommit().
+    """
+    run = statement if callable(statement) else lambda: op.execute(statement)
+    if _dialect() != 'postgresql':
+        run()
+        return
+    for attempt in range(1, DDL_RETRIES + 1):
+        op.execute(f"SET lock_timeout = '{lock_timeout}'")
+        try:
+            run()
+            return
+        except sa.exc.OperationalError as e:
+            if not _is_lock_timeout(e) or attempt == DDL_RETRIES:
+                raise
+            log.warning('Lock timeout (attempt %d/%d), retrying', attempt, DDL_RETRIES)
+            time.sleep(attempt)
+        finally:
+            op.execute('RESET lock_timeout')
+
+
+def _default_value(column: sa.Column):
+    """The column's server_default as an expression usable in an UPDATE, or None."""
+    if column.server_default is None:
+        return None
+    arg = column.server_default.arg
+    return sa.literal(arg, column.type) if isinstance(arg, str) else arg
+
+
+def _backfill(table: str, column: str, value, chunk_size: int, pause: float, key: str) -> int:
+    bind = op.get_bind()
+    t = sa.table(table, sa.column(key), sa.column(column))
+    pk, target = t.c[key], t.c[column]
+    if not isinstance(value, sa.ClauseElement):
+        value = sa.literal(value)
+
+    lo, total, chunks = bind.execute(sa.select(sa.func.min(pk))).scalar(), 0, 0
+    if lo is None:
+        return 0
+    lo -= 1
+    while True:
+        # Same one-seek chunk boundary as app/utils/backfill.py
+        hi = bind.execute(sa.select(pk).where(pk > lo).order_by(pk).offset(chunk_size - 1).limit(1)).scalar()
+        if hi is None:
+            hi = bind.execute(sa.select(sa.func.max(pk)).where(pk > lo)).scalar()
+            if hi is None:
+                break
+        total += bind.execute(
+            sa.update(t).where(pk > lo, pk <= hi, target.is_(None)).values({column: value})
+        ).rowcount
+        chunks += 1
+        if chunks % 100 == 0:
+            log.info('%s.%s: %d rows backfilled through %s=%s', table, column, total, key, hi)
+        lo = hi
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def backfill(table: str, column: str, value, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             pause: float = DEFAULT_PAUSE, key: str = 'id') -> int:
+    """
+    Set column to value (a SQL expression or a literal) on every row where
+    it is NULL, chunk_size primary keys per transaction with pause seconds
+    between chunks. Rows already set are left alone, so a re-run after an
+    interruption carries on where it stopped. Returns the rows changed.
+    """
+    with _autocommit():
+        return _backfill(table, column, value, chunk_size, pause, key)
+
+
+def add_column(table: str, column: sa.Column, backfill=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               pause: float = DEFAULT_PAUSE, lock_timeout: str = DEFAULT_LOCK_TIMEOUT, key: str = 'id') -> int:
+    """
+    Add column to table without rewriting the table or blocking writes for long.
+
+    On Postgres the column is added nullable with no default (a catalog-only
+    change), then gets its server_default so new rows are covered, then
+    existing rows are filled in throttled chunks with backfill (a SQL
+    expression or literal; the server_default when not given). NOT NULL
+    goes on last: a CHECK ... NOT VALID constraint is validated under a lock
+    that doesn't block writes, which lets SET NOT NULL skip its own full
+    scan (Postgres 12+), and the CHECK is then dropped.
+
+    SQLite adds a column with a constant (string) default without touching
+    existing rows, so such a column is added in one step. Otherwise it's added
+    nullable and backfilled; SQLite can only add NOT NULL by copying the
+    table, so the column stays nullable there (the model still requires
+    it) and a warning is logged.
+
+    Returns the number of rows backfilled.
+    """
+    default = _default_value(column)
+    value = default if backfill is None else backfill
+    dialect = _dialect()
+
+    with _autocommit():
+        if dialect == 'sqlite' and backfill is None and isinstance(getattr(column.server_default, 'arg', None), str):
+            _ddl(lambda: op.add_column(table, sa.Column(column.name, column.type, nullable=column.nullable,
+                                                        server_default=column.server_default.arg)))
+            return 0
+
+        nullable = sa.Column(column.name, column.type, nullable=True)
+        _ddl(lambda: op.add_column(table, nullable), lock_timeout)
+        if dialect != 'sqlite' and column.server_default is not None:
+            _ddl(lambda: op.alter_column(table, column.name, server_default=column.server_default.arg), lock_timeout)
+
+        rows = 0 if value is None else _backfill(table, column.name, value, chunk_size, pause, key)
+
+        if column.nullable is False:
+            if dialect == 'postgresql':
+                check = f'ck_{table}_{column.name}_not_null'[:63]
+                _ddl(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(check)} '
+                     f'CHECK ({_quote(column.name)} IS NOT NULL) NOT VALID', lock_timeout)
+                op.execute(f'ALTER TABLE {_quote(table)} VALIDATE CONSTRAINT {_quote(check)}')
+                _ddl(lambda: op.alter_column(table, column.name, nullable=False), lock_timeout)
+                _ddl(f'ALTER TABLE {_quote(table)} DROP CONSTRAINT {_quote(check)}', lock_timeout)
+            elif dialect == 'sqlite':
+                log.warning('%s.%s left nullable: SQLite needs a table copy to add NOT NULL', table, column.name)
+            else:
+                _ddl(lambda: op.alter_column(table, column.name, nullable=False, existing_type=column.type))
+    return rows
+
+
+def add_foreign_key(name: str, source: str, referent: str, local_cols: list[str], remote_cols: list[str],
+                    ondelete: str | None = None, lock_timeout: str = DEFAULT_LOCK_TIMEOUT):
+    """
+    Add a foreign key without blocking writes while existing rows are checked.
+
+    On Postgres the constraint is added NOT VALID (enforced for new writes
+    straight away) and then validated under a lock that allows writes.
+    SQLite can only add a foreign key by copying the table, so it's skipped
+    there with a warning.
+    """
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        log.warning('Foreign key %s skipped: SQLite needs a table copy to add it', name)
+        return
+    with _autocommit():
+        if dialect != 'postgresql':
+            _ddl(lambda: op.create_foreign_key(name, source, referent, local_cols, remote_cols, ondelete=ondelete))
+            return
+        columns = lambda cols: ', '.join(_quote(c) for c in cols)
+        _ddl(f'ALTER TABLE {_quote(source)} ADD CONSTRAINT {_quote(name)} '
+             f'FOREIGN KEY ({columns(local_cols)}) REFERENCES {_quote(referent)} ({columns(remote_cols)})'
+             + (f' ON DELETE {ondelete}' if ondelete else '') + ' NOT VALID', lock_timeout)
+        op.execute(f'ALTER TABLE {_quote(source)} VALIDATE CONSTRAINT {_quote(name)}')
+
+
+def create_index(name: str, table: str, columns: list[str], unique: bool = False,
+                 lock_timeout: str = DEFAULT_LOCK_TIMEOUT):
+    """
+    Build an index without blocking writes (CREATE INDEX CONCURRENTLY on
+    Postgres). A concurrent build that failed part way leaves an INVALID
+    index behind, which is dropped and rebuilt; a valid one is kept, so the
+    call is safe to repeat.
+    """
+    with _autocommit():
+        if _dialect() != 'postgresql':
+            _ddl(lambda: op.create_index(name, table, columns, unique=unique, if_not_exists=True))
+            return
+        valid = op.get_bind().execute(
+            sa.text('SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name'),
+            {'name': name}
+        ).scalar()
+        if valid is False:
+            log.warning('Dropping invalid index %s left by an earlier build', name)
+            _ddl(f'DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}', lock_timeout)
+        _ddl(lambda: op.create_index(name, table, columns, unique=unique,
+                                     postgresql_concurrently=True, if_not_exists=True), lock_timeout)
+
+
+def drop_index(name: str, table: str, lock_timeout: str = DEFAULT_LOCK_TIMEOUT):
+    """Drop an index without blocking writes (DROP INDEX CONCURRENTLY on Postgres). For downgrades."""
+    with _autocommit():
+        _ddl(lambda: op.drop_index(name, table_name=table, if_exists=True,
+                                   postgresql_concurrently=True), lock_timeout)
@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import current_app, request
+from sqlalchemy import or_, and_
+from app.models import db
+
+DEFAULT_PER_PAGE = 10
+DEFAULT_MAX_PAGE_SIZE = 100
+
+# Most rows a list endpoint returns without ?page. Endpoints whose rows nest
+# other collections (a customer dumps all of their tickets) get lower caps
+# so the cap also bounds response memory. Override with LIST_ROW_LIMITS.
+DEFAULT_ROW_LIMITS = {
+    'customers': 200,
+    'mechanics': 200,
+    'service_tickets': 1000,
+    'inventory': 1000,
+    'vehicles': 1000,
+}
+
+
+class PaginationError(ValueError):
+    pass
+
+
+class RowLimitExceeded(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f'More than {limit} rows - use ?page=&per_page= or the export endpoint')
+        self.limit = limit
+
+
+def _positive_int(name: str) -> int | None:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise PaginationError(f'{name} must be an integer')
+    if number < 1:
+        raise PaginationError(f'{name} must be at least 1')
+    return number
+
+
+def parse_page_args() -> tuple[int | None, int]:
+    """
+    Parse and validate ?page and ?per_page.
+
+    Returns:
+        (page, per_page) - page is None when the client did not ask for one
+
+    Raises:
+        PaginationError on malformed values or per_page over MAX_PAGE_SIZE
+    """
+    page = _positive_int('page')
+    per_page = _positive_int('per_page') or DEFAULT_PER_PAGE
+    max_page_size = current_app.config.get('MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    if per_page > max_page_size:
+        raise PaginationError(f'per_page must be at most {max_page_size}')
+    return page, per_page
+
+
+def row_limit(resource: str) -> int:
+    limits = current_app.config.get('LIST_ROW_LIMITS', {})
+    return limits.get(resource, DEFAULT_ROW_LIMITS[resource])
+
+
+def paginate_query(query, resource: str):
+    """
+    Run a list query with validated paging and a per-resource row cap.
+
+    With ?page this is a normal db.paginate. Without it, up to row_limit(resource)
+    rows are returned; one extra row is fetched to detect a larger result, which
+    raises RowLimitExceeded instead of loading the whole table.
+
+    Raises:
+        PaginationError, RowLimitExceeded
+    """
+    page, per_page = parse_page_args()
+    if page is not None:
+        return db.paginate(query, page=page, per_page=per_page)
+
+    limit = row_limit(resource)
+    rows = db.session.execute(query.limit(limit + 1)).scalars().all()
+    if len(rows) > limit:
+        raise RowLimitExceeded(limit)
+    return rows
+
+
+def _encode_keyset(values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _keyset_value(column, value):
+    """Check a decoded cursor value against its column so a forged cursor never reaches the driver."""
+    python_type = column.type.python_type
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    accepted = (int, float) if python_type is float else python_type
+    if isinstance(value, bool) and python_type is not bool or not isinstance(value, accepted):
+        raise TypeError(f'{column.name} must be {python_type.__name__}')
+    return value
+
+
+def _decode_keyset(cursor: str, columns) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_keyset_value(column, v) for column, v in zip(columns, values)]
+    except (ValueError, TypeError, NotImplementedError) as e:
+        raise PaginationError(f'Invalid cursor: {cursor}') from e
+
+
+def _after(columns, values, descending=False):
+    """(c1, c2, ...) > (v1, v2, ...) (or < when descending) spelled out so every backend can use the index."""
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(column == value, _after(columns[1:], values[1:], descending)))
+
+
+def keyset_paginate(query, columns, key, descending=False):
+    """
+    Run query one keyset page at a time, ordered by columns (ascending, or
+    descending on every column).
+
+    The client passes back ?after=<next_cursor> instead of a page number, so
+    each page is an index seek plus per_page rows no matter how deep it is.
+    key(row) must return the row's values for columns.
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        PaginationError on a malformed cursor or per_page
+    """
+    _, per_page = parse_page_args()
+    cursor = request.args.get('after')
+    if cursor:
+        query = query.where(_after(columns, _decode_keyset(cursor, columns), descending))
+    order = [c.desc() for c in columns] if descending else columns
+    rows = db.session.execute(query.order_by(*order).limit(per_page + 1)).scalars().all()
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, _encode_keyset(key(rows[-1]))
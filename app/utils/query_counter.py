@@ -0,0 +1,125 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Every QueryStats currently counting in this thread/context: the request's own plus any count_queries() blocks
+_active: ContextVar[tuple] = ContextVar('query_stats', default=())
+
+
+class QueryStats:
+    """Statements run and seconds spent waiting on the database while active."""
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if record else None
+
+    def repeated(self, top: int = 5) -> list[tuple[str, int]]:
+        """The statements run more than once, most repeated first - usually a lazy load in a loop."""
+        if not self.statements:
+            return []
+        return [(sql, n) for sql, n in Counter(self.statements).most_common(top) if n > 1]
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, label: str, budget: int, stats: QueryStats):
+        lines = [f'{label or "Block"} ran {stats.count} queries (budget {budget})']
+        for sql, n in stats.repeated():
+            lines.append(f'  {n}x {" ".join(sql.split())[:200]}')
+        super().__init__('\n'.join(lines))
+        self.budget = budget
+        self.stats = stats
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info['query_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    active = _active.get()
+    started = conn.info.pop('query_started', None)
+    if not active or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for stats in active:
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+def _start(stats: QueryStats):
+    _active.set(_active.get() + (stats,))
+
+
+def _stop(stats: QueryStats):
+    _active.set(tuple(s for s in _active.get() if s is not stats))
+
+
+@contextmanager
+def count_queries(record: bool = True):
+    """Count the statements run inside the block, in this thread. Nests, and sees into requests made inside it."""
+    stats = QueryStats(record)
+    _start(stats)
+    try:
+        yield stats
+    finally:
+        _stop(stats)
+
+
+@contextmanager
+def query_budget(budget: int, label: str = ''):
+    """
+    Fail with QueryBudgetExceeded (an AssertionError, so tests report it as a
+    failure) if the block runs more than budget statements. The message
+    lists the statements that repeated, which is where an N+1 shows up.
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > budget:
+        raise QueryBudgetExceeded(label, budget, stats)
+
+
+def current_query_stats() -> QueryStats | None:
+    """The current request's QueryStats, if the counter is installed."""
+    return g.get('query_stats')
+
+
+def init_query_counter(app):
+    """
+    Count statements and database time for every request, in g.query_stats.
+
+    With QUERY_COUNT_HEADERS (default: on in debug mode) responses carry
+    X-Query-Count, X-DB-Time (milliseconds) and a Server-Timing entry browser
+    dev tools can show. Statements a streamed body runs after the headers go
+    out aren't included.
+    """
+    app.config.setdefault('QUERY_COUNT_HEADERS', app.debug)
+
+    @app.before_request
+    def start_query_count():
+        g.query_stats = QueryStats()
+        _start(g.query_stats)
+
+    @app.after_request
+    def add_query_count_headers(response):
+        stats = g.get('query_stats')
+        if stats is not None and app.config['QUERY_COUNT_HEADERS']:
+            db_ms = f'{stats.duration * 1000:.2f}'
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time'] = db_ms
+            response.headers.add('Server-Timing', f'db;dur={db_ms};desc="{stats.count} queries"')
+        return response
+
+    @app.teardown_request
+    def stop_query_count(exc):
+        stats = g.pop('query_stats', None)
+        if stats is not None:
+            _stop(stats)
@@ -0,0 +1,170 @@
+import operator
+import re
+from sqlalchemy import select
+
+# Query params that belong to the endpoint, not the filter language
+RESERVED_PARAMS = frozenset({'page', 'per_page', 'ids', 'include', 'sort'})
+MAX_IN_VALUES = 50
+
+OPERATORS = {
+    'eq': operator.eq,
+    'in': lambda column, values: column.in_(values),
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+_PARAM = re.compile(r'^(\w+)(?:\[(\w+)\])?$')
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Filterable:
+    """
+    One filterable field: the column it compiles to, how to parse a raw value,
+    the operators it allows and, for columns on another table, the join to reach it.
+
+    order_by maps sort names to the columns to order by when this field's index
+    drives the query - e.g. ordering by the junction table's copy of the id, so
+    the database can see the index already returns rows in that order.
+    """
+
+    def __init__(self, column, parse, operators=('eq',), join=None, order_by=None):
+        self.column = column
+        self.parse = parse
+        self.operators = tuple(operators)
+        self.join = join
+        self.order_by = order_by or {}
+
+
+class QuerySpec:
+    """
+    An allow-listed filter and sort language for one model.
+
+    ?status=Pending&service_date[gte]=2024-01-01&sort=-service_date
+
+    Plain 'field=value' means eq; 'field[in]=a,b' takes a comma-separated
+    list. A query is only accepted if one of the declared indexes can drive
+    it: the index's leading column must be filtered, and the requested sort
+    must be the order that index already returns rows in (the column right
+    after its equality prefix, or id once every index column is bound).
+    Anything else would be a table scan or a full sort, so it is rejected
+    with a QueryError naming the fields involved.
+    """
+
+    def __init__(self, model, fields: dict, sorts: dict, indexes: dict):
+        self.model = model
+        self.fields = fields
+        self.sorts = sorts
+        self.indexes = indexes
+
+    def parse(self, args) -> tuple[dict, tuple[str, bool] | None]:
+        """
+        Parse request args into ({field: {op: value}}, (sort_field, descending) or None).
+
+        Raises:
+            QueryError on unknown fields/operators, bad values or a disallowed sort
+        """
+        filters = {}
+        for key, raw in args.items(multi=True):
+            if key in RESERVED_PARAMS:
+                continue
+            match = _PARAM.match(key)
+            name, op = (match.group(1), match.group(2) or 'eq') if match else (key, None)
+            field = self.fields.get(name)
+            if field is None:
+                raise QueryError(f"Unknown filter: {name} (allowed: {', '.join(self.fields)})")
+            if op not in field.operators:
+                raise QueryError(f"Operator {op!r} is not allowed on {name} (allowed: {', '.join(field.operators)})")
+            if op in filters.setdefault(name, {}):
+                raise QueryError(f'Duplicate filter: {key} (use {name}[in] for several values)')
+            try:
+                if op == 'in':
+                    values = [field.parse(v.strip()) for v in raw.split(',') if v.strip()]
+                    if not values or len(values) > MAX_IN_VALUES:
+                        raise ValueError(f'expected 1 to {MAX_IN_VALUES} values')
+                    filters[name][op] = values
+                else:
+                    filters[name][op] = field.parse(raw)
+            except ValueError as e:
+                raise QueryError(f'Invalid value for {key}: {raw!r} ({e})')
+
+        sort = None
+        raw_sort = args.get('sort')
+        if raw_sort:
+            descending = raw_sort.startswith('-')
+            name = raw_sort.lstrip('-')
+            if name not in self.sorts:
+                raise QueryError(f"Cannot sort by {name} (allowed: {', '.join(self.sorts)})")
+            sort = (name, descending)
+        return filters, sort
+
+    def plan(self, filters: dict, sort: tuple[str, bool] | None) -> tuple[str, tuple[str, ...], bool]:
+        """
+        Pick the index that drives the query and the ORDER BY it can return rows in.
+
+        Among indexes whose leading column is filtered (any index when there
+        are no filters), the one binding the most columns wins; ties go to
+        declaration order, so declare the most selective indexes first. Without an explicit sort, rows come back in that
+        index's order.
+
+        Returns:
+            (index name, order-by field names, descending)
+
+        Raises:
+            QueryError if no index serves this combination of filters and sort
+        """
+        best = None
+        for name, columns in self.indexes.items():
+            if filters and columns[0] not in filters:
+                continue
+            # Columns bound by a single-value equality keep the rest of the index in order
+            bound = 0
+            while bound < len(columns) and set(filters.get(columns[bound], {})) == {'eq'}:
+                bound += 1
+            order = tuple(dict.fromkeys(columns[bound:] + ('id',)))
+            if sort is not None and sort[0] != order[0]:
+                continue
+            # A range or IN-list on the next column is still an index seek
+            used = bound + (1 if order[0] in filters else 0)
+            if best is None or used > best[0]:
+                best = (used, name, order)
+
+        if best is None:
+            fields = ', '.join(filters) or 'nothing'
+            sorted_by = f', sorted by {sort[0]}' if sort else ''
+            raise QueryError(f'No index supports filtering on {fields}{sorted_by}')
+        return best[1], best[2], bool(sort and sort[1])
+
+    def compile(self, args):
+        """
+        Parse, plan and build the SELECT for request args.
+
+        Returns:
+            (statement, index name)
+
+        Raises:
+            QueryError
+        """
+        filters, sort = self.parse(args)
+        index, order, descending = self.plan(filters, sort)
+
+        statement = select(self.model)
+        for name, conditions in filters.items():
+            field = self.fields[name]
+            if field.join is not None:
+                statement = statement.join(*field.join)
+            for op, value in conditions.items():
+                statement = statement.where(OPERATORS[op](field.column, value))
+
+        driving = self.fields.get(self.indexes[index][0])
+        overrides = driving.order_by if driving is not None else {}
+        columns = [
+            overrides.get(name, self.sorts[name] if name in self.sorts else self.fields[name].column)
+            for name in order
+        ]
+        statement = statement.order_by(*[c.desc() if descending else c.asc() for c in columns])
+        return statement, index
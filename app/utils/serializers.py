@@ -0,0 +1,120 @@
+import itertools
+from flask import jsonify
+from marshmallow import fields, missing
+
+# Field types whose dump is a plain conversion of the attribute value
+_CONVERSIONS = {
+    fields.Integer: 'int({v})',
+    fields.Float: 'float({v})',
+    fields.String: 'str({v})',
+    fields.Email: 'str({v})',
+    fields.DateTime: '{v}.isoformat()',
+    fields.Date: '{v}.isoformat()',
+}
+_ISO_FORMATS = (None, 'iso', 'iso8601')
+
+
+def _conversion(field) -> str | None:
+    """The inline expression template for field, or None if it needs the generic path."""
+    template = _CONVERSIONS.get(type(field))
+    if template is None:
+        return None
+    if isinstance(field, fields.Number) and field.as_string:
+        return None
+    if isinstance(field, (fields.DateTime, fields.Date)) and field.format not in _ISO_FORMATS:
+        return None
+    return template
+
+
+def _generate(schema) -> callable:
+    """Generate and exec the dump function for a single (many=False) object."""
+    namespace = {'missing': missing}
+    lines = ['def dump(obj):', '    out = {}']
+    counter = itertools.count()
+
+    for name, field in schema.dump_fields.items():
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        i = next(counter)
+
+        if isinstance(field, fields.Nested) and '.' not in attribute:
+            nested = CompiledSchema(field.schema)
+            namespace[f'nested_{i}'] = nested.dump_one
+            lines.append(f'    v = obj.{attribute}')
+            if field.schema.many or field.many:
+                lines.append(f'    out[{key!r}] = None if v is None else [nested_{i}(x) for x in v]')
+            else:
+                lines.append(f'    out[{key!r}] = None if v is None else nested_{i}(v)')
+            continue
+
+        template = _conversion(field)
+        if template is not None and attribute.isidentifier():
+            lines.append(f'    v = obj.{attribute}')
+            lines.append(f'    out[{key!r}] = None if v is None else ' + template.format(v='v'))
+            continue
+
+        # Anything else goes through marshmallow itself
+        namespace[f'field_{i}'] = field
+        namespace[f'accessor_{i}'] = schema.get_attribute
+        lines.append(f'    v = field_{i}.serialize({name!r}, obj, accessor=accessor_{i})')
+        lines.append(f'    if v is not missing:')
+        lines.append(f'        out[{key!r}] = v')
+
+    lines.append('    return out')
+    exec('\n'.join(lines), namespace)
+    return namespace['dump']
+
+
+class CompiledSchema:
+    """
+    Drop-in replacement for schema.dump/schema.jsonify on hot read paths.
+
+    Schema.dump sends every field of every object through Field.serialize,
+    get_value and _serialize. This generates one function per schema with the
+    type conversions inlined and produces the exact same output. It only uses
+    attribute access, so ORM objects and Row tuples with matching column
+    labels both work.
+
+    Compiles lazily on first use, since Nested fields reference other schemas
+    by name and are only resolvable once every blueprint has been imported.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.many = schema.many
+        self._dump_one = None
+
+    def dump_one(self, obj) -> dict:
+        if self._dump_one is None:
+            self._dump_one = _generate(self.schema)
+        return self._dump_one(obj)
+
+    def dump(self, obj, many: bool | None = None):
+        if many is None:
+            many = self.many
+        if many:
+            dump_one = self.dump_one
+            return [dump_one(o) for o in obj]
+        return self.dump_one(obj)
+
+    def jsonify(self, obj, many: bool | None = None):
+        return jsonify(self.dump(obj, many=many))
+
+
+_compiled = {}
+
+
+def compile_schema(schema, only: tuple[str, ...] | None = None) -> CompiledSchema:
+    """
+    Return the CompiledSchema for schema, optionally restricted to a field selection.
+
+    Compiled schemas are memoized per (schema, only) so callers can ask for a
+    selection per request without recompiling.
+    """
+    key = (id(schema), tuple(only) if only else None)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        if only:
+            schema = type(schema)(only=only, many=schema.many, exclude=schema.exclude)
+        compiled = _compiled[key] = CompiledSchema(schema)
+    return compiled
@@ -0,0 +1,392 @@
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from app.models import db
+from app.utils.metrics import SLOW_QUERIES
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_SLOTS = 1024
+SLOT_SIZE = 4096
+MAX_PARAMS = 100
+MAX_PARAM_LENGTH = 200
+
+# Values bound to these columns are masked even when parameters are recorded
+SENSITIVE_COLUMNS = {'password', 'email', 'phone'}
+MASK = '***'
+
+# EXPLAIN without ANALYZE plans a statement without running it
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+EXPLAINABLE = {'SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'}
+
+_HEADER = struct.Struct('QII')  # next sequence number, slot size, slot count
+_LENGTH = struct.Struct('I')
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ExplainUnavailable(ValueError):
+    pass
+
+
+# ============================================================================
+# RING BUFFER
+# ============================================================================
+
+def _encode(record: dict, limit: int) -> bytes:
+    """JSON for a record, cutting parameters and then the statement until it fits a slot."""
+    data = json.dumps(record).encode('utf-8')
+    if len(data) > limit and record['parameters'] is not None:
+        record = dict(record, parameters=None, truncated=True)
+        data = json.dumps(record).encode('utf-8')
+    while len(data) > limit:
+        statement = record['statement']
+        record = dict(record, statement=statement[:len(statement) * 3 // 4], truncated=True)
+        data = json.dumps(record).encode('utf-8')
+    return data
+
+
+def read_ring(data) -> list[dict]:
+    """Every intact record in a ring's bytes, oldest first."""
+    if len(data) < _HEADER.size:
+        return []
+    next_seq, slot_size, slots = _HEADER.unpack_from(data, 0)
+    records = []
+    for seq in range(max(0, next_seq - slots), next_seq):
+        offset = _HEADER.size + (seq % slots) * slot_size
+        if offset + slot_size > len(data):
+            break
+        length = _LENGTH.unpack_from(data, offset)[0]
+        try:
+            record = json.loads(bytes(data[offset + _LENGTH.size:offset + _LENGTH.size + length]))
+        except ValueError:
+            continue  # Being overwritten as we read
+        if record.get('seq') == seq:
+            records.append(record)
+    return records
+
+
+class SlowQueryRing:
+    """
+    A fixed number of fixed-size JSON records in a memory-mapped file, or
+    anonymous memory without a path. Once full, each record overwrites the
+    oldest one, so the file never grows. Appending is a copy into the
+    mapping. The kernel writes the pages back when it chooses, so no I/O
+    happens on the request path.
+    """
+
+    def __init__(self, path: str | None = None, slots: int = DEFAULT_SLOTS, slot_size: int = SLOT_SIZE):
+        self._lock = threading.Lock()
+        self._slots = slots
+        self._slot_size = slot_size
+        size = _HEADER.size + slots * slot_size
+        if path:
+            self._file = open(path, 'a+b')
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._file = None
+            self._map = mmap.mmap(-1, size)
+        # A leftover file with a different layout is started over
+        if _HEADER.unpack_from(self._map, 0)[1:] != (slot_size, slots):
+            _HEADER.pack_into(self._map, 0, 0, slot_size, slots)
+
+    def append(self, record: dict) -> int:
+        """Store a record and return its sequence number."""
+        with self._lock:
+            seq = _HEADER.unpack_from(self._map, 0)[0]
+            data = _encode(dict(record, seq=seq), self._slot_size - _LENGTH.size)
+            offset = _HEADER.size + (seq % self._slots) * self._slot_size
+            self._map[offset:offset + _LENGTH.size + len(data)] = _LENGTH.pack(len(data)) + data
+            _HEADER.pack_into(self._map, 0, seq + 1, self._slot_size, self._slots)
+            return seq
+
+    def records(self) -> list[dict]:
+        with self._lock:
+            return read_ring(self._map)
+
+    def close(self):
+        self._map.close()
+        if self._file:
+            self._file.close()
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= MAX_PARAM_LENGTH else value[:MAX_PARAM_LENGTH] + '...'
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    return _jsonable(repr(value))
+
+
+def _sensitive(name) -> bool:
+    # Bind names are the column name, with a _1 style suffix in WHERE clauses
+    return name is None or re.sub(r'_\d+$', '', str(name)).lower() in SENSITIVE_COLUMNS
+
+
+def _bind_names(context, parameters) -> list | None:
+    """The name each positional parameter was bound under, if the statement was compiled."""
+    compiled = getattr(context, 'compiled', None)
+    names = getattr(compiled, 'positiontup', None)
+    if not names or len(names) != len(parameters):
+        return None
+    return list(names)
+
+
+def _parameters(parameters, names: list | None):
+    """Parameters fit for the log, with sensitive ones masked. Unnamed ones are all masked."""
+    if isinstance(parameters, dict):
+        return {str(k): MASK if _sensitive(k) else _jsonable(v) for k, v in list(parameters.items())[:MAX_PARAMS]}
+    if isinstance(parameters, (list, tuple)):
+        names = names or [None] * len(parameters)
+        return [MASK if _sensitive(name) else _jsonable(v) for name, v in list(zip(names, parameters))[:MAX_PARAMS]]
+    return None
+
+
+def _parameter_types(parameters) -> list[str]:
+    values = parameters.values() if isinstance(parameters, dict) else parameters or ()
+    return [type(v).__name__ for v in list(values)[:MAX_PARAMS]]
+
+
+def _literal(value) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def render_sql(statement: str, parameters, paramstyle: str) -> str:
+    """
+    The statement with its parameters inlined as SQL literals, for reading
+    and pasting into a console. Falls back to the bare statement when the
+    parameters don't line up with its placeholders.
+    """
+    if not parameters:
+        return statement
+    try:
+        if paramstyle in ('qmark', 'format') and isinstance(parameters, list):
+            parts = statement.split('?' if paramstyle == 'qmark' else '%s')
+            if len(parts) != len(parameters) + 1:
+                return statement
+            rendered = parts[0] + ''.join(_literal(p) + part for p, part in zip(parameters, parts[1:]))
+            return rendered.replace('%%', '%') if paramstyle == 'format' else rendered
+        if paramstyle == 'pyformat' and isinstance(parameters, dict):
+            return statement % {k: _literal(v) for k, v in parameters.items()}
+        if paramstyle == 'named' and isinstance(parameters, dict):
+            return re.sub(r'(?<!:):(\w+)', lambda m: _literal(parameters[m.group(1)]), statement)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return statement
+
+
+# ============================================================================
+# RECORDER
+# ============================================================================
+
+def _call_site() -> str | None:
+    """The innermost frame in the app's own code that led to the statement."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR + os.sep) and filename != __file__:
+            return f'{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def remove_ring(directory: str, pid: int):
+    """Delete a process's ring file, once the process has gone."""
+    try:
+        os.remove(os.path.join(directory, f'slow_queries_{pid}.ring'))
+    except FileNotFoundError:
+        pass
+
+
+class SlowQueryLog:
+    """
+    Statements slower than threshold_ms, with the route, handler and line
+    of app code that ran them. With a directory every process writes its
+    own ring file there and records() reads the ones of live processes.
+    Without one, the ring lives in this process's memory.
+
+    Only the number and types of a statement's parameters are kept, unless
+    parameters is true. Even then, values bound to SENSITIVE_COLUMNS (or
+    to placeholders that can't be matched to a column) are masked.
+    """
+
+    def __init__(self, threshold_ms: float, directory: str | None = None, slots: int = DEFAULT_SLOTS,
+                 parameters: bool = False):
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.slots = slots
+        self.parameters = parameters
+        self._lock = threading.Lock()
+        self._ring = None
+        self._pid = None
+
+    @property
+    def ring(self) -> SlowQueryRing:
+        # Opened on first use, and again in each forked worker
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    path = os.path.join(self.directory, f'slow_queries_{pid}.ring') if self.directory else None
+                    self._ring = SlowQueryRing(path, self.slots)
+                    self._pid = pid
+        return self._ring
+
+    def record(self, conn, context, statement: str, parameters, executemany: bool, duration: float):
+        first = parameters[0] if executemany and parameters else parameters
+        entry = {
+            'pid': os.getpid(),
+            'time': time.time(),
+            'duration_ms': round(duration * 1000, 3),
+            'statement': statement,
+            'parameters': _parameters(first, _bind_names(context, first)) if self.parameters else None,
+            'parameter_types': _parameter_types(first),
+            'executemany': len(parameters) if executemany else None,
+            'dialect': conn.dialect.name,
+            'paramstyle': conn.dialect.paramstyle,
+            'route': None,
+            'method': None,
+            'path': None,
+            'handler': None,
+            'call_site': _call_site(),
+        }
+        if has_request_context():
+            view = current_app.view_functions.get(request.endpoint)
+            entry.update(
+                route=request.endpoint,
+                method=request.method,
+                path=request.path,
+                handler=f'{view.__module__}.{view.__qualname__}' if view else None,
+            )
+        self.ring.append(entry)
+        SLOW_QUERIES.labels(entry['route'] or 'none').inc()
+
+    def records(self, limit: int | None = None) -> list[dict]:
+        """Recorded statements, newest first, each with an 'id' and its 'rendered_sql'."""
+        if self.directory:
+            records = []
+            for path in glob.glob(os.path.join(self.directory, 'slow_queries_*.ring')):
+                pid = int(re.search(r'slow_queries_(\d+)\.ring$', path).group(1))
+                if not _alive(pid):
+                    remove_ring(self.directory, pid)
+                    continue
+                with open(path, 'rb') as f:
+                    records.extend(read_ring(f.read()))
+        else:
+            records = self.ring.records()
+        records.sort(key=lambda r: r['time'], reverse=True)
+        records = records[:limit]
+        for record in records:
+            record['id'] = f"{record['pid']}-{record['seq']}"
+            record['rendered_sql'] = render_sql(record['statement'], record['parameters'], record['paramstyle'])
+        return records
+
+
+def explain(record: dict) -> list[dict]:
+    """
+    Plan a recorded statement against the current database, without running it.
+
+    Raises:
+        ExplainUnavailable
+    """
+    dialect = db.engine.dialect.name
+    prefix = EXPLAIN_PREFIXES.get(dialect)
+    if prefix is None or record['dialect'] != dialect:
+        raise ExplainUnavailable(f"Can't EXPLAIN a {record['dialect']} statement on {dialect}")
+    words = record['statement'].split(None, 1)
+    if not words or words[0].upper() not in EXPLAINABLE:
+        raise ExplainUnavailable(f'Only {", ".join(sorted(EXPLAINABLE))} statements can be explained')
+    if record.get('truncated'):
+        raise ExplainUnavailable('Statement was truncated when recorded')
+    if record['parameters'] is None and record.get('parameter_types'):
+        raise ExplainUnavailable('Parameters were not recorded (SLOW_QUERY_LOG_PARAMETERS)')
+
+    parameters = record['parameters']
+    if isinstance(parameters, list):
+        parameters = tuple(parameters)
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + record['statement'], parameters or ()).mappings().all()
+        conn.rollback()
+    return [dict(row) for row in rows]
+
+
+def _listen(engine, log: SlowQueryLog):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_slow_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info['slow_query_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_slow_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('slow_query_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if duration * 1000 >= log.threshold_ms:
+            log.record(conn, context, statement, parameters, executemany, duration)
+
+
+def init_slow_query_log(app):
+    """
+    Record statements slower than SLOW_QUERY_THRESHOLD_MS (default 200, None
+    turns the log off) in app.extensions['slow_query_log']. Records go to a
+    ring of SLOW_QUERY_LOG_SLOTS entries per process, kept in files under
+    SLOW_QUERY_LOG_DIR when set. Read them at /admin/slow-queries.
+
+    Parameter values are only recorded with SLOW_QUERY_LOG_PARAMETERS, and
+    /admin/slow-queries only runs EXPLAIN with SLOW_QUERY_EXPLAIN, which
+    needs the parameters. Both default to off.
+    """
+    threshold_ms = app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS)
+    app.config.setdefault('SLOW_QUERY_LOG_PARAMETERS', False)
+    app.config.setdefault('SLOW_QUERY_EXPLAIN', False)
+    if threshold_ms is None:
+        return
+    log = SlowQueryLog(
+        threshold_ms,
+        app.config.get('SLOW_QUERY_LOG_DIR'),
+        app.config.get('SLOW_QUERY_LOG_SLOTS', DEFAULT_SLOTS),
+        app.config['SLOW_QUERY_LOG_PARAMETERS'],
+    )
+    app.extensions['slow_query_log'] = log
+    with app.app_context():
+        for engine in db.engines.values():
+            _listen(engine, log)
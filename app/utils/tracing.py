@@ -0,0 +1,493 @@
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.extensions import cache
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_QUEUE_SIZE = 2048
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_EXPORT_INTERVAL = 1.0
+DEFAULT_FILE_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_FILE_BACKUPS = 3
+MAX_STATEMENT_LENGTH = 1000
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})')
+
+logger = logging.getLogger(__name__)
+
+# The span new spans are children of. NOT_SAMPLED marks a trace the sampler
+# skipped, so nothing under it does more than this lookup.
+NOT_SAMPLED = object()
+_current: ContextVar = ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes', 'status',
+                 'message', 'processor')
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, kind: int, attributes: dict, processor=None):
+        self.processor = processor
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.message = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def fail(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.message = str(exc)
+        self.attributes['exception.type'] = type(exc).__name__
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        if self.processor is not None:
+            self.processor.submit(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+
+# ============================================================================
+# EXPORTERS
+# ============================================================================
+
+class InMemoryExporter:
+    """Keeps exported spans in a list, for tests."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans: list[Span]):
+        self.spans.extend(spans)
+
+    def clear(self):
+        self.spans.clear()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_span(span: Span) -> dict:
+    """A span in OTLP/JSON form."""
+    data = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+        'status': {'code': span.status},
+    }
+    if span.parent_id:
+        data['parentSpanId'] = span.parent_id
+    if span.message:
+        data['status']['message'] = span.message
+    return data
+
+
+class OTLPFileExporter:
+    """
+    Appends each batch to a file as one line of OTLP/JSON
+    (ExportTraceServiceRequest), the format the OpenTelemetry Collector's
+    file receiver and otlpjsonfile tooling read.
+
+    Each process writes its own file, path with the pid before the
+    extension (traces.<pid>.jsonl), as the metrics and slow query files
+    are split, so gunicorn workers never append to or rotate each other's.
+    A batch that would take the file past max_bytes first rotates it to
+    <file>.1, shifting older files up to <file>.<backups>, as logging's
+    RotatingFileHandler does.
+    """
+
+    def __init__(self, path: str, service_name: str = 'autoful',
+                 max_bytes: int = DEFAULT_FILE_MAX_BYTES, backups: int = DEFAULT_FILE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.resource = {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]}
+
+    @property
+    def file(self) -> str:
+        """This process's file; looked up on each export so a forked worker gets its own."""
+        root, ext = os.path.splitext(self.path)
+        return f'{root}.{os.getpid()}{ext}'
+
+    def _rotate(self, file: str):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{file}.{i}'):
+                os.replace(f'{file}.{i}', f'{file}.{i + 1}')
+        if self.backups:
+            os.replace(file, f'{file}.1')
+        else:
+            os.remove(file)
+
+    def export(self, spans: list[Span]):
+        payload = {'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [otlp_span(s) for s in spans]}],
+        }]}
+        line = (json.dumps(payload) + '\n').encode('utf-8')
+        file = self.file
+        try:
+            size = os.path.getsize(file)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(line) > self.max_bytes:
+            self._rotate(file)
+        with open(file, 'ab') as f:
+            f.write(line)
+
+
+# ============================================================================
+# EXPORT QUEUE
+# ============================================================================
+
+class SpanProcessor:
+    """
+    Hands finished spans to an exporter from a background thread, which
+    wakes every interval seconds, or sooner once a batch has built up.
+
+    submit() never blocks: spans go on a deque, which appends without a
+    lock, and once queue_size are waiting new ones are dropped and counted
+    in dropped, so a slow or broken exporter can't hold up requests. The
+    thread starts on first use in each process, so forked workers get
+    their own, and runs until shutdown().
+    """
+
+    def __init__(self, exporter, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, interval: float = DEFAULT_EXPORT_INTERVAL):
+        self.exporter = exporter
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._spans = deque()
+        self._wake = threading.Event()
+        self._export_lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._stopped = False
+
+    def submit(self, span: Span):
+        if self._stopped:
+            return
+        if self._pid != os.getpid():
+            self._start()
+        if len(self._spans) >= self.queue_size:
+            self.dropped += 1
+            return
+        self._spans.append(span)
+        if len(self._spans) >= self.batch_size:
+            self._wake.set()
+
+    def _start(self):
+        with self._export_lock:
+            if self._pid != os.getpid():
+                if self._pid is not None:
+                    # A forked child: the parent exports what it queued
+                    self._spans = deque()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Stop the export thread and export what's left."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.shutdown)
+
+    def flush(self):
+        """Export everything queued so far."""
+        with self._export_lock:
+            while self._spans:
+                batch = [self._spans.popleft() for _ in range(min(self.batch_size, len(self._spans)))]
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    logger.exception('Exporting %d spans failed', len(batch))
+
+
+# ============================================================================
+# TRACER
+# ============================================================================
+
+class Tracer:
+    """An app's sampler and span processor, kept in app.extensions['tracing']."""
+
+    def __init__(self, exporter, sample_rate: float = DEFAULT_SAMPLE_RATE, trust_parent: bool = False,
+                 **processor_options):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.trust_parent = trust_parent
+        self.processor = SpanProcessor(exporter, **processor_options)
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def start_trace(self, name: str, kind: int, attributes: dict,
+                    trace_id: str | None = None, parent_id: str | None = None) -> Span:
+        """A root span, or the first span here of a trace continued from a caller."""
+        return Span(name, trace_id or f'{random.getrandbits(128):032x}', parent_id, kind, attributes, self.processor)
+
+    def flush(self):
+        self.processor.flush()
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+
+def current_span() -> Span | None:
+    parent = _current.get()
+    return None if parent is NOT_SAMPLED else parent
+
+
+def _start(name: str, kind: int, attributes: dict) -> Span | None:
+    parent = _current.get()
+    if parent is NOT_SAMPLED:
+        return None
+    if parent is None:
+        # Outside a request, e.g. a CLI script: a new trace for the app's tracer
+        tracer = current_app.extensions.get('tracing') if has_app_context() else None
+        if tracer is None or not tracer.sampled():
+            return None
+        return tracer.start_trace(name, kind, attributes)
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes, parent.processor)
+
+
+class span:
+    """
+    Time a block as a child of the current span, or as a new trace subject
+    to the app's sampling when there isn't one. Yields the Span, or None when the
+    trace isn't sampled. An exception marks the span as failed.
+
+        with span('cache.get', key=key):
+            ...
+    """
+    __slots__ = ('_name', '_kind', '_attributes', '_span', '_token')
+
+    def __init__(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+
+    def __enter__(self) -> Span | None:
+        self._span = _start(self._name, self._kind, self._attributes)
+        if self._span is not None:
+            self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is not None:
+            _current.reset(self._token)
+            if exc is not None:
+                self._span.fail(exc)
+            self._span.end()
+        return False
+
+
+def traced(name: str, kind: int = KIND_INTERNAL):
+    """Decorator: run every call to the function in a span."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(f):
+    """
+    Carry the current span into f when it runs on another thread (thread
+    pools don't copy context variables), so its spans join this trace.
+    """
+    parent = _current.get()
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    statement_span = _start('db.execute', KIND_CLIENT, {
+        'db.system': conn.dialect.name,
+        'db.statement': statement[:MAX_STATEMENT_LENGTH],
+    })
+    if statement_span is not None:
+        conn.info['trace_span'] = statement_span
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    statement_span = conn.info.pop('trace_span', None)
+    if statement_span is not None:
+        statement_span.end()
+
+
+@event.listens_for(Engine, 'handle_error')
+def _fail_statement_span(context):
+    statement_span = context.connection.info.pop('trace_span', None) if context.connection is not None else None
+    if statement_span is not None:
+        statement_span.fail(context.original_exception)
+        statement_span.end()
+
+
+def _instrument_cache(backend):
+    get, set_ = backend.get, backend.set
+
+    def traced_get(key):
+        with span('cache.get', key=key) as cache_span:
+            value = get(key)
+            if cache_span is not None:
+                cache_span.set_attribute('cache.hit', value is not None)
+            return value
+
+    def traced_set(key, value, timeout=None):
+        with span('cache.set', key=key):
+            return set_(key, value, timeout)
+
+    backend.get = traced_get
+    backend.set = traced_set
+
+
+def _make_exporter(app):
+    exporter = app.config['TRACING_EXPORTER']
+    if exporter == 'otlp-file':
+        return OTLPFileExporter(
+            app.config.get('TRACING_FILE', 'traces.jsonl'),
+            app.config.get('TRACING_SERVICE_NAME', 'autoful'),
+            app.config.get('TRACING_FILE_MAX_BYTES', DEFAULT_FILE_MAX_BYTES),
+            app.config.get('TRACING_FILE_BACKUPS', DEFAULT_FILE_BACKUPS),
+        )
+    if exporter == 'memory':
+        return InMemoryExporter()
+    return exporter
+
+
+def init_tracing(app):
+    """
+    Trace requests and the database, cache, auth, bcrypt and Firebase work
+    under them.
+
+    TRACING_EXPORTER is 'otlp-file' (writes TRACING_FILE with the pid
+    before the extension, one file per process, rotated at
+    TRACING_FILE_MAX_BYTES with TRACING_FILE_BACKUPS old files kept),
+    'memory', or any object with an export(spans) method; None (the
+    default) turns tracing off. TRACING_SAMPLE_RATE (default 0.01) is the
+    share of requests traced.
+
+    A W3C traceparent header's trace is continued when the request is
+    sampled, but its sampled flag only decides whether to trace with
+    TRACING_TRUST_PARENT, for deployments where only trusted services can
+    reach the app. Otherwise any client could have every request traced.
+    The Tracer is kept in app.extensions['tracing'].
+    """
+    app.config.setdefault('TRACING_EXPORTER', None)
+    app.config.setdefault('TRACING_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)
+    app.config.setdefault('TRACING_TRUST_PARENT', False)
+    exporter = _make_exporter(app)
+    if exporter is None:
+        return
+    if 'tracing' in app.extensions:
+        app.extensions['tracing'].shutdown()
+    tracer = Tracer(exporter, app.config['TRACING_SAMPLE_RATE'], app.config['TRACING_TRUST_PARENT'])
+    app.extensions['tracing'] = tracer
+
+    def start_request_span():
+        # Unsampled requests are in and out of here in a few microseconds,
+        # so the header is read straight from the WSGI environ
+        match = TRACEPARENT.fullmatch(request.environ.get('HTTP_TRACEPARENT', ''))
+        if match and tracer.trust_parent:
+            sampled = int(match.group(3), 16) & 1
+        else:
+            sampled = tracer.sampled()
+        if not sampled:
+            g.trace = (_current.set(NOT_SAMPLED), None)
+            return
+        rule = request.url_rule
+        request_span = tracer.start_trace(
+            f'{request.method} {rule.rule if rule else request.path}',
+            KIND_SERVER,
+            {'http.method': request.method, 'http.target': request.path},
+            *(match.groups()[:2] if match else ()),
+        )
+        g.trace = (_current.set(request_span), request_span)
+    # First in line, so the span covers the rate limiter and every other hook
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request_span)
+
+    @app.after_request
+    def tag_request_span(response):
+        request_span = _current.get()
+        if request_span is not NOT_SAMPLED and request_span is not None:
+            request_span.set_attribute('http.status_code', response.status_code)
+            request_span.set_attribute('http.route', request.endpoint or 'unmatched')
+            if response.status_code >= 500:
+                request_span.status = STATUS_ERROR
+            response.headers['traceparent'] = request_span.traceparent
+        return response
+
+    @app.teardown_request
+    def end_request_span(exc):
+        token, request_span = g.pop('trace', (None, None))
+        if token is None:
+            return
+        _current.reset(token)
+        if request_span is not None:
+            if exc is not None:
+                request_span.fail(exc)
+            request_span.end()
+
+    _instrument_cache(app.extensions['cache'][cache])
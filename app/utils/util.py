@@ -3,8 +3,10 @@ from jose import jwt
 from functools import wraps
 from flask import request, jsonify
 import os
+import bcrypt
 import jose
 from app.models import Customer, Mechanic, db
+from app.utils.tracing import traced
 
 SECRET_KEY = os.environ.get('SECRET_KEY') or 'ThisIsASuperSecretKeyToProtextTheGoods'
 
@@ -48,6 +50,7 @@ def decode_legacy_token(token: str) -> dict | None:
         return None
 
 
+@traced('auth.verify_token')
 def verify_token(token: str) -> dict | None:
     """
     Verify a token - tries Firebase first, then falls back to legacy JWT.
@@ -74,6 +77,19 @@ def verify_token(token: str) -> dict | None:
     return decode_legacy_token(token)
 
 
+# ========== PASSWORD HASHING ==========
+# bcrypt's own functions, each call traced since they dominate login and signup time
+
+@traced('bcrypt.hashpw')
+def hashpw(password: bytes, salt: bytes) -> bytes:
+    return bcrypt.hashpw(password, salt)
+
+
+@traced('bcrypt.checkpw')
+def checkpw(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
 # ========== HYBRID TOKEN DECORATORS ==========
 
 def token_required(f):
@@ -0,0 +1,81 @@
+import csv
+import os
+import re
+import sys
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
+
+# 17 characters, no I, O or Q
+VIN_PATTERN = r'^[A-HJ-NPR-Z0-9]{17}$'
+_VIN_RE = re.compile(VIN_PATTERN)
+
+WMI_TABLE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'wmi.csv')
+
+# Position 10 cycles through these every 30 years, starting at 1980
+YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'
+_YEAR_OFFSETS = {code: offset for offset, code in enumerate(YEAR_CODES)}
+
+# Keyed by (WMI, letter-or-digit in position 7, position 10): a few thousand distinct keys in practice
+PREFIX_CACHE_SIZE = 1 << 15
+
+
+class DecodedVin(NamedTuple):
+    wmi: str
+    make: str | None
+    year: int | None
+
+
+def normalize_vin(vin: str) -> str:
+    return vin.strip().upper()
+
+
+@lru_cache(maxsize=1)
+def _wmi_table() -> dict[str, str]:
+    """WMI -> make, read from the bundled table on first use. Make names are interned, so each is stored once."""
+    with open(WMI_TABLE_PATH, newline='') as f:
+        return {row['wmi']: sys.intern(row['make']) for row in csv.DictReader(f)}
+
+
+@lru_cache(maxsize=PREFIX_CACHE_SIZE)
+def _decode_prefix(wmi: str, second_cycle: bool, year_code: str) -> tuple[str | None, int | None]:
+    make = _wmi_table().get(wmi)
+    offset = _YEAR_OFFSETS.get(year_code)
+    if offset is None:
+        return make, None
+    year = 1980 + offset + (30 if second_cycle else 0)
+    if year > date.today().year + 1:
+        year -= 30
+    return make, year
+
+
+def decode_vin(vin: str) -> DecodedVin | None:
+    """
+    Decode make (from the manufacturer identifier, positions 1-3) and model
+    year (position 10) without a network call. Returns None if vin is not a
+    well-formed VIN; make or year are None when the table has no answer.
+    """
+    vin = normalize_vin(vin)
+    if not _VIN_RE.match(vin):
+        return None
+    wmi = vin[:3]
+    # Since 2010, North American VINs carry a letter in position 7 to mark the second year cycle
+    make, year = _decode_prefix(wmi, vin[6].isalpha(), vin[9])
+    return DecodedVin(wmi, make, year)
+
+
+def fill_from_vin(data: dict) -> dict:
+    """Return data with a missing make and year filled in from data['vin'] where the VIN decodes them."""
+    if not isinstance(data, dict) or not isinstance(data.get('vin'), str):
+        return data
+    if data.get('make') and data.get('year'):
+        return data
+    decoded = decode_vin(data['vin'])
+    if decoded is None:
+        return data
+    filled = dict(data)
+    if not filled.get('make') and decoded.make:
+        filled['make'] = decoded.make
+    if not filled.get('year') and decoded.year:
+        filled['year'] = decoded.year
+    return filled
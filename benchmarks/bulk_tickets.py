@@ -0,0 +1,47 @@
+"""
+Compare creating tickets one POST at a time against POST /service_tickets/batch.
+Run with: python -m benchmarks.bulk_tickets [--tickets 100] [--rounds 10]
+
+Each round creates the same number of tickets both ways and reports the
+wall time per round.
+"""
+import argparse
+from benchmarks.common import make_app, seed, percentiles, time_calls
+from app.utils.util import encode_mechanic_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickets', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(customers=100, tickets=0)
+        headers = {'Authorization': f'Bearer {encode_mechanic_token(1)}'}
+
+    payload = [
+        {
+            'VIN': f'1HGCM82633A{i:06d}',
+            'service_date': '2024-11-01',
+            'service_desc': f'Fleet service {i}',
+            'customer_id': (i % 100) + 1
+        }
+        for i in range(args.tickets)
+    ]
+    client = app.test_client()
+
+    def single():
+        for ticket in payload:
+            assert client.post('/service_tickets/', json=ticket, headers=headers).status_code == 201
+
+    def batch():
+        assert client.post('/service_tickets/batch', json=payload, headers=headers).status_code == 201
+
+    for name, fn in (('single', single), ('batch', batch)):
+        print(f'[{name}] create {args.tickets} tickets: {percentiles(time_calls(fn, args.rounds))}')
+
+
+if __name__ == '__main__':
+    main()
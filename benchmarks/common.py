@@ -0,0 +1,70 @@
+"""
+Shared helpers for the benchmark scripts.
+Benchmarks run against BenchmarkConfig (sqlite:///benchmark.db by default,
+caching and rate limiting disabled).
+"""
+import statistics
+import time
+from datetime import date, timedelta
+from app import create_app
+from app.models import db, Customer, Mechanic, ServiceTicket, Inventory, ServiceInventory
+
+PASSWORD_HASH = '$2b$12$KIXQJQJ8bZ5Y5Z5Y5Z5Y5OZ5Y5Z5Y5Z5Y5Z5Y5Z5Y5Z5Y5Z5Y5Z5Y'
+
+
+def make_app():
+    return create_app('BenchmarkConfig')
+
+
+def seed(customers: int = 100, tickets: int = 1000, mechanics: int = 10, parts: int = 50):
+    """Drop and recreate the benchmark database with a fixed-shape dataset."""
+    db.drop_all()
+    db.create_all()
+
+    db.session.add_all([
+        Customer(name=f'Customer {i}', email=f'customer{i}@example.com', phone='5550000000', password=PASSWORD_HASH)
+        for i in range(1, customers + 1)
+    ])
+    db.session.add_all([
+        Mechanic(name=f'Mechanic {i}', email=f'mechanic{i}@example.com', phone='5550000000', salary=50000.0, password=PASSWORD_HASH)
+        for i in range(1, mechanics + 1)
+    ])
+    db.session.add_all([
+        Inventory(part_name=f'Part {i}', price=10.0 + i, cost=5.0 + i, quantity_in_stock=1000)
+        for i in range(1, parts + 1)
+    ])
+    db.session.flush()
+
+    all_mechanics = db.session.query(Mechanic).all()
+    for i in range(tickets):
+        ticket = ServiceTicket(
+            VIN=f'1HGCM82633A{i:06d}',
+            service_date=date(2024, 1, 1) + timedelta(days=i % 365),
+            service_desc=f'Service {i}',
+            customer_id=(i % customers) + 1,
+            mechanics=[all_mechanics[i % mechanics]]
+        )
+        ticket.service_inventories.append(ServiceInventory(inventory_id=(i % parts) + 1, quantity_used=1))
+        db.session.add(ticket)
+    db.session.commit()
+
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99 and mean of a list of durations, in milliseconds."""
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+    return {
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+    }
+
+
+def time_calls(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
@@ -0,0 +1,397 @@
+"""
+Deterministic synthetic dataset for capacity testing.
+Run with: python -m benchmarks.dataset [--tickets 1000000] [--seed 42] [--chunk-size 20000]
+
+Drops and recreates the benchmark database (BENCHMARK_DATABASE_URI), then
+fills it with customers, vehicles, mechanics, parts, tickets, mechanic
+assignments and part usages shaped like a real shop rather than a uniform
+spread:
+
+- a few fleet customers own a block of vehicles and bring in a large share
+  of all tickets (thousands each at a million tickets)
+- part usage follows a Zipf distribution: a handful of parts (oil, filters)
+  are on most tickets, the long tail is rarely touched
+- ticket volume grows over the covered years, and only recent tickets are
+  still open; older ones are completed with labor and totals filled in
+- mechanics are skewed too, some carry far more tickets than others
+
+The same seed and sizes always produce the same rows. Rows are built in
+Python and inserted with executemany in chunks of --chunk-size, with
+secondary indexes dropped during the load and rebuilt afterwards.
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+from sqlalchemy import insert, select, text
+from benchmarks.common import make_app
+from app.models import (
+    db, Customer, Vehicle, ServiceCategory, ServiceTicket, Mechanic,
+    Inventory, ServiceInventory, service_mechanics
+)
+from app.blueprints.service_tickets.lifecycle import PENDING, IN_PROGRESS, ON_HOLD, COMPLETED, CANCELLED
+from app.utils.vin import YEAR_CODES, decode_vin, _wmi_table
+from scripts.seed_categories import categories as CATEGORIES
+
+DEFAULT_CHUNK_SIZE = 20_000
+END_DATE = date(2026, 9, 30)
+# bcrypt hash of 'password' (4 rounds), so generated users can log in
+PASSWORD_HASH = '$2b$04$gaHgYPo6mAMBfdHUzpOYVOnyarxuYKbObf4oOf/rA6/VdPuciU4Mq'
+
+VIN_CHARS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+BODY_STYLES = ('Sedan', 'Coupe', 'SUV', 'Pickup', 'Van', 'Wagon', 'Hatchback')
+COLORS = ('Black', 'White', 'Silver', 'Gray', 'Blue', 'Red', 'Green')
+# (part name, category, low price, high price), most often used first
+PART_TYPES = (
+    ('Oil Filter', 'Filters', 8, 25), ('Synthetic Oil 5qt', 'Fluids', 25, 45), ('Air Filter', 'Filters', 12, 40),
+    ('Cabin Filter', 'Filters', 15, 35), ('Brake Pad Set', 'Brakes', 35, 120), ('Brake Rotor', 'Brakes', 45, 160),
+    ('Wiper Blade', 'Body', 10, 30), ('Spark Plug', 'Engine', 6, 25), ('Serpentine Belt', 'Engine', 25, 70),
+    ('Battery', 'Electrical', 110, 240), ('Headlight Bulb', 'Electrical', 10, 45), ('Coolant 1gal', 'Cooling', 15, 30),
+    ('Radiator Hose', 'Cooling', 20, 60), ('Tire', 'Tires', 90, 260), ('Transmission Fluid', 'Fluids', 20, 50),
+)
+# Weight of each category (same order as scripts/seed_categories.py): oil changes dominate
+CATEGORY_WEIGHTS = (30, 12, 15, 3, 5, 6, 5, 6, 3, 15)
+# Part lines per ticket: 0, 1, 2, 3 or 4
+LINE_COUNT_WEIGHTS = (20, 40, 25, 10, 5)
+OPEN_WINDOW_DAYS = 14
+
+
+class Profile(NamedTuple):
+    tickets: int
+    customers: int
+    vehicles: int
+    mechanics: int
+    parts: int
+    fleet_customers: int
+    fleet_share: float  # Fraction of tickets that belong to fleet vehicles
+    part_skew: float  # Zipf exponent for part popularity
+    years: int
+
+    @classmethod
+    def for_tickets(cls, tickets: int, **overrides) -> 'Profile':
+        """Sizes that scale with the ticket count; any field can be overridden."""
+        customers = overrides.pop('customers', None) or max(20, tickets // 25)
+        sizes = dict(
+            tickets=tickets,
+            customers=customers,
+            vehicles=int(customers * 1.4),
+            mechanics=max(5, tickets // 25_000),
+            parts=max(50, min(5000, tickets // 200)),
+            fleet_customers=max(3, customers // 2000),
+            fleet_share=0.25,
+            part_skew=1.1,
+            years=3,
+        )
+        sizes.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**sizes)
+
+
+def _zipf_weights(n: int, exponent: float) -> list[float]:
+    """Cumulative Zipf weights for ranks 1..n, for rng.choices(cum_weights=...)."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def _serial(i: int, width: int = 7) -> str:
+    digits = []
+    for _ in range(width):
+        i, r = divmod(i, len(VIN_CHARS))
+        digits.append(VIN_CHARS[r])
+    return ''.join(reversed(digits))
+
+
+def _chunks(rows, size: int):
+    iterator = iter(rows)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class _Generator:
+    def __init__(self, profile: Profile, seed: int, end: date):
+        self.p = profile
+        self.rng = random.Random(seed)
+        self.end = end
+        self.start = end - timedelta(days=365 * profile.years)
+        self.span = (end - self.start).days
+
+    def customers(self):
+        rng, p = self.rng, self.p
+        self.fleet_ids = sorted(rng.sample(range(1, p.customers + 1), min(p.fleet_customers, p.customers)))
+        fleets = set(self.fleet_ids)
+        for i in range(1, p.customers + 1):
+            yield {
+                'id': i,
+                'name': f'Fleet Services {i}' if i in fleets else f'Customer {i}',
+                'email': f'customer{i}@example.com',
+                'phone': f'555{rng.randrange(10**7):07d}',
+                'password': PASSWORD_HASH,
+                'created_at': datetime.combine(self.start, datetime.min.time()) - timedelta(days=rng.randrange(365)),
+            }
+
+    def vehicles(self):
+        """Fleets share a block of vehicles; every other customer gets one, and extras go to random customers."""
+        rng, p = self.rng, self.p
+        wmis = list(_wmi_table())
+        fleets = set(self.fleet_ids)
+        regular = [c for c in range(1, p.customers + 1) if c not in fleets]
+        fleet_count = min(p.vehicles - 1, max(len(self.fleet_ids), int(p.vehicles * 0.1)))
+        self.fleet_vehicles = range(1, fleet_count + 1)
+        self.regular_vehicles = range(fleet_count + 1, p.vehicles + 1)
+        self.vehicle_owner = [0] * (p.vehicles + 1)
+        self.vehicle_vin = [''] * (p.vehicles + 1)
+        for i in range(1, p.vehicles + 1):
+            if i <= fleet_count:
+                owner = self.fleet_ids[i % len(self.fleet_ids)]
+            else:
+                n = i - fleet_count - 1
+                owner = regular[n] if n < len(regular) else rng.choice(regular)
+            vin = (rng.choice(wmis) + ''.join(rng.choices(VIN_CHARS, k=5)) + rng.choice('0123456789X')
+                   + rng.choice(YEAR_CODES[15:]) + _serial(i))
+            decoded = decode_vin(vin)
+            self.vehicle_owner[i], self.vehicle_vin[i] = owner, vin
+            yield {
+                'id': i,
+                'vin': vin,
+                'make': decoded.make or 'Unknown',
+                'model': rng.choice(BODY_STYLES),
+                'year': decoded.year or 2015,
+                'color': rng.choice(COLORS),
+                'license_plate': f'{_serial(i, 4)}{rng.randrange(1000):03d}',
+                'customer_id': owner,
+                'created_at': datetime.combine(self.start, datetime.min.time()),
+            }
+
+    def mechanics(self):
+        rng = self.rng
+        for i in range(1, self.p.mechanics + 1):
+            yield {
+                'id': i,
+                'name': f'Mechanic {i}',
+                'email': f'mechanic{i}@example.com',
+                'phone': f'555{rng.randrange(10**7):07d}',
+                'salary': float(rng.randrange(40_000, 95_000, 500)),
+                'password': PASSWORD_HASH,
+                'created_at': datetime.combine(self.start, datetime.min.time()),
+            }
+
+    def parts(self):
+        rng = self.rng
+        self.part_price = [0.0]
+        self.part_cost = [0.0]
+        for i in range(1, self.p.parts + 1):
+            name, category, low, high = PART_TYPES[(i - 1) % len(PART_TYPES)]
+            price = round(rng.uniform(low, high), 2)
+            cost = round(price * rng.uniform(0.5, 0.7), 2)
+            self.part_price.append(price)
+            self.part_cost.append(cost)
+            yield {
+                'id': i,
+                'part_name': name if i <= len(PART_TYPES) else f'{name} #{i}',
+                'price': price,
+                'cost': cost,
+                'quantity_in_stock': rng.randrange(0, 500),
+                'category': category,
+                'part_number': f'SYN-{i:06d}',
+                'reorder_point': rng.randrange(5, 25),
+                'created_at': datetime.combine(self.start, datetime.min.time()),
+            }
+
+    def tickets(self):
+        """Yield (ticket, part lines, mechanic ids) in id order."""
+        rng, p = self.rng, self.p
+        # The base part types rank first, most common first; the long tail is shuffled
+        head = min(len(PART_TYPES), p.parts)
+        tail = list(range(head + 1, p.parts + 1))
+        rng.shuffle(tail)
+        part_ranking = list(range(1, head + 1)) + tail
+        part_weights = _zipf_weights(p.parts, p.part_skew)
+        mechanic_ranking = list(range(1, p.mechanics + 1))
+        rng.shuffle(mechanic_ranking)
+        mechanic_weights = _zipf_weights(p.mechanics, 0.6)
+        category_weights = list(itertools.accumulate(CATEGORY_WEIGHTS))
+        line_count_weights = list(itertools.accumulate(LINE_COUNT_WEIGHTS))
+        line_id = 0
+
+        for i in range(1, p.tickets + 1):
+            if rng.random() < p.fleet_share:
+                vehicle = rng.choice(self.fleet_vehicles)
+            else:
+                vehicle = rng.choice(self.regular_vehicles)
+            # Square root spacing: volume grows steadily towards the end date
+            offset = int(self.span * ((i - rng.random()) / p.tickets) ** 0.5)
+            service_date = self.start + timedelta(days=min(offset, self.span))
+            category_index = bisect.bisect_right(category_weights, rng.random() * category_weights[-1])
+            category = CATEGORIES[category_index]
+
+            if (self.end - service_date).days > OPEN_WINDOW_DAYS:
+                status = rng.choices((COMPLETED, CANCELLED, ON_HOLD), cum_weights=(94, 98, 100))[0]
+            else:
+                status = rng.choices((PENDING, IN_PROGRESS, ON_HOLD, COMPLETED), cum_weights=(40, 80, 90, 100))[0]
+            worked = status in (COMPLETED, IN_PROGRESS)
+            labor_hours = round(category['default_labor_hours'] * rng.lognormvariate(0, 0.35), 1) if worked else 0.0
+            labor_rate = category['default_labor_rate']
+            created_at = datetime.combine(service_date, datetime.min.time()) + timedelta(minutes=rng.randrange(8 * 60, 17 * 60))
+            completed_at = created_at + timedelta(hours=rng.uniform(1, 72)) if status == COMPLETED else None
+
+            lines = []
+            count = bisect.bisect_right(line_count_weights, rng.random() * line_count_weights[-1])
+            chosen = {part_ranking[bisect.bisect_right(part_weights, rng.random() * part_weights[-1])] for _ in range(count)}
+            parts_total = parts_cost = 0.0
+            for part in sorted(chosen):
+                line_id += 1
+                quantity = 1 if rng.random() < 0.8 else rng.randrange(2, 5)
+                price, cost = self.part_price[part], self.part_cost[part]
+                parts_total += price * quantity
+                parts_cost += cost * quantity
+                lines.append({'id': line_id, 'service_ticket_id': i, 'inventory_id': part, 'quantity_used': quantity,
+                              'price_at_service': price, 'cost_at_service': cost})
+
+            if status == PENDING and rng.random() < 0.5:
+                mechanics = ()
+            else:
+                assigned = 1 if rng.random() < 0.75 else 2
+                mechanics = {mechanic_ranking[bisect.bisect_right(mechanic_weights, rng.random() * mechanic_weights[-1])]
+                             for _ in range(assigned)}
+
+            labor_total = round(labor_hours * labor_rate, 2)
+            ticket = {
+                'id': i,
+                'VIN': self.vehicle_vin[vehicle],
+                'service_date': service_date,
+                'service_desc': f"{category['name']} for vehicle {vehicle}",
+                'customer_id': self.vehicle_owner[vehicle],
+                'vehicle_id': vehicle,
+                'category_id': category_index + 1,
+                'status': status,
+                'created_at': created_at,
+                'updated_at': completed_at or created_at,
+                'completed_at': completed_at,
+                'labor_hours': labor_hours,
+                'labor_rate': labor_rate,
+                'mileage': rng.randrange(5_000, 200_000),
+                'notes': None,
+                'parts_total': round(parts_total, 2),
+                'parts_cost': round(parts_cost, 2),
+                'labor_total': labor_total,
+                'grand_total': round(parts_total + labor_total, 2),
+            }
+            yield ticket, lines, mechanics
+
+
+def _secondary_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def generate(profile: Profile, seed: int = 42, chunk_size: int = DEFAULT_CHUNK_SIZE, end: date = END_DATE,
+             on_progress=None) -> dict:
+    """
+    Drop and recreate the current app's database and fill it with profile's
+    rows. on_progress(table, rows so far) is called after every chunk.
+
+    Returns:
+        rows inserted per table
+    """
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    gen = _Generator(profile, seed, end)
+    counts = {}
+
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            # A throwaway load: don't wait for fsync on every chunk
+            conn.exec_driver_sql('PRAGMA synchronous = OFF')
+        indexes = _secondary_indexes()
+        for index in indexes:
+            index.drop(conn)
+        conn.commit()
+
+        def load(table, rows):
+            counts[table.name] = 0
+            for chunk in _chunks(rows, chunk_size):
+                conn.execute(insert(table), chunk)
+                conn.commit()
+                counts[table.name] += len(chunk)
+                if on_progress:
+                    on_progress(table.name, counts[table.name])
+
+        load(ServiceCategory.__table__, ({'id': i, **c} for i, c in enumerate(CATEGORIES, 1)))
+        load(Customer.__table__, gen.customers())
+        load(Vehicle.__table__, gen.vehicles())
+        load(Mechanic.__table__, gen.mechanics())
+        load(Inventory.__table__, gen.parts())
+
+        counts.update({ServiceTicket.__tablename__: 0, ServiceInventory.__tablename__: 0, service_mechanics.name: 0})
+        for chunk in _chunks(gen.tickets(), chunk_size):
+            conn.execute(insert(ServiceTicket.__table__), [ticket for ticket, _, _ in chunk])
+            lines = [line for _, ticket_lines, _ in chunk for line in ticket_lines]
+            if lines:
+                conn.execute(insert(ServiceInventory.__table__), lines)
+            assignments = [{'service_ticket_id': ticket['id'], 'mechanic_id': m} for ticket, _, ms in chunk for m in ms]
+            if assignments:
+                conn.execute(insert(service_mechanics), assignments)
+            conn.commit()
+            counts[ServiceTicket.__tablename__] += len(chunk)
+            counts[ServiceInventory.__tablename__] += len(lines)
+            counts[service_mechanics.name] += len(assignments)
+            if on_progress:
+                on_progress(ServiceTicket.__tablename__, counts[ServiceTicket.__tablename__])
+
+        for index in indexes:
+            index.create(conn)
+        if conn.dialect.name == 'postgresql':
+            # Ids were inserted explicitly, so move the sequences past them
+            for table in (ServiceCategory, Customer, Vehicle, Mechanic, Inventory, ServiceTicket, ServiceInventory):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.__tablename__}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table.__tablename__}))"
+                ))
+        conn.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, help='Default: tickets / 25')
+    parser.add_argument('--vehicles', type=int, help='Default: customers * 1.4')
+    parser.add_argument('--mechanics', type=int, help='Default: tickets / 25,000 (at least 5)')
+    parser.add_argument('--parts', type=int, help='Default: tickets / 200 (50 to 5,000)')
+    parser.add_argument('--fleet-customers', type=int, help='Default: customers / 2,000 (at least 3)')
+    parser.add_argument('--fleet-share', type=float, help='Fraction of tickets on fleet vehicles (default 0.25)')
+    parser.add_argument('--part-skew', type=float, help='Zipf exponent of part popularity (default 1.1)')
+    parser.add_argument('--years', type=int, help='Years of history (default 3)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    profile = Profile.for_tickets(
+        args.tickets, customers=args.customers, vehicles=args.vehicles, mechanics=args.mechanics, parts=args.parts,
+        fleet_customers=args.fleet_customers, fleet_share=args.fleet_share, part_skew=args.part_skew, years=args.years
+    )
+    print(f'Generating {profile}')
+
+    app = make_app()
+    with app.app_context():
+        started = time.perf_counter()
+
+        def progress(table, rows):
+            print(f'  {table}: {rows:,} rows ({time.perf_counter() - started:.1f}s)', end='\r')
+
+        counts = generate(profile, seed=args.seed, chunk_size=args.chunk_size, on_progress=progress)
+        print()
+        for table, rows in counts.items():
+            print(f'  {table:20} {rows:>12,}')
+
+        busiest = db.session.execute(
+            select(ServiceTicket.customer_id, db.func.count()).group_by(ServiceTicket.customer_id)
+            .order_by(db.func.count().desc()).limit(3)
+        ).all()
+        print(f"  busiest customers    {', '.join(f'#{c}: {n:,}' for c, n in busiest)}")
+        print(f'\nDone! Loaded in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,609 @@
+"""
+Benchmark every API route against a generated dataset, and gate on regressions.
+Run with: python -m benchmarks.endpoints [run] [--tickets 100000] [--concurrency 8] [--out results.json]
+          python -m benchmarks.endpoints compare BASELINE.json RESULTS.json
+
+run generates a dataset with benchmarks/dataset.py (skip with --no-seed to
+reuse the last one), then:
+
+1. drives each route on its own for --iterations requests (or --route-seconds,
+   whichever comes first), recording p50/p95/p99 latency, throughput, SQL
+   statements per request and peak RSS growth;
+2. runs a mixed load: --concurrency threads, each with its own test client,
+   picking routes by weight (--mix preset, adjusted with --weight
+   endpoint=N) for --duration seconds.
+
+Requests go through the Flask test client, so the numbers cover the app and
+the database but not a WSGI server or the network; threads share the GIL.
+Routes that write build their own fresh rows first (outside the timing), so
+runs never exhaust the dataset.
+
+Results are written as JSON to --out. With --compare BASELINE (or the compare
+command) p50/p95 latency, queries per request, error rate, throughput and
+peak RSS are checked against a stored baseline, and the exit status is 1 if
+anything regressed past --threshold.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Callable, NamedTuple
+from sqlalchemy import func, insert, select
+from benchmarks.common import make_app, percentiles
+from benchmarks.dataset import Profile, generate
+from app.models import db, Customer, Vehicle, ServiceTicket, Mechanic, Inventory, ServiceInventory, service_mechanics
+from app.utils.util import encode_customer_token, encode_mechanic_token
+from app.utils.query_counter import count_queries
+
+# Routes a request/response benchmark can't drive
+SKIPPED = {
+    'static': 'static files',
+    'swagger_ui.show': 'API docs',
+    'swagger_ui.static': 'API docs',
+    'events_bp.stream_events': 'server-sent event stream, never completes',
+    'metrics': 'monitoring scrape, not user traffic',
+    'admin_bp.get_slow_queries': 'admin tooling, not user traffic',
+}
+# Relative slowdown (and absolute floor, so sub-millisecond noise is ignored) that counts as a regression
+DEFAULT_THRESHOLD = 0.2
+MIN_REGRESSION_MS = 1.0
+PASSWORD = 'password'
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    headers: dict | None = None
+    json: object = None
+    data: bytes | None = None
+
+
+class Scenario(NamedTuple):
+    endpoint: str
+    build: Callable  # build(ctx) -> Request; may create rows first, untimed
+    weight: int  # share of the default mix; 0 keeps it out of the mix
+
+
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(endpoint: str, weight: int = 0):
+    def register(build):
+        SCENARIOS[endpoint] = Scenario(endpoint, build, weight)
+        return build
+    return register
+
+
+# Presets for the mixed load: endpoint -> weight, starting from each scenario's own weight
+MIXES = {
+    'default': lambda s: s.weight,
+    'read': lambda s: s.weight if s.endpoint.split('.')[-1].startswith(('get_', 'search_')) else 0,
+    'write': lambda s: 0 if s.endpoint.split('.')[-1].startswith(('get_', 'search_', 'export_')) else max(s.weight, 1),
+}
+
+_unique = itertools.count()
+_run_id = int(time.time())
+
+
+class Context:
+    """Ids to aim requests at, plus helpers for untimed setup. One per thread."""
+
+    def __init__(self, app, sizes: dict, seed: int):
+        self.app = app
+        self.rng = random.Random(seed)
+        self.sizes = sizes
+
+    def id(self, table: str) -> int:
+        return self.rng.randint(1, self.sizes[table])
+
+    def vin(self) -> str:
+        return self.rng.choice(self.sizes['vins'])
+
+    def unique(self, prefix: str) -> str:
+        return f'{prefix}{_run_id}x{next(_unique)}'
+
+    def mechanic_auth(self, mechanic_id: int | None = None) -> dict:
+        return {'Authorization': f'Bearer {encode_mechanic_token(mechanic_id or self.id("mechanics"))}'}
+
+    def customer_auth(self, customer_id: int) -> dict:
+        return {'Authorization': f'Bearer {encode_customer_token(customer_id)}'}
+
+    def insert(self, table, **values) -> int:
+        with self.app.app_context():
+            key = db.session.execute(insert(table).values(**values)).inserted_primary_key
+            db.session.commit()
+        return key[0] if key else None
+
+    def new_customer(self) -> int:
+        email = f"{self.unique('bench')}@example.com"
+        return self.insert(Customer, name='Bench Customer', email=email, phone='5550000000', password='x')
+
+    def new_ticket(self, status: str = 'Pending') -> int:
+        return self.insert(ServiceTicket, VIN=self.vin(), service_date=date.today(), service_desc='Benchmark ticket',
+                           customer_id=self.id('customers'), status=status)
+
+    def new_vin(self) -> str:
+        return '5YJSA1E26H' + f'{next(_unique) + _run_id % 10**6 * 10:07d}'[-7:]
+
+
+# ---- customers ----
+
+@scenario('customers_bp.login_customer', weight=2)
+def _(ctx):
+    return Request('POST', '/customers/login', json={'email': f"customer{ctx.id('customers')}@example.com", 'password': PASSWORD})
+
+@scenario('customers_bp.create_customer', weight=1)
+def _(ctx):
+    return Request('POST', '/customers/', json={'name': 'Bench', 'email': f"{ctx.unique('new')}@example.com",
+                                                'phone': '5550000000', 'password': PASSWORD})
+
+@scenario('customers_bp.bulk_import_customers')
+def _(ctx):
+    lines = [json.dumps({'name': 'Imported', 'email': f"{ctx.unique('import')}@example.com", 'phone': '5550000000',
+                         'password': PASSWORD}) for _ in range(50)]
+    return Request('POST', '/customers/import?format=ndjson', ctx.mechanic_auth(), data='\n'.join(lines).encode())
+
+@scenario('customers_bp.get_customers', weight=5)
+def _(ctx):
+    return Request('GET', f"/customers/?page={ctx.rng.randint(1, 20)}&per_page=20")
+
+@scenario('customers_bp.export_customers')
+def _(ctx):
+    return Request('GET', '/customers/export', ctx.mechanic_auth())
+
+@scenario('customers_bp.get_customer', weight=10)
+def _(ctx):
+    return Request('GET', f"/customers/{ctx.id('customers')}")
+
+@scenario('customers_bp.get_my_tickets', weight=5)
+def _(ctx):
+    return Request('GET', '/customers/my-tickets', ctx.customer_auth(ctx.id('customers')))
+
+@scenario('customers_bp.update_customer', weight=1)
+def _(ctx):
+    customer_id = ctx.id('customers')
+    return Request('PUT', f'/customers/{customer_id}', ctx.customer_auth(customer_id), json={'phone': '5551112222'})
+
+@scenario('customers_bp.delete_customer')
+def _(ctx):
+    customer_id = ctx.new_customer()
+    return Request('DELETE', f'/customers/{customer_id}', ctx.customer_auth(customer_id))
+
+@scenario('customers_bp.get_top_customers')
+def _(ctx):
+    return Request('GET', '/customers/top')
+
+# ---- inventory ----
+
+@scenario('inventory_bp.create_inventory', weight=1)
+def _(ctx):
+    return Request('POST', '/inventory/', ctx.mechanic_auth(), json={'part_name': 'Bench Part', 'price': 9.99,
+                                                                   'quantity_in_stock': 10})
+
+@scenario('inventory_bp.get_all_inventory', weight=5)
+def _(ctx):
+    return Request('GET', f"/inventory/?page={ctx.rng.randint(1, 5)}&per_page=20")
+
+@scenario('inventory_bp.export_inventory')
+def _(ctx):
+    return Request('GET', '/inventory/export', ctx.mechanic_auth())
+
+@scenario('inventory_bp.get_inventory_changes', weight=2)
+def _(ctx):
+    return Request('GET', '/inventory/changes')
+
+@scenario('inventory_bp.get_inventory', weight=8)
+def _(ctx):
+    return Request('GET', f"/inventory/{ctx.id('inventory')}")
+
+@scenario('inventory_bp.update_inventory', weight=1)
+def _(ctx):
+    return Request('PUT', f"/inventory/{ctx.id('inventory')}", ctx.mechanic_auth(), json={'quantity_in_stock': 500})
+
+@scenario('inventory_bp.delete_inventory')
+def _(ctx):
+    part_id = ctx.insert(Inventory, part_name='Doomed Part', price=1.0, quantity_in_stock=1)
+    return Request('DELETE', f'/inventory/{part_id}', ctx.mechanic_auth())
+
+@scenario('inventory_bp.search_inventory', weight=3)
+def _(ctx):
+    return Request('GET', f"/inventory/search?part_name={ctx.rng.choice(('Filter', 'Brake', 'Oil', 'Tire'))}", ctx.mechanic_auth())
+
+@scenario('inventory_bp.get_low_stock', weight=1)
+def _(ctx):
+    return Request('GET', '/inventory/low-stock?threshold=10', ctx.mechanic_auth())
+
+# ---- mechanics ----
+
+@scenario('mechanics_bp.login_mechanic', weight=1)
+def _(ctx):
+    return Request('POST', '/mechanics/login', json={'email': f"mechanic{ctx.id('mechanics')}@example.com", 'password': PASSWORD})
+
+@scenario('mechanics_bp.create_mechanic')
+def _(ctx):
+    return Request('POST', '/mechanics/', json={'name': 'Bench', 'email': f"{ctx.unique('mech')}@example.com",
+                                                'phone': '5550000000', 'salary': 50000.0, 'password': PASSWORD})
+
+@scenario('mechanics_bp.get_all_mechanics', weight=2)
+def _(ctx):
+    return Request('GET', '/mechanics/', ctx.mechanic_auth())
+
+@scenario('mechanics_bp.get_mechanic', weight=3)
+def _(ctx):
+    return Request('GET', f"/mechanics/{ctx.id('mechanics')}", ctx.mechanic_auth())
+
+@scenario('mechanics_bp.get_my_tickets', weight=5)
+def _(ctx):
+    return Request('GET', '/mechanics/my-tickets', ctx.mechanic_auth())
+
+@scenario('mechanics_bp.update_mechanic')
+def _(ctx):
+    mechanic_id = ctx.id('mechanics')
+    return Request('PUT', f'/mechanics/{mechanic_id}', ctx.mechanic_auth(mechanic_id), json={'phone': '5551112222'})
+
+@scenario('mechanics_bp.delete_mechanic')
+def _(ctx):
+    mechanic_id = ctx.insert(Mechanic, name='Doomed', email=f"{ctx.unique('doomed')}@example.com", phone='5550000000',
+                             salary=1.0, password='x')
+    return Request('DELETE', f'/mechanics/{mechanic_id}', ctx.mechanic_auth(mechanic_id))
+
+@scenario('mechanics_bp.get_top_mechanics')
+def _(ctx):
+    return Request('GET', '/mechanics/top')
+
+# ---- service tickets ----
+
+@scenario('service_tickets_bp.create_service_ticket', weight=3)
+def _(ctx):
+    return Request('POST', '/service_tickets/', ctx.mechanic_auth(), json={
+        'VIN': ctx.vin(), 'service_date': date.today().isoformat(), 'service_desc': 'Benchmark',
+        'customer_id': ctx.id('customers')
+    })
+
+@scenario('service_tickets_bp.create_service_tickets_batch')
+def _(ctx):
+    return Request('POST', '/service_tickets/batch', ctx.mechanic_auth(), json=[
+        {'VIN': ctx.vin(), 'service_date': date.today().isoformat(), 'service_desc': f'Fleet {i}',
+         'customer_id': ctx.id('customers')}
+        for i in range(20)
+    ])
+
+@scenario('service_tickets_bp.get_all_service_tickets', weight=10)
+def _(ctx):
+    status = ctx.rng.choice(('Pending', 'In Progress', 'Completed'))
+    return Request('GET', f"/service_tickets/?status={status}&sort=-service_date&page={ctx.rng.randint(1, 10)}&per_page=20")
+
+@scenario('service_tickets_bp.export_service_tickets')
+def _(ctx):
+    return Request('GET', '/service_tickets/export', ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.get_service_ticket_changes', weight=2)
+def _(ctx):
+    return Request('GET', '/service_tickets/changes')
+
+@scenario('service_tickets_bp.get_service_ticket', weight=15)
+def _(ctx):
+    return Request('GET', f"/service_tickets/{ctx.id('service_tickets')}")
+
+@scenario('service_tickets_bp.get_service_ticket_invoice', weight=3)
+def _(ctx):
+    return Request('GET', f"/service_tickets/{ctx.id('service_tickets')}/invoice?format={ctx.rng.choice(('json', 'html'))}",
+                   ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.update_service_ticket_status', weight=2)
+def _(ctx):
+    return Request('PUT', f'/service_tickets/{ctx.new_ticket()}/status', ctx.mechanic_auth(), json={'status': 'In Progress'})
+
+@scenario('service_tickets_bp.get_work_queue', weight=5)
+def _(ctx):
+    query = f"?mechanic_id={ctx.id('mechanics')}" if ctx.rng.random() < 0.5 else ''
+    return Request('GET', f"/service_tickets/queue/{ctx.rng.choice(('Pending', 'In Progress'))}{query}", ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.assign_mechanic', weight=2)
+def _(ctx):
+    return Request('PUT', f"/service_tickets/{ctx.new_ticket()}/assign-mechanic/{ctx.id('mechanics')}", ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.remove_mechanic', weight=1)
+def _(ctx):
+    ticket_id, mechanic_id = ctx.new_ticket(), ctx.id('mechanics')
+    ctx.insert(service_mechanics, service_ticket_id=ticket_id, mechanic_id=mechanic_id)
+    return Request('PUT', f'/service_tickets/{ticket_id}/remove-mechanic/{mechanic_id}', ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.edit_service_ticket_mechanics', weight=1)
+def _(ctx):
+    return Request('PUT', f'/service_tickets/{ctx.new_ticket()}/edit-mechanics', ctx.mechanic_auth(),
+                   json={'add_ids': [ctx.id('mechanics')], 'remove_ids': []})
+
+@scenario('service_tickets_bp.add_inventory_to_ticket', weight=2)
+def _(ctx):
+    return Request('POST', f'/service_tickets/{ctx.new_ticket()}/add-inventory', ctx.mechanic_auth(),
+                   json={'inventory_id': ctx.id('inventory'), 'quantity_used': 1})
+
+@scenario('service_tickets_bp.remove_inventory_from_ticket', weight=1)
+def _(ctx):
+    ticket_id = ctx.new_ticket()
+    line_id = ctx.insert(ServiceInventory, service_ticket_id=ticket_id, inventory_id=ctx.id('inventory'), quantity_used=1)
+    return Request('PUT', f'/service_tickets/{ticket_id}/remove-inventory/{line_id}', ctx.mechanic_auth())
+
+@scenario('service_tickets_bp.delete_service_ticket')
+def _(ctx):
+    return Request('DELETE', f'/service_tickets/{ctx.new_ticket()}', ctx.mechanic_auth())
+
+# ---- vehicles ----
+
+@scenario('vehicles_bp.create_vehicle', weight=1)
+def _(ctx):
+    return Request('POST', '/vehicles/', ctx.mechanic_auth(), json={'vin': ctx.new_vin(), 'model': 'Model S',
+                                                                  'customer_id': ctx.id('customers')})
+
+@scenario('vehicles_bp.get_vehicles', weight=3)
+def _(ctx):
+    return Request('GET', f"/vehicles/?page={ctx.rng.randint(1, 20)}&per_page=20")
+
+@scenario('vehicles_bp.get_vehicle', weight=8)
+def _(ctx):
+    return Request('GET', f'/vehicles/{ctx.vin()}')
+
+@scenario('vehicles_bp.get_vehicle_history', weight=5)
+def _(ctx):
+    return Request('GET', f'/vehicles/{ctx.vin()}/history?per_page=20')
+
+@scenario('vehicles_bp.update_vehicle', weight=1)
+def _(ctx):
+    return Request('PUT', f'/vehicles/{ctx.vin()}', ctx.mechanic_auth(), json={'color': ctx.rng.choice(('Red', 'Blue'))})
+
+@scenario('vehicles_bp.delete_vehicle')
+def _(ctx):
+    vin = ctx.new_vin()
+    ctx.insert(Vehicle, vin=vin, make='Tesla', model='Doomed', year=2017, customer_id=ctx.id('customers'))
+    return Request('DELETE', f'/vehicles/{vin}', ctx.mechanic_auth())
+
+
+# ---- measurement ----
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KiB on Linux
+
+
+def timed(client, request: Request) -> tuple[float, int, int]:
+    """(seconds, status code, SQL statements) for one request, body included."""
+    with count_queries(record=False) as queries:
+        start = time.perf_counter()
+        response = client.open(request.url, method=request.method, headers=request.headers, json=request.json, data=request.data)
+        response.get_data()  # Streamed responses do their work here
+        elapsed = time.perf_counter() - start
+    response.close()
+    return elapsed, response.status_code, queries.count
+
+
+def summarize(samples: list[float], queries: list[int], errors: int, wall: float) -> dict:
+    if len(samples) == 1:
+        samples = samples * 2
+    return {
+        'requests': len(queries),
+        'errors': errors,
+        'error_rate': round(errors / len(queries), 4),
+        'rps': round(len(queries) / wall, 2) if wall else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+        **percentiles(samples),
+    }
+
+
+def run_route(ctx: Context, client, s: Scenario, iterations: int, max_seconds: float) -> dict:
+    samples, queries, errors = [], [], 0
+    rss_before = peak_rss_kb()
+    started = time.perf_counter()
+    wall = 0.0
+    for _ in range(iterations):
+        elapsed, status, count = timed(client, s.build(ctx))
+        samples.append(elapsed)
+        queries.append(count)
+        errors += status >= 400
+        wall += elapsed
+        if time.perf_counter() - started > max_seconds:
+            break
+    return dict(summarize(samples, queries, errors, wall), rss_growth_kb=peak_rss_kb() - rss_before)
+
+
+def run_mix(app, sizes: dict, weights: dict[str, int], concurrency: int, duration: float, seed: int) -> dict:
+    scenarios = [SCENARIOS[endpoint] for endpoint, w in weights.items() if w > 0]
+    cum_weights = list(itertools.accumulate(weights[s.endpoint] for s in scenarios))
+    results = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(n: int):
+        ctx = Context(app, sizes, seed + n)
+        client = app.test_client()
+        local = []
+        while time.perf_counter() < deadline:
+            s = ctx.rng.choices(scenarios, cum_weights=cum_weights)[0]
+            local.append((s.endpoint, *timed(client, s.build(ctx))))
+        with lock:
+            results.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    if not results:
+        return {'requests': 0}
+
+    summary = summarize([r[1] for r in results], [r[3] for r in results], sum(r[2] >= 400 for r in results), wall)
+    summary['by_endpoint'] = {
+        endpoint: sum(1 for r in results if r[0] == endpoint) for endpoint in weights if weights[endpoint] > 0
+    }
+    return summary
+
+
+def dataset_sizes() -> dict:
+    count = lambda model: db.session.execute(select(func.max(model.id))).scalar() or 0
+    sizes = {
+        'customers': count(Customer), 'mechanics': count(Mechanic), 'inventory': count(Inventory),
+        'service_tickets': count(ServiceTicket), 'vehicles': count(Vehicle),
+    }
+    sizes['vins'] = db.session.execute(select(Vehicle.vin).order_by(Vehicle.id).limit(2000)).scalars().all()
+    return sizes
+
+
+def mix_weights(mix: str, overrides: list[str]) -> dict[str, int]:
+    weights = {endpoint: MIXES[mix](s) for endpoint, s in SCENARIOS.items()}
+    for override in overrides:
+        endpoint, _, weight = override.partition('=')
+        if endpoint not in SCENARIOS:
+            raise SystemExit(f'Unknown endpoint in --weight: {endpoint}')
+        weights[endpoint] = int(weight)
+    return weights
+
+
+# ---- regression gate ----
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Human-readable regressions of current against baseline (empty if none)."""
+    regressions = []
+
+    def slower(name: str, metric: str, base: float, now: float):
+        if now > base * (1 + threshold) and now - base > MIN_REGRESSION_MS:
+            regressions.append(f'{name}: {metric} {base}ms -> {now}ms (+{(now / base - 1) * 100 if base else 100:.0f}%)')
+
+    for endpoint, base in baseline.get('routes', {}).items():
+        now = current.get('routes', {}).get(endpoint)
+        if now is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            slower(endpoint, metric, base[metric], now[metric])
+        # Query counts only move when the code does, so any real increase counts
+        if now['queries_per_request'] > base['queries_per_request'] * 1.05 + 0.5:
+            regressions.append(f"{endpoint}: queries/request {base['queries_per_request']} -> {now['queries_per_request']}")
+        if now['error_rate'] > base['error_rate'] + 0.01:
+            regressions.append(f"{endpoint}: error rate {base['error_rate']:.2%} -> {now['error_rate']:.2%}")
+
+    base_mix, now_mix = baseline.get('mix', {}), current.get('mix', {})
+    if base_mix.get('rps') and now_mix.get('rps') and now_mix['rps'] < base_mix['rps'] * (1 - threshold):
+        regressions.append(f"mix: throughput {base_mix['rps']} -> {now_mix['rps']} req/s")
+    if base_mix.get('p95_ms') and now_mix.get('p95_ms'):
+        slower('mix', 'p95_ms', base_mix['p95_ms'], now_mix['p95_ms'])
+    if current.get('peak_rss_kb', 0) > baseline.get('peak_rss_kb', 0) * (1 + threshold) > 0:
+        regressions.append(f"peak RSS {baseline['peak_rss_kb']} KiB -> {current['peak_rss_kb']} KiB")
+    return regressions
+
+
+def report_regressions(baseline_path: str, current: dict, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, threshold)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) against {baseline_path}:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print(f'\nNo regressions against {baseline_path} (threshold {threshold:.0%})')
+    return 0
+
+
+def run(args) -> int:
+    app = make_app()
+    with app.app_context():
+        if not args.no_seed:
+            print(f'Generating {args.tickets:,} tickets...')
+            generate(Profile.for_tickets(args.tickets), seed=args.seed)
+        sizes = dataset_sizes()
+        db.session.remove()
+
+    covered = {rule.endpoint for rule in app.url_map.iter_rules()}
+    uncovered = sorted(covered - set(SCENARIOS) - set(SKIPPED))
+    if uncovered:
+        print(f"Warning: no scenario for {', '.join(uncovered)}")
+    selected = [s for s in SCENARIOS.values() if not args.routes or any(r in s.endpoint for r in args.routes)]
+
+    print(f"Dataset: {sizes['service_tickets']:,} tickets, {sizes['customers']:,} customers\n")
+    print(f"{'endpoint':55} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'queries':>8} {'errors':>6}")
+    ctx = Context(app, sizes, args.seed)
+    client = app.test_client()
+    routes = {}
+    for s in selected:
+        result = routes[s.endpoint] = run_route(ctx, client, s, args.iterations, args.route_seconds)
+        print(f"{s.endpoint:55} {result['p50_ms']:>8.2f}ms {result['p95_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms "
+              f"{result['rps']:>8} {result['queries_per_request']:>8} {result['errors']:>6}")
+
+    weights = mix_weights(args.mix, args.weight)
+    weights = {e: w for e, w in weights.items() if SCENARIOS[e] in selected}
+    mix = {}
+    if args.duration > 0 and any(weights.values()):
+        print(f'\nMixed load ({args.mix}): {args.concurrency} threads for {args.duration}s...')
+        mix = run_mix(app, sizes, weights, args.concurrency, args.duration, args.seed)
+        print(f"  {mix['requests']:,} requests, {mix['rps']} req/s, p50 {mix['p50_ms']}ms, p95 {mix['p95_ms']}ms, "
+              f"p99 {mix['p99_ms']}ms, {mix['queries_per_request']} queries/request, {mix['errors']} errors")
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'dataset': {k: v for k, v in sizes.items() if k != 'vins'},
+        'settings': {'iterations': args.iterations, 'route_seconds': args.route_seconds, 'mix': args.mix,
+                     'weights': {e: w for e, w in weights.items() if w}, 'concurrency': args.concurrency,
+                     'duration': args.duration, 'seed': args.seed},
+        'routes': routes,
+        'mix': mix,
+        'peak_rss_kb': peak_rss_kb(),
+        'uncovered': uncovered,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nPeak RSS {results['peak_rss_kb'] / 1024:.0f} MiB")
+    print(f'Done! Results written to {args.out}')
+
+    if args.compare:
+        return report_regressions(args.compare, results, args.threshold)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+
+    run_parser = commands.add_parser('run', help='Benchmark the routes (default)')
+    run_parser.add_argument('--tickets', type=int, default=100_000)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--no-seed', action='store_true', help='Reuse the dataset from the last run')
+    run_parser.add_argument('--iterations', type=int, default=50, help='Requests per route')
+    run_parser.add_argument('--route-seconds', type=float, default=10.0, help='Stop a route early after this long')
+    run_parser.add_argument('--routes', nargs='*', help='Only endpoints containing one of these strings')
+    run_parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    run_parser.add_argument('--weight', action='append', default=[], metavar='ENDPOINT=N',
+                            help='Override one endpoint\'s weight in the mix (repeatable)')
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--duration', type=float, default=20.0, help='Seconds of mixed load (0 to skip)')
+    run_parser.add_argument('--out', default='benchmark_results.json')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='Fail on regressions against this results file')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser('compare', help='Check a results file against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ('run', 'compare', '-h', '--help'):
+        argv = ['run', *argv]
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.results) as f:
+            sys.exit(report_regressions(args.baseline, json.load(f), args.threshold))
+    sys.exit(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Check that streaming exports keep peak memory flat as the table grows.
+Run with: python -m benchmarks.export_memory [--sizes 1000 10000 50000]
+"""
+import argparse
+import tracemalloc
+from benchmarks.common import make_app, seed
+from app.models import db, Mechanic
+from app.utils.util import encode_mechanic_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    app = make_app()
+    for size in args.sizes:
+        with app.app_context():
+            seed(customers=100, tickets=size)
+            mechanic_id = db.session.query(Mechanic.id).first()[0]
+        headers = {'Authorization': f'Bearer {encode_mechanic_token(mechanic_id)}'}
+        client = app.test_client()
+
+        for export_format in ('ndjson', 'csv'):
+            tracemalloc.start()
+            response = client.get(f'/service_tickets/export?format={export_format}', headers=headers, buffered=False)
+            exported = sum(len(chunk) for chunk in response.response)
+            response.close()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'tickets={size:<8} format={export_format:<7} bytes={exported:<12,} peak_mem={peak / 1024 / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
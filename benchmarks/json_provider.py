@@ -0,0 +1,45 @@
+"""
+Compare the default (stdlib) and orjson JSON providers.
+Run with: python -m benchmarks.json_provider [--iterations 50]
+
+Reports pure encode time for a dumped 1,000-ticket page and end-to-end
+request latency on the ticket and customer list endpoints.
+"""
+import argparse
+from benchmarks.common import make_app, seed, percentiles, time_calls
+from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.models import db, ServiceTicket
+from app.utils.json_provider import JSON_PROVIDERS
+from sqlalchemy import select
+
+ENDPOINTS = [
+    '/service_tickets/?page=1&per_page=1000',
+    '/customers/?page=1&per_page=1000',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(customers=1000, tickets=1000)
+        tickets = db.session.execute(select(ServiceTicket)).scalars().all()
+        payload = service_tickets_schema.dump(tickets)
+
+    for name, provider_class in JSON_PROVIDERS.items():
+        app.json = provider_class(app)
+        encode = percentiles(time_calls(lambda: app.json.dumps(payload), args.iterations))
+        print(f'[{name}] encode 1,000 tickets: {encode}')
+
+        client = app.test_client()
+        for url in ENDPOINTS:
+            assert client.get(url).status_code == 200, url
+            latency = percentiles(time_calls(lambda: client.get(url), args.iterations))
+            print(f'[{name}] GET {url}: {latency}')
+
+
+if __name__ == '__main__':
+    main()
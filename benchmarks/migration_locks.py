@@ -0,0 +1,141 @@
+"""
+Measure how long a schema change on service_tickets blocks writers.
+Run with: python -m benchmarks.migration_locks [--tickets 1000000] [--chunk-size 5000] [--pause 0.05]
+
+Seeds the benchmark database with --tickets tickets (skip with --no-seed to
+reuse the last run's data), then makes the same change twice while a writer
+thread keeps updating random tickets: a NOT NULL column with a default, a
+nullable foreign key to mechanics and an index. Once the way 806b2bed5871
+does it (op.batch_alter_table) and once through app/utils/online_migration.py.
+
+For each, prints the migration's wall time and the writer's latencies during
+it. The slowest write is the longest a writer waited on a migration lock.
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+import sqlalchemy as sa
+from alembic import op
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from benchmarks.common import make_app, seed, percentiles
+from app.models import db, ServiceTicket
+from app.utils import online_migration
+
+SEED_BATCH = 50_000
+WRITE_INTERVAL = 0.005
+
+
+def seed_tickets(count: int):
+    seed(customers=1000, tickets=0, mechanics=10, parts=0)
+    start = date(2020, 1, 1)
+    for lo in range(0, count, SEED_BATCH):
+        db.session.execute(sa.insert(ServiceTicket), [
+            {
+                'VIN': f'1HGCM82633A{i % 1_000_000:06d}',
+                'service_date': start + timedelta(days=i % 1800),
+                'service_desc': f'Service {i}',
+                'customer_id': (i % 1000) + 1,
+                'mileage': 10_000 + i % 150_000,
+            }
+            for i in range(lo, min(lo + SEED_BATCH, count))
+        ])
+        db.session.commit()
+        print(f'  seeded {min(lo + SEED_BATCH, count):,} tickets', end='\r')
+    print()
+
+
+def batch_upgrade(suffix: str, **_):
+    with op.batch_alter_table('service_tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(f'priority_{suffix}', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column(f'reviewer_{suffix}_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(f'fk_service_tickets_reviewer_{suffix}', 'mechanics', [f'reviewer_{suffix}_id'], ['id'])
+        batch_op.create_index(f'ix_service_tickets_priority_{suffix}', [f'priority_{suffix}'], unique=False)
+
+
+def online_upgrade(suffix: str, chunk_size: int, pause: float):
+    online_migration.add_column(
+        'service_tickets', sa.Column(f'priority_{suffix}', sa.Integer(), nullable=False, server_default='0'),
+        backfill=0, chunk_size=chunk_size, pause=pause
+    )
+    online_migration.add_column('service_tickets', sa.Column(f'reviewer_{suffix}_id', sa.Integer(), nullable=True))
+    online_migration.add_foreign_key(f'fk_service_tickets_reviewer_{suffix}', 'service_tickets', 'mechanics',
+                                     [f'reviewer_{suffix}_id'], ['id'])
+    online_migration.create_index(f'ix_service_tickets_priority_{suffix}', 'service_tickets', [f'priority_{suffix}'])
+
+
+def writer(engine, max_id: int, stop: threading.Event, samples: list, errors: list):
+    rng = random.Random(7)
+    tickets = ServiceTicket.__table__
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    sa.update(tickets).where(tickets.c.id == rng.randint(1, max_id)).values(mileage=rng.randint(0, 200_000))
+                )
+        except sa.exc.OperationalError as e:
+            errors.append(str(e.orig))
+        samples.append(time.perf_counter() - start)
+        time.sleep(WRITE_INTERVAL)
+
+
+def measure(upgrade, suffix: str, max_id: int, chunk_size: int, pause: float) -> dict:
+    # The writer waits as long as it takes rather than failing, so its latency is the lock wait
+    connect_args = {'timeout': 600} if db.engine.dialect.name == 'sqlite' else {}
+    writer_engine = sa.create_engine(db.engine.url, connect_args=connect_args)
+    samples, errors, stop = [], [], threading.Event()
+    thread = threading.Thread(target=writer, args=(writer_engine, max_id, stop, samples, errors))
+    thread.start()
+    time.sleep(0.5)
+    baseline = len(samples)
+
+    start = time.perf_counter()
+    with db.engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={'transaction_per_migration': True})
+        with Operations.context(context), context.begin_transaction(_per_migration=True):
+            upgrade(suffix, chunk_size=chunk_size, pause=pause)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    thread.join()
+    writer_engine.dispose()
+    during = samples[baseline:] or [0.0, 0.0]
+    return {
+        'migration_s': round(elapsed, 2),
+        'writes': len(during),
+        'errors': len(errors),
+        'max_write_ms': round(max(during) * 1000, 1),
+        **percentiles(during),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickets', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=online_migration.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--pause', type=float, default=online_migration.DEFAULT_PAUSE)
+    parser.add_argument('--no-seed', action='store_true', help='Reuse the tickets from the last run')
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        if not args.no_seed:
+            print(f'Seeding {args.tickets:,} tickets...')
+            seed_tickets(args.tickets)
+        max_id = db.session.execute(sa.select(sa.func.max(ServiceTicket.id))).scalar() or 1
+        db.session.remove()
+
+        print(f'\n{max_id:,} tickets on {db.engine.dialect.name}, chunk size {args.chunk_size}, pause {args.pause}s\n')
+        suffix = str(int(time.time()))
+        for name, upgrade in (('batch_alter_table', batch_upgrade), ('online_migration', online_upgrade)):
+            result = measure(upgrade, f'{name[0]}{suffix}', max_id, args.chunk_size, args.pause)
+            print(f"{name:18} migration {result['migration_s']:>7}s  writes {result['writes']:>6}  "
+                  f"p50 {result['p50_ms']:>8}ms  p99 {result['p99_ms']:>8}ms  "
+                  f"max (lock wait) {result['max_write_ms']:>9}ms  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
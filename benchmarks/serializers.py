@@ -0,0 +1,48 @@
+"""
+Compare list-dump throughput of the Marshmallow schemas and their compiled serializers.
+Run with: python -m benchmarks.serializers [--tickets 1000] [--iterations 20]
+"""
+import argparse
+from benchmarks.common import make_app, seed, time_calls
+from app.blueprints.customers.schemas import customers_schema
+from app.blueprints.mechanics.schemas import mechanics_schema
+from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.blueprints.inventory.schemas import inventories_schema, service_inventories_schema
+from app.models import db, Customer, Mechanic, ServiceTicket, Inventory, ServiceInventory
+from app.utils.serializers import compile_schema
+from sqlalchemy import select
+
+CASES = [
+    ('ServiceTicketSchema', service_tickets_schema, ServiceTicket),
+    ('CustomerSchema', customers_schema, Customer),
+    ('MechanicSchema', mechanics_schema, Mechanic),
+    ('InventorySchema', inventories_schema, Inventory),
+    ('ServiceInventorySchema', service_inventories_schema, ServiceInventory),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickets', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(customers=args.tickets // 10, tickets=args.tickets)
+        for name, schema, model in CASES:
+            rows = db.session.execute(select(model)).scalars().all()
+            compiled = compile_schema(schema)
+            # Warm up: resolve lazy relationships so only serialization is timed
+            assert compiled.dump(rows) == schema.dump(rows)
+
+            marshmallow_s = min(time_calls(lambda: schema.dump(rows), args.iterations))
+            compiled_s = min(time_calls(lambda: compiled.dump(rows), args.iterations))
+            print(f'{name:<24} rows={len(rows):<6} '
+                  f'marshmallow={len(rows) / marshmallow_s:>10,.0f} rows/s  '
+                  f'compiled={len(rows) / compiled_s:>10,.0f} rows/s  '
+                  f'speedup={marshmallow_s / compiled_s:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
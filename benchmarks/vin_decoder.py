@@ -0,0 +1,59 @@
+"""
+Measure offline VIN decode throughput.
+Run with: python -m benchmarks.vin_decoder [--vins 1000000] [--seed 42]
+
+Decodes a synthetic batch of VINs built from the bundled WMI table (plus some
+unknown manufacturers) twice: with the per-prefix memo, and with the memo
+bypassed so every VIN pays for the table and model year lookups.
+"""
+import argparse
+import random
+import time
+from app.utils import vin as vin_module
+from app.utils.vin import decode_vin, YEAR_CODES, _wmi_table, _decode_prefix
+
+VIN_CHARS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+
+
+def synthetic_vins(count: int, rng: random.Random) -> list[str]:
+    wmis = list(_wmi_table()) + ['9ZZ', '8AP', 'LVS']
+    return [
+        rng.choice(wmis)
+        + ''.join(rng.choices(VIN_CHARS, k=5))
+        + rng.choice(VIN_CHARS)  # check digit, not validated here
+        + rng.choice(YEAR_CODES)
+        + ''.join(rng.choices(VIN_CHARS, k=7))
+        for _ in range(count)
+    ]
+
+
+def run(vins: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    decoded = sum(1 for v in vins if (d := decode_vin(v)) is not None and d.make is not None)
+    return time.perf_counter() - start, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vins', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    vins = synthetic_vins(args.vins, random.Random(args.seed))
+    _decode_prefix.cache_clear()
+
+    memo_s, decoded = run(vins)
+    info = _decode_prefix.cache_info()
+    print(f'[memoized] {args.vins} VINs in {memo_s:.2f}s = {args.vins / memo_s:,.0f} VINs/s '
+          f'({decoded} with a known make, {info.currsize} distinct prefixes, {info.hits} cache hits)')
+
+    vin_module._decode_prefix = _decode_prefix.__wrapped__
+    try:
+        raw_s, _ = run(vins)
+    finally:
+        vin_module._decode_prefix = _decode_prefix
+    print(f'[no memo]  {args.vins} VINs in {raw_s:.2f}s = {args.vins / raw_s:,.0f} VINs/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,33 @@ import os
 class DevelopmentConfig:
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
+    CACHE_TYPE = 'SimpleCache'
+    JSON_PROVIDER = 'orjson'
 
 class TestingConfig:
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///testing.db'
     DEBUG = True
     CACHE_TYPE = 'SimpleCache'
+    JSON_PROVIDER = 'orjson'
+
+class BenchmarkConfig:
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URI', 'sqlite:///benchmark.db')
+    CACHE_TYPE = 'NullCache'
+    RATELIMIT_ENABLED = False
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    # benchmarks.json_provider encodes 1,000-row pages
+    MAX_PAGE_SIZE = 1000
 
 class ProductionConfig:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
     CACHE_TYPE = 'SimpleCache'
-    SECRET_KEY = os.environ.get('SECRET_KEY')
\ No newline at end of file
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    SLOW_QUERY_LOG_DIR = os.environ.get('SLOW_QUERY_LOG_DIR')
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER')
+    TRACING_FILE = os.environ.get('TRACING_FILE', 'traces.jsonl')
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.01))
+    TRACING_TRUST_PARENT = os.environ.get('TRACING_TRUST_PARENT', '').lower() in ('1', 'true', 'yes')
+    TRACING_FILE_MAX_BYTES = int(os.environ.get('TRACING_FILE_MAX_BYTES', 100 * 1024 * 1024))
+    JSON_PROVIDER = 'orjson'
\ No newline at end of file
@@ -0,0 +1,24 @@
+# Loaded automatically by `gunicorn flask_app:app` from the project root
+import os
+import shutil
+import tempfile
+
+# Each worker keeps its metrics in a file here so /metrics can sum them (app/utils/metrics.py)
+metrics_dir = os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'autoful-metrics'))
+# Each worker's slow query ring, read back by /admin/slow-queries (app/utils/slow_queries.py)
+slow_query_dir = os.environ.setdefault('SLOW_QUERY_LOG_DIR', os.path.join(tempfile.gettempdir(), 'autoful-slow-queries'))
+
+
+def on_starting(server):
+    # Counts from a previous run of the server would otherwise be added back in,
+    # and every restart would leave another set of worker rings behind
+    for directory in (metrics_dir, slow_query_dir):
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    from app.utils.metrics import mark_process_dead
+    from app.utils.slow_queries import remove_ring
+    mark_process_dead(worker.pid)
+    remove_ring(slow_query_dir, worker.pid)
@@ -93,6 +93,9 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    # Revisions using app/utils/online_migration.py commit part way through,
+    # so each revision gets its own transaction rather than one for the run
+    conf_args.setdefault("transaction_per_migration", True)
 
     connectable = get_engine()
 
@@ -0,0 +1,45 @@
+"""Add delta sync tracking: inventory.updated_at, deleted_records tombstones
+
+Revision ID: 3c1f9a7d2e4b
+Revises: 806b2bed5871
+Create Date: 2026-10-19 09:12:44.381920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migration import add_column, create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f9a7d2e4b'
+down_revision = '806b2bed5871'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deleted_records',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deleted_records', schema=None) as batch_op:
+        batch_op.create_index('ix_deleted_records_table_name_id', ['table_name', 'id'], unique=False)
+
+    add_column('inventory', sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+    create_index('ix_inventory_updated_at', 'inventory', ['updated_at'])
+    create_index('ix_service_tickets_updated_at', 'service_tickets', ['updated_at'])
+
+
+def downgrade():
+    drop_index('ix_service_tickets_updated_at', 'service_tickets')
+    drop_index('ix_inventory_updated_at', 'inventory')
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('deleted_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_deleted_records_table_name_id')
+
+    op.drop_table('deleted_records')
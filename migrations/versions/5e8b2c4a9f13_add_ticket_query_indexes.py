@@ -0,0 +1,35 @@
+"""Add indexes backing the service ticket filter and sort API
+
+Revision ID: 5e8b2c4a9f13
+Revises: 3c1f9a7d2e4b
+Create Date: 2026-10-19 16:20:05.114203
+
+"""
+from app.utils.online_migration import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b2c4a9f13'
+down_revision = '3c1f9a7d2e4b'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_service_tickets_status_service_date', 'service_tickets', ['status', 'service_date']),
+    ('ix_service_tickets_customer_id_service_date', 'service_tickets', ['customer_id', 'service_date']),
+    ('ix_service_tickets_vehicle_id_service_date', 'service_tickets', ['vehicle_id', 'service_date']),
+    ('ix_service_tickets_category_id_service_date', 'service_tickets', ['category_id', 'service_date']),
+    ('ix_service_tickets_vin', 'service_tickets', ['VIN']),
+    ('ix_service_tickets_service_date', 'service_tickets', ['service_date']),
+    ('ix_service_mechanics_mechanic_id_service_ticket_id', 'service_mechanics', ['mechanic_id', 'service_ticket_id']),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index(name, table)
@@ -0,0 +1,33 @@
+"""Add denormalized totals to service_tickets
+
+Revision ID: 7a4d1e9c3b20
+Revises: 5e8b2c4a9f13
+Create Date: 2026-10-19 17:02:41.530117
+
+Existing tickets start at 0; run python -m scripts.rebuild_ticket_totals
+after upgrading to fill them in.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migration import add_column
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4d1e9c3b20'
+down_revision = '5e8b2c4a9f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for name in ('parts_total', 'parts_cost', 'labor_total', 'grand_total'):
+        add_column('service_tickets', sa.Column(name, sa.Float(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('service_tickets', schema=None) as batch_op:
+        batch_op.drop_column('grand_total')
+        batch_op.drop_column('labor_total')
+        batch_op.drop_column('parts_cost')
+        batch_op.drop_column('parts_total')
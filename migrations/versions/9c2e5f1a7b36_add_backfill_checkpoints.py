@@ -0,0 +1,31 @@
+"""Add backfill_checkpoints for the resumable data backfills
+
+Revision ID: 9c2e5f1a7b36
+Revises: 7a4d1e9c3b20
+Create Date: 2026-10-19 18:05:12.408311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e5f1a7b36'
+down_revision = '7a4d1e9c3b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backfill_checkpoints',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rows_changed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
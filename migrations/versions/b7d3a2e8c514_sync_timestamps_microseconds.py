@@ -0,0 +1,41 @@
+"""Store the sync feed timestamps to the microsecond on MySQL
+
+Revision ID: b7d3a2e8c514
+Revises: 9c2e5f1a7b36
+Create Date: 2026-10-19 19:20:41.117032
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3a2e8c514'
+down_revision = '9c2e5f1a7b36'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('service_tickets', 'updated_at'),
+    ('inventory', 'updated_at'),
+    ('deleted_records', 'deleted_at'),
+)
+
+
+def upgrade():
+    # Other databases already keep fractional seconds
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for table, column in COLUMNS:
+        # The default has to carry the same precision as the column
+        op.alter_column(table, column, type_=mysql.DATETIME(fsp=6), existing_type=sa.DateTime(),
+                        existing_nullable=False, server_default=sa.text('CURRENT_TIMESTAMP(6)'))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.DateTime(), existing_type=mysql.DATETIME(fsp=6),
+                        existing_nullable=False, server_default=sa.func.now())
@@ -0,0 +1,53 @@
+"""
+Bulk import customers and their vehicles from a CSV or NDJSON file.
+Run with: python -m scripts.import_customers customers.csv [--format csv] [--batch-size 500]
+
+Progress is checkpointed to <file>.checkpoint after every committed batch;
+re-running the same command resumes from the checkpoint.
+"""
+import argparse
+import json
+import os
+from app import create_app
+from app.blueprints.customers.bulk_import import iter_records, import_customers, DEFAULT_BATCH_SIZE
+
+parser = argparse.ArgumentParser(description='Bulk import customers and vehicles')
+parser.add_argument('path', help='CSV or NDJSON file to import')
+parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+parser.add_argument('--restart', action='store_true', help='Ignore any existing checkpoint')
+args = parser.parse_args()
+
+import_format = args.format or ('csv' if args.path.endswith('.csv') else 'ndjson')
+checkpoint_path = f'{args.path}.checkpoint'
+
+start_row = 1
+if os.path.exists(checkpoint_path) and not args.restart:
+    with open(checkpoint_path) as f:
+        start_row = json.load(f)['next_row']
+    print(f'Resuming from row {start_row}')
+
+
+def save_checkpoint(summary):
+    with open(checkpoint_path, 'w') as f:
+        json.dump({'next_row': summary['next_row']}, f)
+    print(f"Through row {summary['next_row'] - 1}: imported {summary['imported']} customers, "
+          f"{summary['vehicles_imported']} vehicles, {summary['error_count']} errors")
+
+
+# Use ProductionConfig on Render, DevelopmentConfig locally
+config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
+app = create_app(config)
+
+with app.app_context(), open(args.path, 'rb') as f:
+    summary = import_customers(
+        iter_records(f, import_format),
+        start_row=start_row,
+        batch_size=args.batch_size,
+        on_batch=save_checkpoint
+    )
+
+for error in summary['errors']:
+    print(f"Row {error['row']}: {error['errors']}")
+print(f"\nImport complete! {summary['imported']} customers, {summary['vehicles_imported']} vehicles, "
+      f"{summary['error_count']} rows rejected")
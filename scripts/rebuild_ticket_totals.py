@@ -0,0 +1,35 @@
+"""
+Reconcile the denormalized service ticket totals against a full recompute.
+Run with: python -m scripts.rebuild_ticket_totals [--dry-run] [--batch-size 1000]
+
+Fills in missing price/cost snapshots on ticket lines, then recomputes
+parts_total, parts_cost, labor_total and grand_total for every ticket and
+rewrites the ones that drifted. --dry-run only reports.
+"""
+import argparse
+import os
+from app import create_app
+from app.blueprints.service_tickets.totals import rebuild_totals, DEFAULT_REBUILD_BATCH_SIZE
+
+parser = argparse.ArgumentParser(description='Rebuild service ticket totals')
+parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+parser.add_argument('--batch-size', type=int, default=DEFAULT_REBUILD_BATCH_SIZE)
+args = parser.parse_args()
+
+# Use ProductionConfig on Render, DevelopmentConfig locally
+config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
+app = create_app(config)
+
+
+def report(summary):
+    print(f"Checked {summary['checked']} tickets, {summary['fixed']} drifted")
+
+
+with app.app_context():
+    summary = rebuild_totals(batch_size=args.batch_size, dry_run=args.dry_run, on_batch=report)
+
+for drift in summary['drifted']:
+    print(f"Ticket {drift['id']}: stored {drift['stored']} expected {drift['expected']}")
+verb = 'would be' if args.dry_run else 'were'
+print(f"\nDone! {summary['snapshots_filled']} line snapshots and {summary['fixed']} of "
+      f"{summary['checked']} tickets {verb} fixed")
@@ -0,0 +1,38 @@
+"""
+Reconcile the denormalized ServiceTicket.VIN against vehicle_id.
+Run with: python -m scripts.reconcile_ticket_vehicles [--dry-run] [--batch-size 1000]
+
+Linked tickets get their vehicle's VIN; unlinked tickets are linked to the
+vehicle registered under their VIN when it belongs to the same customer.
+Tickets whose VIN belongs to another customer's vehicle are only reported.
+--dry-run only reports.
+"""
+import argparse
+import os
+from app import create_app
+from app.blueprints.vehicles.reconcile import reconcile_ticket_vehicles, DEFAULT_RECONCILE_BATCH_SIZE
+
+parser = argparse.ArgumentParser(description='Reconcile service ticket VINs with their vehicles')
+parser.add_argument('--dry-run', action='store_true', help='Report mismatches without writing')
+parser.add_argument('--batch-size', type=int, default=DEFAULT_RECONCILE_BATCH_SIZE)
+args = parser.parse_args()
+
+# Use ProductionConfig on Render, DevelopmentConfig locally
+config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
+app = create_app(config)
+
+
+def report(summary):
+    print(f"Checked {summary['checked']} tickets: {summary['vin_fixed']} VINs fixed, "
+          f"{summary['linked']} linked, {summary['conflicts']} conflicts")
+
+
+with app.app_context():
+    summary = reconcile_ticket_vehicles(batch_size=args.batch_size, dry_run=args.dry_run, on_batch=report)
+
+for sample in summary['samples']:
+    if sample['kind'] in ('conflict', 'missing_vehicle'):
+        print(f"Ticket {sample['id']}: {sample}")
+verb = 'would be' if args.dry_run else 'were'
+print(f"\nDone! {summary['vin_fixed']} VINs and {summary['linked']} links {verb} fixed; "
+      f"{summary['conflicts']} conflicts and {summary['unmatched']} tickets with no registered vehicle")
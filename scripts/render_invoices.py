@@ -0,0 +1,34 @@
+"""
+Render every invoice/estimate for one service date.
+Run with: python -m scripts.render_invoices --date 2024-10-01 [--format html] [--out invoices/] [--workers 4]
+
+Tickets are rendered in chunks across a pool of worker threads. With --out,
+each rendered document is written to <out>/INV-<ticket id>.<format>.
+"""
+import argparse
+import os
+from datetime import date
+from app import create_app
+from app.blueprints.service_tickets.invoices import render_invoices_for_day, FORMATS, DEFAULT_INVOICE_WORKERS
+
+parser = argparse.ArgumentParser(description="Render a day's service ticket invoices")
+parser.add_argument('--date', type=date.fromisoformat, default=date.today(), help='Service date (YYYY-MM-DD), default today')
+parser.add_argument('--format', choices=FORMATS, default='html')
+parser.add_argument('--out', help='Directory to write rendered invoices to')
+parser.add_argument('--workers', type=int, default=DEFAULT_INVOICE_WORKERS)
+args = parser.parse_args()
+
+# Use ProductionConfig on Render, DevelopmentConfig locally
+config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
+app = create_app(config)
+
+with app.app_context():
+    rendered = render_invoices_for_day(args.date, args.format, workers=args.workers)
+
+if args.out:
+    os.makedirs(args.out, exist_ok=True)
+    for ticket_id, document in rendered.items():
+        with open(os.path.join(args.out, f'INV-{ticket_id:06d}.{args.format}'), 'w') as f:
+            f.write(document)
+
+print(f"\nDone! Rendered {len(rendered)} invoices for {args.date.isoformat()}")
@@ -6,10 +6,6 @@ import os
 from app import create_app
 from app.models import db, ServiceCategory
 
-# Use ProductionConfig on Render, DevelopmentConfig locally
-config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
-app = create_app(config)
-
 categories = [
     {'name': 'Oil Change', 'description': 'Standard oil and filter change', 'default_labor_hours': 0.5, 'default_labor_rate': 75.0},
     {'name': 'Brake Service', 'description': 'Brake pad/rotor replacement and inspection', 'default_labor_hours': 2.0, 'default_labor_rate': 85.0},
@@ -23,16 +19,21 @@ categories = [
     {'name': 'General Maintenance', 'description': 'Inspections and general maintenance', 'default_labor_hours': 1.0, 'default_labor_rate': 75.0},
 ]
 
-with app.app_context():
-    for cat_data in categories:
-        # Check if category already exists
-        existing = ServiceCategory.query.filter_by(name=cat_data['name']).first()
-        if not existing:
-            category = ServiceCategory(**cat_data)
-            db.session.add(category)
-            print(f"Added: {cat_data['name']}")
-        else:
-            print(f"Skipped (exists): {cat_data['name']}")
+if __name__ == '__main__':
+    # Use ProductionConfig on Render, DevelopmentConfig locally
+    config = 'ProductionConfig' if os.environ.get('RENDER') else 'DevelopmentConfig'
+    app = create_app(config)
+
+    with app.app_context():
+        for cat_data in categories:
+            # Check if category already exists
+            existing = ServiceCategory.query.filter_by(name=cat_data['name']).first()
+            if not existing:
+                category = ServiceCategory(**cat_data)
+                db.session.add(category)
+                print(f"Added: {cat_data['name']}")
+            else:
+                print(f"Skipped (exists): {cat_data['name']}")
 
-    db.session.commit()
-    print("\nSeeding complete!")
\ No newline at end of file
+        db.session.commit()
+        print("\nSeeding complete!")
\ No newline at end of file
@@ -0,0 +1,96 @@
+from app import create_app
+from app.models import Customer, Vehicle, ServiceCategory, ServiceTicket, Inventory, ServiceInventory, BackfillCheckpoint, db
+from app.utils.backfill import run_backfill
+from app.utils.legacy_backfill import LEGACY_STEPS
+from datetime import date, datetime
+from sqlalchemy import insert, select, func
+import unittest
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Customer(name='legacy', email='legacy@email.com', phone='1234567890', password='x'))
+            db.session.add(Inventory(part_name='Oil Filter', price=20.0, cost=0.0, quantity_in_stock=10))
+            db.session.commit()
+            # Legacy shaped rows: no vehicle, category, completion date, hours, mileage or notes
+            db.session.execute(insert(ServiceTicket), [
+                {'VIN': vin, 'service_date': date(2024, 1, i + 1), 'service_desc': f'Legacy {i}', 'customer_id': 1,
+                 'status': 'pending', 'labor_hours': 0.0, 'labor_rate': 75.0}
+                for i, vin in enumerate(['1HGCM82633A123456', '1hgcm82633a123456', 'JH4KA7561PC008269',
+                                         '1HGCM82633A123456', '9ZZAA11119A000000'])
+            ])
+            db.session.execute(insert(ServiceInventory), [{'service_ticket_id': 1, 'inventory_id': 1, 'quantity_used': 2}])
+            db.session.commit()
+
+    def test_legacy_backfill(self):
+        with self.app.app_context():
+            results = run_backfill(LEGACY_STEPS, chunk_size=2)
+            self.assertEqual([r['chunks'] for r in results], [1, 0, 3, 1, 3, 1, 1])
+
+            vehicles = {v.vin: v for v in db.session.execute(select(Vehicle)).scalars()}
+            self.assertEqual(set(vehicles), {'1HGCM82633A123456', 'JH4KA7561PC008269', '9ZZAA11119A000000'})
+            self.assertEqual((vehicles['JH4KA7561PC008269'].make, vehicles['JH4KA7561PC008269'].year), ('Acura', 1993))
+            self.assertEqual(vehicles['9ZZAA11119A000000'].make, 'Unknown')
+            self.assertEqual(vehicles['1HGCM82633A123456'].created_at, datetime(2024, 1, 1))
+
+            ticket = db.session.get(ServiceTicket, 2)
+            self.assertEqual(ticket.vehicle_id, vehicles['1HGCM82633A123456'].id)
+            self.assertEqual(ticket.status, 'Completed')
+            self.assertEqual(ticket.category.name, 'General Maintenance')
+            self.assertEqual(ticket.completed_at, datetime(2024, 1, 2))
+            self.assertEqual((ticket.labor_hours, ticket.labor_total, ticket.grand_total), (1.0, 75.0, 75.0))
+            self.assertEqual((ticket.mileage, ticket.notes), (50000, 'Migrated from legacy system'))
+
+            part = db.session.get(Inventory, 1)
+            self.assertEqual((part.cost, part.category, part.part_number), (12.0, 'Fluids', 'PART-0001'))
+            line = db.session.get(ServiceInventory, 1)
+            self.assertEqual((line.price_at_service, line.cost_at_service), (20.0, 12.0))
+
+            # Finished steps are skipped, and starting over finds nothing left to do
+            self.assertTrue(all(r['skipped'] for r in run_backfill(LEGACY_STEPS)))
+            self.assertEqual(sum(r['rows'] for r in run_backfill(LEGACY_STEPS, restart=True)), 0)
+
+    def test_padded_vins_are_linked(self):
+        with self.app.app_context():
+            db.session.execute(insert(ServiceTicket), [
+                {'VIN': '  2t1br32e54c123456 ', 'service_date': date(2024, 2, 1), 'service_desc': 'Padded',
+                 'customer_id': 1, 'status': 'pending', 'labor_hours': 0.0, 'labor_rate': 75.0}
+            ])
+            db.session.commit()
+            run_backfill(LEGACY_STEPS, only=['vehicles.from_ticket_vins'])
+
+            vehicle = db.session.execute(select(Vehicle).where(Vehicle.vin == '2T1BR32E54C123456')).scalar_one()
+            self.assertEqual(db.session.get(ServiceTicket, 6).vehicle_id, vehicle.id)
+
+    def test_backfill_resumes_from_checkpoint(self):
+        with self.app.app_context():
+            def crash_after_first_chunk(name, result, max_id):
+                if name == 'service_tickets.fields':
+                    raise KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                run_backfill(LEGACY_STEPS, chunk_size=2, on_progress=crash_after_first_chunk)
+            checkpoint = db.session.get(BackfillCheckpoint, 'service_tickets.fields')
+            self.assertEqual((checkpoint.last_id, checkpoint.completed_at), (2, None))
+            self.assertEqual(db.session.get(ServiceTicket, 3).notes, None)
+
+            results = {r['name']: r for r in run_backfill(LEGACY_STEPS, chunk_size=2)}
+            self.assertTrue(results['vehicles.from_ticket_vins']['skipped'])
+            self.assertEqual(results['service_tickets.fields']['chunks'], 2)
+            self.assertEqual(db.session.get(ServiceTicket, 5).notes, 'Migrated from legacy system')
+
+    def test_backfill_dry_run(self):
+        with self.app.app_context():
+            results = {r['name']: r for r in run_backfill(LEGACY_STEPS, chunk_size=2, dry_run=True)}
+            # Chunks can't see vehicles a rolled back chunk created, so the 1HGC... VIN is counted twice
+            self.assertEqual(results['vehicles.from_ticket_vins']['rows'], 4 + 5)
+            self.assertEqual(db.session.execute(select(func.count()).select_from(Vehicle)).scalar(), 0)
+            self.assertEqual(db.session.execute(select(func.count()).select_from(BackfillCheckpoint)).scalar(), 0)
+            self.assertEqual(db.session.get(ServiceTicket, 1).status, 'pending')
+            self.assertIsNone(db.session.execute(select(ServiceCategory)).first())
+
+            with self.assertRaises(ValueError):
+                run_backfill(LEGACY_STEPS, only=['no.such.step'])
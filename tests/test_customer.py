@@ -1,8 +1,10 @@
 from app import create_app
-from app.models import Customer, ServiceTicket, db
+from app.models import Customer, Mechanic, ServiceTicket, db
 from datetime import date
-from app.utils.util import encode_customer_token
-from bcrypt import hashpw, gensalt
+from app.utils.util import encode_customer_token, encode_mechanic_token
+from bcrypt import hashpw, gensalt, checkpw
+from sqlalchemy import select
+import json
 import unittest
 
 class TestCustomer(unittest.TestCase):
@@ -152,4 +154,62 @@ class TestCustomer(unittest.TestCase):
         # Verify order
         self.assertEqual(response.json[0]['name'], 'top_customer')
         self.assertEqual(response.json[1]['name'], 'second_customer')
-        self.assertEqual(response.json[2]['name'], 'third_customer')
\ No newline at end of file
+        self.assertEqual(response.json[2]['name'], 'third_customer')
+
+    def test_export_customers_csv(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name='export_mechanic', email='export_mechanic@email.com', phone='1234567890', salary=50000.0, password='x'))
+            db.session.commit()
+        headers = {'Authorization': f'Bearer {encode_mechanic_token(1)}'}
+        response = self.client.get('/customers/export?format=csv', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('test@email.com', str(response.data))
+        self.assertNotIn('password', str(response.data))
+
+    def test_export_customers_requires_mechanic(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/customers/export', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_import_customers_csv(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name='import_mechanic', email='import_mechanic@email.com', phone='1234567890', salary=50000.0, password='x'))
+            db.session.commit()
+        headers = {'Authorization': f'Bearer {encode_mechanic_token(1)}'}
+        body = (
+            'name,email,phone,password,vin,make,model,year\n'
+            'Fleet One,fleet1@email.com,5550001,secret,1HGCM82633A004352,Honda,Accord,2003\n'
+            'Duplicate,test@email.com,5550002,secret,,,,\n'
+            'Bad Email,not-an-email,5550003,secret,,,,\n'
+            'Fleet Two,fleet2@email.com,5550004,secret,1HGCM82633A004352,Honda,Accord,2003\n'
+        )
+        response = self.client.post('/customers/import?format=csv', data=body, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['imported'], 1)
+        self.assertEqual(response.json['vehicles_imported'], 1)
+        self.assertEqual(response.json['next_row'], 5)
+        self.assertEqual({e['row']: list(e['errors']) for e in response.json['errors']},
+                         {2: ['email'], 3: ['email'], 4: ['vehicles']})
+
+        with self.app.app_context():
+            imported = db.session.execute(select(Customer).where(Customer.email == 'fleet1@email.com')).scalar_one()
+            self.assertTrue(checkpw(b'secret', imported.password.encode('utf-8')))
+            self.assertEqual(imported.vehicles[0].vin, '1HGCM82633A004352')
+
+    def test_bulk_import_customers_ndjson_resume(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name='import_mechanic', email='import_mechanic@email.com', phone='1234567890', salary=50000.0, password='x'))
+            db.session.commit()
+        headers = {'Authorization': f'Bearer {encode_mechanic_token(1)}'}
+        body = '\n'.join(json.dumps({'name': f'N{i}', 'email': f'n{i}@email.com', 'phone': '555', 'password': 'pw'}) for i in range(1, 4))
+        response = self.client.post('/customers/import?format=ndjson&start_row=2', data=body, headers=headers)
+        self.assertEqual(response.json['processed'], 2)
+        self.assertEqual(response.json['imported'], 2)
+        self.assertEqual(response.json['next_row'], 4)
+
+    def test_get_customers_by_ids(self):
+        response = self.client.get('/customers/?ids=3,1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['email'] for c in response.json['results']], ['test@email.com'])
+        self.assertEqual(response.json['missing'], [3])
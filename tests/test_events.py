@@ -0,0 +1,86 @@
+from app import create_app
+from app.models import Mechanic, ServiceTicket, db
+from datetime import date
+from app.utils.util import encode_mechanic_token
+from app.utils.events import EventBroker, event_broker
+from bcrypt import hashpw, gensalt
+import json
+import unittest
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        hashed_pw = hashpw('mechanicpass'.encode('utf-8'), gensalt()).decode('utf-8')
+        self.service = ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 10, 1), service_desc='Initial service', customer_id=1)
+        self.mechanic = Mechanic(name='events_mechanic', email='events_mechanic@email.com', phone='1234567890', salary=50000.0, password=hashed_pw)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(self.mechanic)
+            db.session.add(self.service)
+            db.session.commit()
+            self.token = encode_mechanic_token(1)
+            self.client = self.app.test_client()
+
+    def ticket(self, **overrides):
+        ticket = {'id': 1, 'status': 'Pending', 'customer_id': 1, 'vehicle_id': None, 'mechanic_ids': [], 'updated_at': None}
+        ticket.update(overrides)
+        return ticket
+
+    def test_broker_filters_by_customer_mechanic_and_status(self):
+        broker = EventBroker()
+        by_customer = broker.subscribe(customer_id=2)
+        by_mechanic = broker.subscribe(mechanic_id=7)
+        by_status = broker.subscribe(status='Completed')
+
+        broker.publish('ticket.assigned', self.ticket(customer_id=2, mechanic_ids=[7]))
+
+        self.assertEqual(by_customer.get(timeout=0)['type'], 'ticket.assigned')
+        self.assertEqual(by_mechanic.get(timeout=0)['ticket']['mechanic_ids'], [7])
+        self.assertIsNone(by_status.get(timeout=0))
+
+    def test_broker_buffer_drops_oldest_events(self):
+        broker = EventBroker()
+        subscription = broker.subscribe(buffer_size=2)
+        for ticket_id in range(1, 4):
+            broker.publish('ticket.updated', self.ticket(id=ticket_id))
+
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual(subscription.get(timeout=0)['ticket']['id'], 2)
+        self.assertEqual(subscription.get(timeout=0)['ticket']['id'], 3)
+
+    def test_routes_publish_ticket_events(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        subscription = event_broker.subscribe(mechanic_id=1)
+        try:
+            self.client.put('/service_tickets/1/assign-mechanic/1', headers=headers)
+            event = subscription.get(timeout=0)
+            self.assertEqual(event['type'], 'ticket.assigned')
+            self.assertEqual(event['ticket']['id'], 1)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    def test_stream_events(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/events/?status=Pending', headers=headers, buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+
+        stream = response.response
+        self.assertTrue(next(stream).startswith(b'retry:'))
+
+        event_broker.publish('ticket.created', self.ticket())
+        chunk = next(stream).decode('utf-8')
+        self.assertIn('event: ticket.created', chunk)
+        data = json.loads(chunk.split('data: ')[1])
+        self.assertEqual(data['ticket']['status'], 'Pending')
+        response.close()
+
+    def test_stream_events_invalid_filter(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/events/?customer_id=abc', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_events_unauthorized(self):
+        response = self.client.get('/events/')
+        self.assertEqual(response.status_code, 401)
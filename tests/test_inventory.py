@@ -3,6 +3,9 @@ from app.models import Mechanic, Inventory, db
 from datetime import date
 from app.utils.util import encode_mechanic_token
 from bcrypt import hashpw, gensalt
+import csv
+import io
+import json
 import unittest
 
 class TestInventory(unittest.TestCase):
@@ -141,4 +144,52 @@ class TestInventory(unittest.TestCase):
 
     def test_low_stock_inventory_unauthorized(self):
         response = self.client.get('/inventory/low-stock?threshold=5')
-        self.assertEqual(response.status_code, 401)
\ No newline at end of file
+        self.assertEqual(response.status_code, 401)
+
+    def test_inventory_changes_since_cursor(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/inventory/changes')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Brake Pad', str(response.data))
+        cursor = response.json['cursor']
+
+        self.client.put('/inventory/1', json={'quantity_in_stock': 42}, headers=headers)
+        response = self.client.get(f'/inventory/changes?since={cursor}')
+        self.assertEqual(response.json['changed'][0]['quantity_in_stock'], 42)
+        cursor = response.json['cursor']
+
+        self.client.delete('/inventory/1', headers=headers)
+        response = self.client.get(f'/inventory/changes?since={cursor}')
+        self.assertEqual(response.json['changed'], [])
+        self.assertEqual(response.json['deleted'], [1])
+
+    def test_export_inventory_ndjson(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/inventory/export', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(rows[0]['part_name'], 'Brake Pad')
+
+    def test_export_inventory_csv(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/inventory/export?format=csv', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.data.decode('utf-8'))))
+        self.assertEqual(rows[0]['part_name'], 'Brake Pad')
+        self.assertEqual(rows[0]['quantity_in_stock'], '100')
+
+    def test_export_inventory_invalid_format(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/inventory/export?format=xml', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_inventory_unauthorized(self):
+        response = self.client.get('/inventory/export')
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_inventory_by_ids(self):
+        response = self.client.get('/inventory/?ids=5,1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['part_name'] for p in response.json['results']], ['Brake Pad'])
+        self.assertEqual(response.json['missing'], [5])
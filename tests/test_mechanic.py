@@ -3,6 +3,8 @@ from app.models import Mechanic, ServiceTicket, db
 from datetime import date
 from app.utils.util import encode_mechanic_token
 from bcrypt import hashpw, gensalt
+import base64
+import json
 import unittest
 
 class TestMechanic(unittest.TestCase):
@@ -156,4 +158,55 @@ class TestMechanic(unittest.TestCase):
         # Verify order: Top Mechanic 1 should be first (most tickets)
         self.assertEqual(response.json[0]['name'], 'Top Mechanic 1')
         self.assertEqual(response.json[1]['name'], 'Top Mechanic 2')
-        self.assertEqual(response.json[2]['name'], 'Top Mechanic 3')
\ No newline at end of file
+        self.assertEqual(response.json[2]['name'], 'Top Mechanic 3')
+
+    def test_get_mechanics_by_ids(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/mechanics/?ids=1,2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.json['results']], [1])
+        self.assertEqual(response.json['missing'], [2])
+        self.assertEqual(self.client.get('/mechanics/?ids=0', headers=headers).status_code, 400)
+
+    def _assign_tickets(self):
+        with self.app.app_context():
+            mechanic = db.session.get(Mechanic, 1)
+            for i, status in enumerate(('Pending', 'Completed', 'Pending')):
+                ticket = ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 10, i + 1), service_desc=f'Job {i}', customer_id=1, status=status)
+                ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+            db.session.add(ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 10, 9), service_desc='Someone else', customer_id=1))
+            db.session.commit()
+
+    def test_get_my_tickets(self):
+        self._assign_tickets()
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/mechanics/my-tickets?per_page=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Job 0', 'Job 1'])
+        response = self.client.get(f"/mechanics/my-tickets?per_page=2&after={response.json['next']}", headers=headers)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Job 2'])
+        self.assertIsNone(response.json['next'])
+
+        # Cursor values of the wrong type are rejected before reaching the driver
+        for values in ([{'a': 1}], ['1'], [True], [1, 2], {'id': 1}):
+            after = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get(f'/mechanics/my-tickets?after={after}', headers=headers)
+            self.assertEqual(response.status_code, 400, values)
+            self.assertIn('Invalid cursor', response.json['error'])
+        self.assertEqual(self.client.get('/mechanics/my-tickets?after=!!', headers=headers).status_code, 400)
+
+        response = self.client.get('/mechanics/my-tickets?status=Pending', headers=headers)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Job 0', 'Job 2'])
+        self.assertEqual(self.client.get('/mechanics/my-tickets?status=Done', headers=headers).status_code, 400)
+        self.assertEqual(self.client.get('/mechanics/my-tickets').status_code, 401)
+
+    def test_get_mechanic_omits_ticket_history(self):
+        self._assign_tickets()
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/mechanics/1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('service_tickets', response.json)
+        response = self.client.get('/mechanics/1?include=service_tickets', headers=headers)
+        self.assertEqual(len(response.json['service_tickets']), 3)
+        self.assertEqual(self.client.get('/mechanics/1?include=salary', headers=headers).status_code, 400)
@@ -0,0 +1,126 @@
+from app import create_app
+from app.models import db
+from app.utils import metrics
+from app.blueprints.customers.bulk_import import hash_passwords
+import multiprocessing
+import os
+import re
+import tempfile
+import unittest
+
+JOBS = metrics.Counter('test_jobs', 'Jobs run by the multiprocess test.', ['queue'])
+IN_FLIGHT = metrics.Gauge('test_in_flight', 'Jobs in flight in the multiprocess test.')
+JOB_SECONDS = metrics.Histogram('test_job_seconds', 'Job time in the multiprocess test.', buckets=(0.1, 1.0))
+
+
+def sample(text, name, **labels):
+    """A sample's value from exposition text, 0 if it isn't there."""
+    for line in text.splitlines():
+        match = re.fullmatch(r'([^{ ]+)(?:\{(.*)\})? (\S+)', line)
+        if match and match.group(1) == name:
+            found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ''))
+            if all(found.get(k) == v for k, v in labels.items()):
+                return float(match.group(3))
+    return 0.0
+
+
+def run_jobs():
+    JOBS.labels('email').inc(2)
+    IN_FLIGHT.inc()
+    JOB_SECONDS.observe(0.5)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+        self.client = self.app.test_client()
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        return response.get_data(as_text=True)
+
+    def test_requests_are_counted_and_timed(self):
+        route = {'route': 'inventory_bp.get_all_inventory', 'method': 'GET'}
+        before = self.scrape()
+        self.client.get('/inventory/')
+        self.client.get('/inventory/')
+        self.client.get('/no-such-route')
+        after = self.scrape()
+
+        self.assertEqual(sample(after, 'http_requests_total', status='200', **route)
+                         - sample(before, 'http_requests_total', status='200', **route), 2)
+        self.assertEqual(sample(after, 'http_requests_total', route='unmatched', status='404')
+                         - sample(before, 'http_requests_total', route='unmatched', status='404'), 1)
+        count = sample(after, 'http_request_duration_seconds_count', **route)
+        self.assertEqual(count - sample(before, 'http_request_duration_seconds_count', **route), 2)
+        # Buckets are cumulative and end at the total count
+        self.assertEqual(sample(after, 'http_request_duration_seconds_bucket', le='+Inf', **route), count)
+        self.assertLessEqual(sample(after, 'http_request_duration_seconds_bucket', le='0.005', **route),
+                             sample(after, 'http_request_duration_seconds_bucket', le='0.1', **route))
+        self.assertGreater(sample(after, 'http_request_queries_total', route='inventory_bp.get_all_inventory'), 0)
+        self.assertGreater(sample(after, 'db_pool_checkout_seconds_count'), 0)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', after)
+
+    def test_cache_lookups_and_rate_limit_rejections(self):
+        before = self.scrape()
+        self.client.get('/customers/')
+        self.client.get('/customers/')
+        client = self.app.test_client()
+        client.environ_base['REMOTE_ADDR'] = '10.0.0.48'
+        statuses = [client.post('/customers/login', json={'email': 'x@email.com', 'password': 'x'}).status_code for _ in range(6)]
+        after = self.scrape()
+
+        self.assertEqual(statuses[-1], 429)
+        self.assertGreaterEqual(sample(after, 'cache_lookups_total', result='miss') - sample(before, 'cache_lookups_total', result='miss'), 1)
+        self.assertGreaterEqual(sample(after, 'cache_lookups_total', result='hit') - sample(before, 'cache_lookups_total', result='hit'), 1)
+        route = 'customers_bp.login_customer'
+        self.assertEqual(sample(after, 'rate_limit_rejections_total', route=route) - sample(before, 'rate_limit_rejections_total', route=route), 1)
+        # Rejected requests are still timed
+        self.assertEqual(sample(after, 'http_request_duration_seconds_count', route=route, method='POST')
+                         - sample(before, 'http_request_duration_seconds_count', route=route, method='POST'), 6)
+
+    def test_bcrypt_queue_drains(self):
+        hash_passwords(['one', 'two'])
+        self.assertEqual(sample(self.scrape(), 'bcrypt_pool_queue_depth'), 0)
+
+    def test_metrics_token(self):
+        self.app.config['METRICS_TOKEN'] = 'scrape-me'
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_label_values_are_escaped(self):
+        JOBS.labels('say "hi"\\now').inc()
+        self.assertIn(r'test_jobs_total{queue="say \"hi\"\\now"} 1', metrics.generate_latest())
+
+    def test_workers_are_summed_across_processes(self):
+        directory = tempfile.TemporaryDirectory()
+        os.environ[metrics.MULTIPROC_DIR_ENV] = directory.name
+        metrics._reset_stores()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.environ.pop, metrics.MULTIPROC_DIR_ENV)
+        self.addCleanup(metrics._reset_stores)
+
+        run_jobs()
+        worker = multiprocessing.get_context('fork').Process(target=run_jobs)
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+
+        text = metrics.generate_latest()
+        self.assertEqual(sample(text, 'test_jobs_total', queue='email'), 4)
+        self.assertEqual(sample(text, 'test_in_flight'), 2)
+        self.assertEqual(sample(text, 'test_job_seconds_bucket', le='0.1'), 0)
+        self.assertEqual(sample(text, 'test_job_seconds_bucket', le='1.0'), 2)
+        self.assertEqual(sample(text, 'test_job_seconds_sum'), 1.0)
+
+        # A dead worker's counts stay, its gauges go
+        metrics.mark_process_dead(worker.pid)
+        text = metrics.generate_latest()
+        self.assertEqual(sample(text, 'test_jobs_total', queue='email'), 4)
+        self.assertEqual(sample(text, 'test_in_flight'), 1)
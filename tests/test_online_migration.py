@@ -0,0 +1,78 @@
+from app import create_app
+from app.models import Customer, ServiceTicket, db
+from app.utils import online_migration
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from datetime import date
+import sqlalchemy as sa
+import unittest
+
+class TestOnlineMigration(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Customer(name='online', email='online@email.com', phone='1234567890', password='x'))
+            db.session.commit()
+            db.session.execute(sa.insert(ServiceTicket), [
+                {'VIN': '1HGCM82633A123456', 'service_date': date(2024, 1, i), 'service_desc': f'Visit {i}',
+                 'customer_id': 1, 'mileage': i * 1000 if i % 2 else None}
+                for i in range(1, 6)
+            ])
+            db.session.commit()
+            db.session.remove()
+
+    def migrate(self, upgrade):
+        with db.engine.connect() as conn:
+            context = MigrationContext.configure(conn, opts={'transaction_per_migration': True})
+            with Operations.context(context), context.begin_transaction(_per_migration=True):
+                return upgrade()
+
+    def column(self, table, name):
+        return next(c for c in sa.inspect(db.engine).get_columns(table) if c['name'] == name)
+
+    def test_add_column_with_default(self):
+        with self.app.app_context():
+            rows = self.migrate(lambda: online_migration.add_column(
+                'service_tickets', sa.Column('priority', sa.Integer(), nullable=False, server_default='0')
+            ))
+            # SQLite adds a constant default without touching rows, so nothing to backfill
+            self.assertEqual(rows, 0)
+            self.assertFalse(self.column('service_tickets', 'priority')['nullable'])
+            values = db.session.execute(sa.text('SELECT DISTINCT priority FROM service_tickets')).scalars().all()
+            self.assertEqual(values, [0])
+
+    def test_add_column_backfills_in_chunks(self):
+        with self.app.app_context():
+            rows = self.migrate(lambda: online_migration.add_column(
+                'service_tickets', sa.Column('odometer', sa.Integer(), nullable=False),
+                backfill=sa.func.coalesce(sa.column('mileage'), 0), chunk_size=2, pause=0
+            ))
+            self.assertEqual(rows, 5)
+            values = db.session.execute(sa.text('SELECT odometer FROM service_tickets ORDER BY id')).scalars().all()
+            self.assertEqual(values, [1000, 0, 3000, 0, 5000])
+            # NOT NULL would need a table copy on SQLite
+            self.assertTrue(self.column('service_tickets', 'odometer')['nullable'])
+
+            db.session.execute(sa.text('UPDATE service_tickets SET odometer = NULL WHERE id = 4'))
+            db.session.commit()
+            db.session.remove()
+            # Re-running only touches rows still missing a value
+            self.assertEqual(self.migrate(lambda: online_migration.backfill('service_tickets', 'odometer', 7, chunk_size=2, pause=0)), 1)
+
+    def test_create_index_and_foreign_key(self):
+        with self.app.app_context():
+            def upgrade():
+                online_migration.add_column('service_tickets', sa.Column('reviewer_id', sa.Integer(), nullable=True))
+                online_migration.add_foreign_key('fk_service_tickets_reviewer', 'service_tickets', 'mechanics', ['reviewer_id'], ['id'])
+                online_migration.create_index('ix_service_tickets_reviewer_id', 'service_tickets', ['reviewer_id'])
+                # Safe to repeat
+                online_migration.create_index('ix_service_tickets_reviewer_id', 'service_tickets', ['reviewer_id'])
+            self.migrate(upgrade)
+            indexes = {ix['name'] for ix in sa.inspect(db.engine).get_indexes('service_tickets')}
+            self.assertIn('ix_service_tickets_reviewer_id', indexes)
+
+            self.migrate(lambda: online_migration.drop_index('ix_service_tickets_reviewer_id', 'service_tickets'))
+            indexes = {ix['name'] for ix in sa.inspect(db.engine).get_indexes('service_tickets')}
+            self.assertNotIn('ix_service_tickets_reviewer_id', indexes)
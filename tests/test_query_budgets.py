@@ -0,0 +1,151 @@
+from app import create_app
+from app.extensions import cache
+from app.models import Customer, Mechanic, Vehicle, ServiceCategory, ServiceTicket, Inventory, ServiceInventory, db
+from app.utils.query_counter import query_budget, count_queries, QueryBudgetExceeded
+from app.utils.util import encode_customer_token, encode_mechanic_token
+from bcrypt import hashpw, gensalt
+from datetime import date
+import json
+import unittest
+
+VIN = '1HGCM82633A000001'
+PASSWORD = hashpw(b'x', gensalt(4)).decode('utf-8')
+
+# Most statements each route may run against the fixture below: 3 customers
+# with 3 tickets each, every ticket with 2 mechanics and 2 parts. A lazy load
+# per row costs at least 9 statements here, so an N+1 blows the budget. A new
+# route fails test_every_route_has_a_budget until it is listed.
+QUERY_BUDGETS = [
+    # (endpoint, method, url, auth, body, budget)
+    ('customers_bp.login_customer', 'POST', '/customers/login', None, {'email': 'customer1@email.com', 'password': 'x'}, 1),
+    ('customers_bp.create_customer', 'POST', '/customers/', None, {'name': 'New', 'email': 'new@email.com', 'phone': '1', 'password': 'x'}, 4),
+    ('customers_bp.bulk_import_customers', 'POST', '/customers/import?format=ndjson', 'mechanic', None, 4),
+    ('customers_bp.get_customers', 'GET', '/customers/', None, None, 5),
+    ('customers_bp.export_customers', 'GET', '/customers/export', 'mechanic', None, 2),
+    ('customers_bp.get_customer', 'GET', '/customers/1', None, None, 5),
+    ('customers_bp.get_my_tickets', 'GET', '/customers/my-tickets', 'customer', None, 6),
+    ('customers_bp.update_customer', 'PUT', '/customers/1', 'customer', {'phone': '5551112222'}, 7),
+    ('customers_bp.delete_customer', 'DELETE', '/customers/4', 'customer4', None, 6),
+    ('customers_bp.get_top_customers', 'GET', '/customers/top', None, None, 5),
+    ('inventory_bp.create_inventory', 'POST', '/inventory/', 'mechanic', {'part_name': 'Wiper', 'price': 9.5, 'quantity_in_stock': 3}, 3),
+    ('inventory_bp.get_all_inventory', 'GET', '/inventory/', None, None, 1),
+    ('inventory_bp.export_inventory', 'GET', '/inventory/export', 'mechanic', None, 2),
+    ('inventory_bp.get_inventory_changes', 'GET', '/inventory/changes', None, None, 3),
+    ('inventory_bp.get_inventory', 'GET', '/inventory/1', None, None, 1),
+    ('inventory_bp.update_inventory', 'PUT', '/inventory/1', 'mechanic', {'quantity_in_stock': 50}, 4),
+    ('inventory_bp.delete_inventory', 'DELETE', '/inventory/4', 'mechanic', None, 5),
+    ('inventory_bp.search_inventory', 'GET', '/inventory/search?part_name=Filter', 'mechanic', None, 2),
+    ('inventory_bp.get_low_stock', 'GET', '/inventory/low-stock?threshold=10', 'mechanic', None, 2),
+    ('mechanics_bp.login_mechanic', 'POST', '/mechanics/login', None, {'email': 'mechanic1@email.com', 'password': 'x'}, 1),
+    ('mechanics_bp.create_mechanic', 'POST', '/mechanics/', None, {'name': 'New', 'email': 'newmech@email.com', 'phone': '1', 'salary': 1.0, 'password': 'x'}, 3),
+    ('mechanics_bp.get_all_mechanics', 'GET', '/mechanics/', 'mechanic', None, 2),
+    ('mechanics_bp.get_mechanic', 'GET', '/mechanics/1?include=service_tickets', 'mechanic', None, 6),
+    ('mechanics_bp.get_my_tickets', 'GET', '/mechanics/my-tickets', 'mechanic', None, 6),
+    ('mechanics_bp.update_mechanic', 'PUT', '/mechanics/1', 'mechanic', {'phone': '5551112222'}, 3),
+    ('mechanics_bp.delete_mechanic', 'DELETE', '/mechanics/3', 'mechanic3', None, 3),
+    ('mechanics_bp.get_top_mechanics', 'GET', '/mechanics/top', None, None, 1),
+    ('service_tickets_bp.create_service_ticket', 'POST', '/service_tickets/', 'mechanic',
+     {'VIN': VIN, 'service_date': '2024-06-01', 'service_desc': 'New', 'customer_id': 1}, 6),
+    ('service_tickets_bp.create_service_tickets_batch', 'POST', '/service_tickets/batch', 'mechanic',
+     [{'VIN': VIN, 'service_date': '2024-06-01', 'service_desc': f'Fleet {i}', 'customer_id': 1} for i in range(5)], 7),
+    ('service_tickets_bp.get_all_service_tickets', 'GET', '/service_tickets/', None, None, 5),
+    ('service_tickets_bp.export_service_tickets', 'GET', '/service_tickets/export', 'mechanic', None, 2),
+    ('service_tickets_bp.get_service_ticket_changes', 'GET', '/service_tickets/changes', None, None, 7),
+    ('service_tickets_bp.get_service_ticket', 'GET', '/service_tickets/1', None, None, 5),
+    ('service_tickets_bp.get_service_ticket_invoice', 'GET', '/service_tickets/1/invoice', 'mechanic', None, 4),
+    ('service_tickets_bp.update_service_ticket_status', 'PUT', '/service_tickets/1/status', 'mechanic', {'status': 'In Progress'}, 9),
+    ('service_tickets_bp.get_work_queue', 'GET', '/service_tickets/queue/Pending', 'mechanic', None, 6),
+    ('service_tickets_bp.assign_mechanic', 'PUT', '/service_tickets/10/assign-mechanic/1', 'mechanic', None, 9),
+    ('service_tickets_bp.remove_mechanic', 'PUT', '/service_tickets/1/remove-mechanic/1', 'mechanic', None, 11),
+    ('service_tickets_bp.edit_service_ticket_mechanics', 'PUT', '/service_tickets/1/edit-mechanics', 'mechanic', {'add_ids': [], 'remove_ids': [2]}, 12),
+    ('service_tickets_bp.add_inventory_to_ticket', 'POST', '/service_tickets/1/add-inventory', 'mechanic', {'inventory_id': 3, 'quantity_used': 1}, 10),
+    ('service_tickets_bp.remove_inventory_from_ticket', 'PUT', '/service_tickets/1/remove-inventory/1', 'mechanic', None, 10),
+    ('service_tickets_bp.delete_service_ticket', 'DELETE', '/service_tickets/10', 'mechanic', None, 6),
+    ('vehicles_bp.create_vehicle', 'POST', '/vehicles/', 'mechanic', {'vin': '5YJSA1E26HF000001', 'model': 'Model S', 'customer_id': 1}, 5),
+    ('vehicles_bp.get_vehicles', 'GET', '/vehicles/', None, None, 1),
+    ('vehicles_bp.get_vehicle', 'GET', f'/vehicles/{VIN}', None, None, 1),
+    ('vehicles_bp.get_vehicle_history', 'GET', f'/vehicles/{VIN}/history', None, None, 6),
+    ('vehicles_bp.update_vehicle', 'PUT', f'/vehicles/{VIN}', 'mechanic', {'color': 'Red'}, 5),
+    ('vehicles_bp.delete_vehicle', 'DELETE', '/vehicles/1HGCM82633A000004', 'mechanic', None, 5),
+    ('metrics', 'GET', '/metrics', None, None, 0),
+    ('admin_bp.get_slow_queries', 'GET', '/admin/slow-queries', 'mechanic', None, 1),
+]
+UNBUDGETED = {'static', 'swagger_ui.show', 'swagger_ui.static', 'events_bp.stream_events'}
+
+class TestQueryBudgets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            mechanics = [Mechanic(name=f'Mechanic {i}', email=f'mechanic{i}@email.com', phone='1', salary=1.0, password=PASSWORD) for i in (1, 2, 3)]
+            parts = [Inventory(part_name=f'Filter {i}', price=10.0 * i, quantity_in_stock=5) for i in (1, 2, 3, 4)]
+            category = ServiceCategory(name='General Maintenance')
+            db.session.add_all(mechanics + parts + [category])
+            for c in (1, 2, 3, 4):
+                customer = Customer(name=f'Customer {c}', email=f'customer{c}@email.com', phone='1', password=PASSWORD)
+                vehicle = Vehicle(vin=f'1HGCM82633A00000{c}', make='Honda', model='Accord', year=2003, customer=customer)
+                db.session.add_all([customer, vehicle])
+                if c == 4:
+                    continue  # Customer 4, its vehicle, mechanic 3 and part 4 have no tickets, so they can be deleted
+                for t in range(3):
+                    ticket = ServiceTicket(VIN=vehicle.vin, service_date=date(2024, 1, t + 1), service_desc=f'Visit {t}',
+                                           customer=customer, vehicle=vehicle, category=category, mechanics=mechanics[:2])
+                    ticket.service_inventories = [ServiceInventory(inventory=part, quantity_used=1) for part in parts[:2]]
+                    db.session.add(ticket)
+            db.session.add(ServiceTicket(VIN=VIN, service_date=date(2024, 2, 1), service_desc='Bare', customer_id=1))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def headers(self, auth):
+        if auth is None:
+            return {}
+        if auth.startswith('customer'):
+            token = encode_customer_token(int(auth[8:] or 1))
+        else:
+            token = encode_mechanic_token(int(auth[8:] or 1))
+        return {'Authorization': f'Bearer {token}'}
+
+    def request(self, method, url, auth, body):
+        data = None
+        if url.startswith('/customers/import'):
+            data = json.dumps({'name': 'Imported', 'email': 'imported@email.com', 'phone': '1', 'password': 'x'}).encode()
+        return self.client.open(url, method=method, headers=self.headers(auth), json=body, data=data)
+
+    def test_every_route_has_a_budget(self):
+        endpoints = {rule.endpoint for rule in self.app.url_map.iter_rules()} - UNBUDGETED
+        self.assertEqual(endpoints - {route[0] for route in QUERY_BUDGETS}, set())
+
+    def test_routes_stay_within_query_budget(self):
+        for endpoint, method, url, auth, body, budget in QUERY_BUDGETS:
+            with self.subTest(endpoint=endpoint):
+                with self.app.app_context():
+                    cache.clear()
+                with query_budget(budget, f'{method} {url}'):
+                    response = self.request(method, url, auth, body)
+                    response.get_data()
+                self.assertLess(response.status_code, 400, response.get_data(as_text=True))
+                self.setUp()
+
+    def test_query_budget_reports_repeated_statements(self):
+        with self.app.app_context():
+            with self.assertRaises(QueryBudgetExceeded) as raised:
+                with query_budget(2, 'lazy loop'):
+                    for ticket in db.session.query(ServiceTicket).all():
+                        len(ticket.mechanics)
+            self.assertIn('lazy loop ran 11 queries (budget 2)', str(raised.exception))
+            self.assertIn('10x SELECT', str(raised.exception))
+
+            with count_queries() as outer:
+                with count_queries() as inner:
+                    db.session.get(Customer, 1)
+                db.session.get(Mechanic, 1)
+            self.assertEqual((outer.count, inner.count), (2, 1))
+
+    def test_debug_responses_carry_query_headers(self):
+        response = self.client.get('/customers/1')
+        self.assertEqual(response.headers['X-Query-Count'], '5')
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+
+        self.app.config['QUERY_COUNT_HEADERS'] = False
+        self.assertNotIn('X-Query-Count', self.client.get('/customers/1').headers)
@@ -0,0 +1,58 @@
+from app import create_app
+from app.models import Customer, Mechanic, ServiceTicket, Inventory, ServiceInventory, db
+from app.blueprints.customers.schemas import customers_schema
+from app.blueprints.mechanics.schemas import mechanics_schema
+from app.blueprints.service_tickets.schemas import service_tickets_schema
+from app.blueprints.inventory.schemas import inventories_schema, service_inventories_schema
+from app.utils.serializers import compile_schema
+from datetime import date, datetime
+from sqlalchemy import select
+import json
+import unittest
+
+class TestSerializers(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name='Golden Customer', email='golden@email.com', phone='1234567890', password='x')
+            mechanic = Mechanic(name='Golden Mechanic', email='golden_mechanic@email.com', phone='1234567890', salary=51234.5, password='x')
+            part = Inventory(part_name='Brake Pad', price=49.99, quantity_in_stock=7, cost=20, part_number='BP-1')
+            ticket = ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 10, 1), service_desc='Brakes',
+                                   customer=customer, mechanics=[mechanic], completed_at=datetime(2024, 10, 2, 9, 15, 30, 123456),
+                                   labor_hours=1.5, mileage=42000, notes=None)
+            ticket.service_inventories.append(ServiceInventory(inventory=part, quantity_used=2, price_at_service=49.99))
+            db.session.add_all([ticket, ServiceTicket(VIN='2T1BURHE0JC000001', service_date=date(2024, 10, 3),
+                                                      service_desc='Oil', customer=customer)])
+            db.session.commit()
+
+    def assertGolden(self, schema, rows):
+        expected = json.dumps(schema.dump(rows))
+        actual = json.dumps(compile_schema(schema).dump(rows))
+        self.assertEqual(actual, expected)
+
+    def test_golden_output_matches_marshmallow(self):
+        with self.app.app_context():
+            cases = [
+                (customers_schema, Customer),
+                (mechanics_schema, Mechanic),
+                (service_tickets_schema, ServiceTicket),
+                (inventories_schema, Inventory),
+                (service_inventories_schema, ServiceInventory),
+            ]
+            for schema, model in cases:
+                rows = db.session.execute(select(model)).scalars().all()
+                self.assertGolden(schema, rows)
+                self.assertEqual(compile_schema(schema).dump(rows[0], many=False), schema.dump(rows[0], many=False))
+
+    def test_field_selection_and_row_tuples(self):
+        with self.app.app_context():
+            only = ('id', 'part_name', 'price', 'created_at')
+            selected = compile_schema(inventories_schema, only=only)
+            self.assertIs(selected, compile_schema(inventories_schema, only=only))
+
+            part = db.session.get(Inventory, 1)
+            rows = db.session.execute(select(Inventory.id, Inventory.part_name, Inventory.price, Inventory.created_at)).all()
+            self.assertEqual(selected.dump(rows), selected.dump([part]))
+            self.assertEqual(list(selected.dump(rows)[0]), ['id', 'part_name', 'price', 'created_at'])
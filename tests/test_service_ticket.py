@@ -1,6 +1,6 @@
 from app import create_app
-from app.models import Mechanic, ServiceTicket, Inventory, ServiceInventory, db
-from datetime import date
+from app.models import Customer, Mechanic, ServiceTicket, Inventory, ServiceInventory, DeletedRecord, db
+from datetime import date, datetime, timedelta
 from app.utils.util import encode_mechanic_token
 from bcrypt import hashpw, gensalt
 import unittest
@@ -212,4 +212,445 @@ class TestServiceTicket(unittest.TestCase):
 
     def test_remove_inventory_unauthorized(self):
         response = self.client.put('/service_tickets/1/remove-inventory/1')
-        self.assertEqual(response.status_code, 401)
\ No newline at end of file
+        self.assertEqual(response.status_code, 401)
+
+    def test_service_ticket_changes_snapshot(self):
+        response = self.client.get('/service_tickets/changes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['changed']), 1)
+        self.assertEqual(response.json['deleted'], [])
+        self.assertFalse(response.json['has_more'])
+
+    def test_service_ticket_changes_since_cursor(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        cursor = self.client.get('/service_tickets/changes').json['cursor']
+
+        # Nothing Changed Since The Snapshot
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertEqual(response.json['changed'], [])
+
+        # Assigning A Mechanic Bumps The Ticket, Deleting Leaves A Tombstone
+        self.client.put('/service_tickets/1/assign-mechanic/1', headers=headers)
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertEqual([t['id'] for t in response.json['changed']], [1])
+
+        self.client.delete('/service_tickets/1', headers=headers)
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertEqual(response.json['changed'], [])
+        self.assertEqual(response.json['deleted'], [1])
+
+    def test_service_ticket_changes_reread_late_commits(self):
+        # Two tickets stamped in the same second, as DATETIME without fractions stores them
+        stamp = datetime.now().replace(microsecond=0) - timedelta(seconds=1)
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A000002', service_date=date(2024, 10, 2), service_desc='Second', customer_id=1))
+            db.session.add(DeletedRecord(id=5, table_name='service_tickets', record_id=50))
+            db.session.commit()
+            db.session.execute(db.update(ServiceTicket).values(updated_at=stamp))
+            db.session.commit()
+        response = self.client.get('/service_tickets/changes')
+        self.assertEqual([t['id'] for t in response.json['changed']], [1, 2])
+        cursor = response.json['cursor']
+
+        # Ticket 1 is updated in that same second but commits after the cursor was
+        # issued, and a tombstone with a lower id commits late too
+        with self.app.app_context():
+            ticket = db.session.get(ServiceTicket, 1)
+            ticket.service_desc = 'Late update'
+            ticket.updated_at = stamp
+            db.session.add(DeletedRecord(id=3, table_name='service_tickets', record_id=30))
+            db.session.commit()
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertEqual([(t['id'], t['service_desc']) for t in response.json['changed']], [(1, 'Late update')])
+        self.assertEqual(response.json['deleted'], [30])
+
+        # Another late tombstone is still inside the window on the next page
+        cursor = response.json['cursor']
+        with self.app.app_context():
+            db.session.add(DeletedRecord(id=4, table_name='service_tickets', record_id=40))
+            db.session.commit()
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertIn(40, response.json['deleted'])
+
+    def test_service_ticket_changes_reread_keeps_changes_nearest_the_cursor(self):
+        self.app.config['SYNC_PAGE_SIZE'] = 2
+        stamp = datetime.now().replace(microsecond=0) - timedelta(seconds=1)
+        with self.app.app_context():
+            for i in range(2, 5):
+                db.session.add(ServiceTicket(VIN=f'1HGCM82633A00000{i}', service_date=date(2024, 10, i), service_desc=f'Ticket {i}', customer_id=1))
+            for i in (9, 10, 12):
+                db.session.add(DeletedRecord(id=i, table_name='service_tickets', record_id=i * 10))
+            db.session.commit()
+            db.session.execute(db.update(ServiceTicket).values(updated_at=stamp))
+            db.session.commit()
+        response = self.client.get('/service_tickets/changes')
+        self.assertTrue(response.json['has_more'])
+        response = self.client.get(f"/service_tickets/changes?since={response.json['cursor']}")
+        self.assertEqual([t['id'] for t in response.json['changed']], [1, 3, 4])
+        cursor = response.json['cursor']
+
+        # More rows sit in the window than fit in a page; the late commits are just behind the cursor
+        with self.app.app_context():
+            db.session.execute(db.update(ServiceTicket).where(ServiceTicket.id == 3).values(service_desc='Late update', updated_at=stamp))
+            db.session.add(DeletedRecord(id=11, table_name='service_tickets', record_id=110))
+            db.session.commit()
+        response = self.client.get(f'/service_tickets/changes?since={cursor}')
+        self.assertEqual([(t['id'], t['service_desc']) for t in response.json['changed']], [(2, 'Ticket 2'), (3, 'Late update')])
+        self.assertEqual(response.json['deleted'], [100, 110])
+
+    def test_service_ticket_changes_invalid_cursor(self):
+        response = self.client.get('/service_tickets/changes?since=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_json_provider_encodes_dates_natively(self):
+        self.assertEqual(self.app.json.dumps({'b': date(2024, 10, 1), 'a': datetime(2024, 10, 1, 8, 30)}),
+                         '{"a":"2024-10-01T08:30:00","b":"2024-10-01"}')
+        response = self.client.get('/service_tickets/1')
+        self.assertEqual(response.json['service_date'], '2024-10-01')
+
+    def test_export_service_tickets(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.get('/service_tickets/export?format=ndjson', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Initial service', str(response.data))
+        self.assertNotIn('"customer"', str(response.data))
+
+    def test_get_service_tickets_paginated(self):
+        response = self.client.get('/service_tickets/?page=1&per_page=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+
+    def test_get_service_tickets_invalid_page(self):
+        response = self.client.get('/service_tickets/?page=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('page must be an integer', str(response.data))
+
+    def test_get_service_tickets_per_page_over_max(self):
+        response = self.client.get('/service_tickets/?page=1&per_page=100000')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('per_page must be at most', str(response.data))
+
+    def test_get_service_tickets_over_row_limit_redirects_to_export(self):
+        self.app.config['LIST_ROW_LIMITS'] = {'service_tickets': 1}
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A000002', service_date=date(2024, 10, 2), service_desc='Second service', customer_id=1))
+            db.session.commit()
+        response = self.client.get('/service_tickets/')
+        self.assertEqual(response.status_code, 303)
+        self.assertTrue(response.headers['Location'].endswith('/service_tickets/export'))
+
+    def test_create_service_tickets_batch(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            db.session.add(Customer(name='fleet', email='fleet@email.com', phone='1234567890', password='x'))
+            db.session.commit()
+        payload = [
+            {'VIN': f'1HGCM82633A00000{i}', 'service_date': '2024-11-01', 'service_desc': f'Fleet service {i}', 'customer_id': 1}
+            for i in range(3)
+        ]
+        response = self.client.post('/service_tickets/batch', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created_ids'], [2, 3, 4])
+        self.assertIn('Fleet service 2', str(self.client.get('/service_tickets/4').data))
+
+    def test_create_service_tickets_start_pending(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        ticket = {'VIN': '1HGCM82633A654321', 'service_date': '2024-11-01', 'service_desc': 'Skip ahead', 'customer_id': 1}
+        # Status only changes through PUT /<id>/status
+        response = self.client.post('/service_tickets/', json=dict(ticket, status='Completed'), headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json)
+        response = self.client.post('/service_tickets/batch', json=[dict(ticket, status='Completed')], headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json['0'])
+
+        response = self.client.post('/service_tickets/', json=ticket, headers=headers)
+        self.assertEqual((response.json['status'], response.json['completed_at']), ('Pending', None))
+
+    def test_create_service_tickets_batch_missing_reference(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        payload = [
+            {'VIN': '1HGCM82633A000001', 'service_date': '2024-11-01', 'service_desc': 'Fleet service', 'customer_id': 1, 'vehicle_id': 99}
+        ]
+        response = self.client.post('/service_tickets/batch', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Customer 1 not found', str(response.data))
+        self.assertIn('Vehicle 99 not found', str(response.data))
+        self.assertEqual(len(self.client.get('/service_tickets/').json), 1)
+
+    def test_create_service_tickets_batch_invalid(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.post('/service_tickets/batch', json={'VIN': 'not-a-list'}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/service_tickets/batch', json=[{'VIN': ''}], headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_service_tickets_by_ids(self):
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A654321', service_date=date(2024, 10, 2), service_desc='Second service', customer_id=1))
+            db.session.commit()
+        response = self.client.get('/service_tickets/?ids=2,99,1,2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json['results']], [2, 1])
+        self.assertEqual(response.json['missing'], [99])
+
+    def test_get_service_tickets_by_ids_invalid(self):
+        self.assertEqual(self.client.get('/service_tickets/?ids=1,abc').status_code, 400)
+        self.assertEqual(self.client.get('/service_tickets/?ids=').status_code, 400)
+        too_many = ','.join(str(i) for i in range(1, 102))
+        response = self.client.get(f'/service_tickets/?ids={too_many}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 100 ids', response.json['error'])
+
+    def _seed_compound(self):
+        with self.app.app_context():
+            db.session.add(Customer(name='fleet', email='fleet@email.com', phone='1234567890', password='x'))
+            part = Inventory(part_name='Oil Filter', price=9.99, quantity_in_stock=10)
+            second = ServiceTicket(VIN='1HGCM82633A654321', service_date=date(2024, 10, 2), service_desc='Second service', customer_id=1)
+            mechanic = db.session.get(Mechanic, 1)
+            second.mechanics.append(mechanic)
+            second.service_inventories.append(ServiceInventory(inventory=part, quantity_used=2))
+            first = db.session.get(ServiceTicket, 1)
+            first.mechanics.append(mechanic)
+            db.session.add(second)
+            db.session.commit()
+
+    def test_get_service_tickets_include(self):
+        self._seed_compound()
+        response = self.client.get('/service_tickets/?include=customer,mechanics,parts')
+        self.assertEqual(response.status_code, 200)
+        data, included = response.json['data'], response.json['included']
+        self.assertEqual([t['id'] for t in data], [1, 2])
+        self.assertNotIn('customer', data[0])
+        self.assertEqual(data[0]['mechanic_ids'], [1])
+        self.assertEqual(data[1]['parts'][0]['quantity_used'], 2)
+        # Shared related rows appear once in the side table
+        self.assertEqual([c['id'] for c in included['customers']], [1])
+        self.assertEqual([m['id'] for m in included['mechanics']], [1])
+        self.assertEqual([p['part_name'] for p in included['parts']], ['Oil Filter'])
+        self.assertNotIn('vehicles', included)
+
+    def test_get_service_tickets_include_batches_queries(self):
+        from sqlalchemy import event
+        self._seed_compound()
+        statements = []
+        with self.app.app_context():
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                response = self.client.get('/service_tickets/?include=customer,vehicle,category,mechanics,parts')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(response.status_code, 200)
+        # Tickets, then one query per relation: customers, mechanic links, mechanics, usages, parts
+        self.assertEqual(len(statements), 6)
+
+    def test_get_service_ticket_include(self):
+        self._seed_compound()
+        response = self.client.get('/service_tickets/2?include=mechanics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data']['mechanic_ids'], [1])
+        self.assertEqual(response.json['included']['mechanics'][0]['name'], 'service_mechanic')
+        response = self.client.get('/service_tickets/?ids=2,9&include=customer')
+        self.assertEqual(response.json['missing'], [9])
+        self.assertEqual(response.json['included']['customers'][0]['id'], 1)
+
+    def test_get_service_tickets_include_invalid(self):
+        response = self.client.get('/service_tickets/?include=customer,invoices')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invoices', response.json['error'])
+
+    def test_filter_service_tickets(self):
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A654321', service_date=date(2024, 10, 5), service_desc='Later service', customer_id=1, status='Completed'))
+            db.session.add(ServiceTicket(VIN='1HGCM82633A777777', service_date=date(2024, 9, 1), service_desc='Earlier service', customer_id=1, status='Completed'))
+            db.session.commit()
+        response = self.client.get('/service_tickets/?status=Completed&sort=-service_date')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['service_desc'] for t in response.json], ['Later service', 'Earlier service'])
+        response = self.client.get('/service_tickets/?customer_id=1&service_date[lt]=2024-10-01')
+        self.assertEqual([t['service_desc'] for t in response.json], ['Earlier service'])
+
+    def test_filter_service_tickets_rejected(self):
+        response = self.client.get('/service_tickets/?service_desc=Initial')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown filter', response.json['error'])
+        response = self.client.get('/service_tickets/?status=Pending&sort=updated_at')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('No index supports', response.json['error'])
+
+    def test_update_service_ticket_status(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.put('/service_tickets/1/status', json={'status': 'In Progress'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'In Progress')
+        self.assertIsNone(response.json['completed_at'])
+
+        response = self.client.put('/service_tickets/1/status', json={'status': 'Completed', 'labor_hours': 2.5}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['labor_hours'], 2.5)
+        self.assertIsNotNone(response.json['completed_at'])
+
+    def test_update_service_ticket_status_invalid_transition(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.client.put('/service_tickets/1/status', json={'status': 'Completed'}, headers=headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['allowed'], ['In Progress', 'Cancelled'])
+        response = self.client.put('/service_tickets/1/status', json={'status': 'Done'}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put('/service_tickets/99/status', json={'status': 'Cancelled'}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_work_queue(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            mechanic = db.session.get(Mechanic, 1)
+            for day in (3, 1, 2):
+                ticket = ServiceTicket(VIN='1HGCM82633A654321', service_date=date(2024, 9, day), service_desc=f'Queued {day}', customer_id=1)
+                if day != 2:
+                    ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+            db.session.add(ServiceTicket(VIN='1HGCM82633A654321', service_date=date(2024, 8, 1), service_desc='Done', customer_id=1, status='Completed'))
+            db.session.commit()
+
+        response = self.client.get('/service_tickets/queue/Pending?per_page=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Queued 1', 'Queued 2'])
+        response = self.client.get(f"/service_tickets/queue/Pending?per_page=2&after={response.json['next']}", headers=headers)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Queued 3', 'Initial service'])
+        self.assertIsNone(response.json['next'])
+
+        response = self.client.get('/service_tickets/queue/Pending?mechanic_id=1', headers=headers)
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Queued 1', 'Queued 3'])
+        self.assertEqual(self.client.get('/service_tickets/queue/Done', headers=headers).status_code, 404)
+        self.assertEqual(self.client.get('/service_tickets/queue/Pending?after=garbage', headers=headers).status_code, 400)
+
+    def test_ticket_totals_follow_parts_and_labor(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            db.session.add(Inventory(part_name='Brake Pad', price=30.0, cost=12.5, quantity_in_stock=10))
+            db.session.commit()
+
+        self.client.post('/service_tickets/1/add-inventory', json={'inventory_id': 1, 'quantity_used': 2}, headers=headers)
+        # A later price change must not reprice parts already on the ticket
+        self.assertEqual(self.client.put('/inventory/1', json={'price': 45.0}, headers=headers).status_code, 200)
+        self.client.post('/service_tickets/1/add-inventory', json={'inventory_id': 1, 'quantity_used': 1}, headers=headers)
+        self.client.put('/service_tickets/1/status', json={'status': 'In Progress', 'labor_hours': 2}, headers=headers)
+
+        ticket = self.client.get('/service_tickets/1').json
+        self.assertEqual(ticket['service_inventories'][0]['price_at_service'], 30.0)
+        self.assertEqual(ticket['parts_total'], 90.0)
+        self.assertEqual(ticket['parts_cost'], 37.5)
+        self.assertEqual(ticket['labor_total'], 150.0)
+        self.assertEqual(ticket['grand_total'], 240.0)
+
+        self.client.put('/service_tickets/1/remove-inventory/1', headers=headers)
+        ticket = self.client.get('/service_tickets/1').json
+        self.assertEqual((ticket['parts_total'], ticket['parts_cost'], ticket['grand_total']), (0.0, 0.0, 150.0))
+
+    def test_rebuild_ticket_totals(self):
+        from app.blueprints.service_tickets.totals import rebuild_totals
+        with self.app.app_context():
+            part = Inventory(part_name='Rotor', price=80.0, cost=40.0, quantity_in_stock=10)
+            ticket = db.session.get(ServiceTicket, 1)
+            ticket.labor_hours = 1.0
+            # Legacy line with no price snapshot and totals never maintained
+            ticket.service_inventories.append(ServiceInventory(inventory=part, quantity_used=2))
+            db.session.commit()
+
+            summary = rebuild_totals(dry_run=True)
+            self.assertEqual((summary['checked'], summary['fixed'], summary['snapshots_filled']), (1, 1, 1))
+            self.assertEqual(db.session.get(ServiceTicket, 1).grand_total, 0.0)
+
+            summary = rebuild_totals()
+            self.assertEqual(summary['fixed'], 1)
+            db.session.expire_all()
+            ticket = db.session.get(ServiceTicket, 1)
+            self.assertEqual((ticket.parts_total, ticket.parts_cost, ticket.labor_total, ticket.grand_total), (160.0, 80.0, 75.0, 235.0))
+            self.assertEqual(ticket.service_inventories[0].price_at_service, 80.0)
+            self.assertEqual(rebuild_totals()['fixed'], 0)
+
+    def test_service_ticket_invoice(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            db.session.add(Inventory(part_name='Oil Filter', part_number='OF-1', price=12.5, quantity_in_stock=10))
+            db.session.commit()
+        self.client.post('/service_tickets/1/add-inventory', json={'inventory_id': 1, 'quantity_used': 2}, headers=headers)
+
+        response = self.client.get('/service_tickets/1/invoice', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['document'], 'estimate')
+        self.assertEqual(response.json['invoice_number'], 'INV-000001')
+        self.assertEqual(response.json['vehicle'], {'vin': '1HGCM82633A123456'})
+        self.assertEqual(response.json['line_items'][0]['amount'], 25.0)
+        self.assertEqual(response.json['totals'], {'parts': 25.0, 'labor': 0.0, 'total': 25.0})
+
+        self.client.put('/service_tickets/1/status', json={'status': 'In Progress'}, headers=headers)
+        self.client.put('/service_tickets/1/status', json={'status': 'Completed', 'labor_hours': 1.5}, headers=headers)
+        response = self.client.get('/service_tickets/1/invoice', headers=headers)
+        self.assertEqual(response.json['document'], 'invoice')
+        self.assertEqual(response.json['totals'], {'parts': 25.0, 'labor': 112.5, 'total': 137.5})
+
+        response = self.client.get('/service_tickets/1/invoice?format=html', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/html')
+        self.assertIn('INV-000001', response.text)
+        self.assertIn('137.50', response.text)
+
+        self.assertEqual(self.client.get('/service_tickets/1/invoice?format=pdf', headers=headers).status_code, 400)
+        self.assertEqual(self.client.get('/service_tickets/99/invoice', headers=headers).status_code, 404)
+        self.assertEqual(self.client.get('/service_tickets/1/invoice').status_code, 401)
+
+    def test_service_ticket_invoice_cached_per_version(self):
+        from app.blueprints.service_tickets.invoices import get_rendered_invoice
+        with self.app.app_context():
+            db.session.add(Customer(name='Invoice Customer', email='invoice@email.com', phone='1234567890', password='x'))
+            db.session.commit()
+            first = get_rendered_invoice(1, 'json')
+            # A direct write that bypasses updated_at leaves the cached render in place
+            db.session.execute(ServiceTicket.__table__.update().values(service_desc='Changed quietly', updated_at=ServiceTicket.updated_at))
+            db.session.commit()
+            self.assertEqual(get_rendered_invoice(1, 'json'), first)
+
+            ticket = db.session.get(ServiceTicket, 1)
+            ticket.service_desc = 'Changed properly'
+            db.session.commit()
+            self.assertIn('Changed properly', get_rendered_invoice(1, 'json'))
+
+            # Edits to the rows the invoice prints don't touch the ticket but still miss the cache
+            db.session.get(Customer, 1).name = 'Renamed Customer'
+            db.session.commit()
+            self.assertIn('Renamed Customer', get_rendered_invoice(1, 'json'))
+            part = Inventory(part_name='Oil Filter', price=12.5, quantity_in_stock=10)
+            ticket.service_inventories.append(ServiceInventory(inventory=part, quantity_used=1))
+            db.session.commit()
+            self.assertIn('Oil Filter', get_rendered_invoice(1, 'json'))
+            part.part_name = 'Cabin Filter'
+            db.session.commit()
+            self.assertIn('Cabin Filter', get_rendered_invoice(1, 'json'))
+
+    def test_invoice_category_defaults_and_query_count(self):
+        from sqlalchemy import event
+        from app.models import ServiceCategory
+        from app.blueprints.service_tickets.invoices import load_invoices, render_invoices_for_day
+        with self.app.app_context():
+            category = ServiceCategory(name='Brakes', default_labor_hours=2.0)
+            db.session.add(category)
+            for i in range(5):
+                db.session.add(ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 10, 1), service_desc=f'Brakes {i}', customer_id=1, category=category))
+            db.session.commit()
+
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                invoices = load_invoices(range(1, 7))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            self.assertEqual(len(invoices), 6)
+            self.assertEqual(len(statements), 2)
+            self.assertEqual(invoices[2]['labor'], {'hours': 2.0, 'rate': 75.0, 'amount': 150.0, 'estimated': True})
+
+            rendered = render_invoices_for_day(date(2024, 10, 1), 'html', workers=3, chunk_size=2)
+            self.assertEqual(list(rendered), [1, 2, 3, 4, 5, 6])
+            self.assertIn('Brakes 4', rendered[6])
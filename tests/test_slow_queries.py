@@ -0,0 +1,103 @@
+from app import create_app
+from app.models import Customer, Mechanic, db
+from app.utils.slow_queries import SlowQueryRing, SlowQueryLog, read_ring, render_sql, SLOT_SIZE
+from app.utils.util import encode_mechanic_token
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+class TestSlowQueries(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Customer(name='Slow', email='slow@email.com', phone='1', password='x'))
+            db.session.add(Mechanic(name='Admin', email='admin@email.com', phone='1', salary=1.0, password='x'))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.headers = {'Authorization': f'Bearer {encode_mechanic_token(1)}'}
+        self.log = self.app.extensions['slow_query_log']
+
+    def test_records_route_handler_and_call_site(self):
+        self.app.config['SLOW_QUERY_EXPLAIN'] = True
+        self.log.parameters = True
+        self.log.threshold_ms = 0
+        self.client.get('/customers/1')
+        self.log.threshold_ms = 10_000
+
+        response = self.client.get('/admin/slow-queries?explain=true', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        records = [q for q in response.json['queries'] if q['route'] == 'customers_bp.get_customer']
+        record = next(q for q in records if q['statement'].startswith('SELECT customers.'))
+        self.assertEqual(record['handler'], 'app.blueprints.customers.routes.get_customer')
+        self.assertEqual(record['path'], '/customers/1')
+        self.assertTrue(record['call_site'].startswith('app/blueprints/customers/routes.py:'))
+        self.assertEqual(record['parameters'], [1])
+        self.assertIn('WHERE customers.id = 1', record['rendered_sql'])
+        self.assertTrue(any('customers' in step['detail'] for step in record['plan']))
+
+    def test_parameter_values_are_opt_in_and_masked(self):
+        self.log.threshold_ms = 0
+        self.client.post('/customers/login', json={'email': 'who@email.com', 'password': 'x'})
+        self.log.parameters = True
+        self.client.get('/customers/1')
+        self.client.post('/customers/login', json={'email': 'who@email.com', 'password': 'x'})
+        self.log.threshold_ms = 10_000
+
+        records = self.log.records()
+        masked_login, by_id, login = [r for r in records if r['statement'].startswith('SELECT customers.')][:3]
+        self.assertEqual((login['parameters'], login['parameter_types']), (None, ['str']))
+        self.assertNotIn('who@email.com', json.dumps(records))
+        self.assertEqual(login['rendered_sql'], login['statement'])
+        self.assertEqual(masked_login['parameters'], ['***'])
+        self.assertEqual(by_id['parameters'], [1])
+
+        # EXPLAIN is opt-in too
+        response = self.client.get('/admin/slow-queries?explain=true', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_threshold_and_auth(self):
+        self.client.get('/customers/1')
+        response = self.client.get('/admin/slow-queries', headers=self.headers)
+        self.assertEqual(response.json, {'threshold_ms': 200, 'queries': []})
+        self.assertEqual(self.client.get('/admin/slow-queries').status_code, 401)
+
+    def test_ring_keeps_the_newest_records(self):
+        ring = SlowQueryRing(slots=4)
+        for i in range(10):
+            ring.append({'statement': f'SELECT {i}', 'parameters': None})
+        self.assertEqual([r['statement'] for r in ring.records()], ['SELECT 6', 'SELECT 7', 'SELECT 8', 'SELECT 9'])
+
+        # Oversized records lose their parameters, then as much statement as it takes to fit a slot
+        ring.append({'statement': 'SELECT ?', 'parameters': ['x' * SLOT_SIZE]})
+        ring.append({'statement': 'SELECT ' + 'x' * SLOT_SIZE * 2, 'parameters': None})
+        big_params, big_statement = ring.records()[-2:]
+        self.assertEqual((big_params['parameters'], big_params['truncated']), (None, True))
+        self.assertLess(len(big_statement['statement']), SLOT_SIZE)
+
+    def test_workers_share_a_directory(self):
+        dead = multiprocessing.get_context('fork').Process(target=os.getpid)
+        dead.start()
+        dead.join()
+        with tempfile.TemporaryDirectory() as directory:
+            for pid in (1, os.getpid(), dead.pid):
+                ring = SlowQueryRing(os.path.join(directory, f'slow_queries_{pid}.ring'), slots=8)
+                ring.append({'pid': pid, 'time': float(pid), 'statement': f'SELECT {pid}', 'parameters': None, 'paramstyle': 'qmark'})
+                ring.close()
+            records = SlowQueryLog(0, directory).records()
+            self.assertEqual({r['id'] for r in records}, {'1-0', f'{os.getpid()}-0'})
+            with open(os.path.join(directory, 'slow_queries_1.ring'), 'rb') as f:
+                self.assertEqual(read_ring(f.read())[0]['statement'], 'SELECT 1')
+            # A dead worker's ring is removed
+            self.assertFalse(os.path.exists(os.path.join(directory, f'slow_queries_{dead.pid}.ring')))
+
+    def test_render_sql(self):
+        self.assertEqual(render_sql('SELECT * FROM t WHERE a = ? AND b = ?', ["it's", None], 'qmark'),
+                         "SELECT * FROM t WHERE a = 'it''s' AND b = NULL")
+        self.assertEqual(render_sql('SELECT %(a)s, 100%%', {'a': 2.5}, 'pyformat'), 'SELECT 2.5, 100%')
+        self.assertEqual(render_sql("SELECT %s LIKE 'a%%'", [True], 'format'), "SELECT TRUE LIKE 'a%'")
+        # Placeholders that don't line up are left alone
+        self.assertEqual(render_sql('SELECT ?', [1, 2], 'qmark'), 'SELECT ?')
@@ -0,0 +1,143 @@
+from app import create_app
+from app.models import Customer, Mechanic, ServiceTicket, service_mechanics, db
+from app.blueprints.service_tickets.filters import ticket_query
+from app.utils.query_language import QueryError
+from datetime import date, timedelta
+from sqlalchemy import insert, text
+from werkzeug.datastructures import MultiDict
+import unittest
+
+TICKETS = 20000
+STATUSES = ('Pending', 'In Progress', 'Completed', 'Cancelled')
+
+
+class TestTicketQueryPlanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app('TestingConfig')
+        with cls.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.execute(insert(Customer), [
+                {'name': f'customer{i}', 'email': f'customer{i}@email.com', 'phone': '1234567890', 'password': 'x'}
+                for i in range(200)
+            ])
+            db.session.execute(insert(Mechanic), [
+                {'name': f'mechanic{i}', 'email': f'mechanic{i}@email.com', 'phone': '1234567890', 'password': 'x', 'salary': 50000.0}
+                for i in range(20)
+            ])
+            db.session.execute(insert(ServiceTicket), [
+                {
+                    'VIN': f'1HGCM82633A{i:06d}',
+                    'service_date': date(2020, 1, 1) + timedelta(days=i % 1500),
+                    'service_desc': f'Service {i}',
+                    'customer_id': i % 200 + 1,
+                    'status': STATUSES[i % len(STATUSES)]
+                }
+                for i in range(TICKETS)
+            ])
+            db.session.execute(insert(service_mechanics), [
+                {'service_ticket_id': i + 1, 'mechanic_id': i % 20 + 1} for i in range(TICKETS)
+            ])
+            db.session.commit()
+            # Give the SQLite planner real statistics, as a production database would have
+            db.session.execute(text('ANALYZE'))
+
+    def explain(self, query_string):
+        """Compile a query string and return (planned index, SQLite's query plan lines)."""
+        args = MultiDict([pair.split('=', 1) for pair in query_string.split('&') if pair])
+        statement, index = ticket_query.compile(args)
+        sql = statement.limit(20).compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').all()
+        return index, [row[3] for row in plan]
+
+    def test_accepted_queries_use_their_index(self):
+        cases = [
+            'status=Pending',
+            'status=Pending&service_date[gte]=2021-01-01',
+            'status=Pending&sort=-service_date',
+            'status[in]=Pending,Completed',
+            'customer_id=3',
+            'customer_id=3&status=Pending&sort=service_date',
+            'customer_id[in]=3,4',
+            'vehicle_id=2',
+            'category_id=1',
+            'VIN=1hgcm82633a000123',
+            'mechanic_id=3',
+            'mechanic_id=3&status=Completed',
+            'service_date[gte]=2021-01-01&service_date[lt]=2021-02-01',
+            'sort=-updated_at',
+            'sort=service_date',
+        ]
+        with self.app.app_context():
+            for query_string in cases:
+                with self.subTest(query_string):
+                    index, plan = self.explain(query_string)
+                    self.assertTrue(any(index in line for line in plan), plan)
+                    self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+                    self.assertFalse(any(line == 'SCAN service_tickets' for line in plan), plan)
+
+    def test_unfiltered_query_walks_primary_key(self):
+        with self.app.app_context():
+            index, plan = self.explain('')
+            self.assertEqual(index, 'service_tickets_pkey')
+            self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+
+    def test_rejects_unindexed_combinations(self):
+        cases = [
+            'service_desc=Oil',              # not allow-listed
+            'VIN[gte]=1HGCM',                # operator not allowed on the field
+            'status=Pending&sort=updated_at',  # the status index is not in updated_at order
+            'customer_id=3&sort=id',         # would sort every ticket of the customer
+            'sort=status',                   # not sortable
+            'service_date=yesterday',        # bad value
+            'status=Pending&status=Completed',
+        ]
+        with self.app.app_context():
+            for query_string in cases:
+                with self.subTest(query_string):
+                    with self.assertRaises(QueryError):
+                        self.explain(query_string)
+
+    def test_filtered_results(self):
+        with self.app.app_context():
+            statement, _ = ticket_query.compile(MultiDict({'customer_id': '3', 'status': 'Completed', 'sort': '-service_date'}))
+            tickets = db.session.execute(statement).scalars().all()
+            self.assertTrue(tickets)
+            self.assertTrue(all(t.customer_id == 3 and t.status == 'Completed' for t in tickets))
+            dates = [t.service_date for t in tickets]
+            self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_work_queue_seeks_status_index(self):
+        from app.utils.pagination import _after
+        from sqlalchemy import select
+        columns = (ServiceTicket.service_date, ServiceTicket.id)
+        with self.app.app_context():
+            for mechanic_id in (None, 3):
+                query = select(ServiceTicket).where(ServiceTicket.status == 'Pending')
+                if mechanic_id is not None:
+                    query = query.join(service_mechanics, service_mechanics.c.service_ticket_id == ServiceTicket.id)
+                    query = query.where(service_mechanics.c.mechanic_id == mechanic_id)
+                query = query.where(_after(columns, [date(2021, 1, 1), 500])).order_by(*columns).limit(21)
+                sql = query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+                plan = [row[3] for row in db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+                with self.subTest(mechanic_id=mechanic_id):
+                    self.assertIn('ix_service_tickets_status_service_date (status=? AND service_date>?)', plan[0])
+                    self.assertFalse(any('TEMP B-TREE' in line or line.startswith('SCAN') for line in plan), plan)
+
+    def test_my_tickets_walks_covering_index(self):
+        from app.utils.pagination import _after
+        from sqlalchemy import select
+        columns = (service_mechanics.c.service_ticket_id,)
+        with self.app.app_context():
+            query = (
+                select(ServiceTicket)
+                .join(service_mechanics, service_mechanics.c.service_ticket_id == ServiceTicket.id)
+                .where(service_mechanics.c.mechanic_id == 3, ServiceTicket.status == 'Completed', _after(columns, [500]))
+                .order_by(*columns)
+                .limit(21)
+            )
+            sql = query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+            plan = [row[3] for row in db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+            self.assertIn('COVERING INDEX ix_service_mechanics_mechanic_id_service_ticket_id (mechanic_id=? AND service_ticket_id>?)', plan[0])
+            self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
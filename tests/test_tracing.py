@@ -0,0 +1,183 @@
+from app import create_app
+from app.models import Customer, db
+from app.utils import tracing
+from app.utils.util import encode_customer_token
+from app.blueprints.customers.bulk_import import hash_passwords
+from bcrypt import hashpw, gensalt
+from unittest import mock
+import config
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.app = self.create_app(1.0)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Customer(name='Traced', email='traced@email.com', phone='1',
+                                    password=hashpw(b'secret', gensalt(4)).decode('utf-8')))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.tracer = self.app.extensions['tracing']
+        self.exporter = self.tracer.exporter
+        self.tracer.flush()
+        self.exporter.clear()
+
+    def create_app(self, sample_rate, exporter='memory', **settings):
+        settings = dict(settings, TRACING_EXPORTER=exporter, TRACING_SAMPLE_RATE=sample_rate)
+        with mock.patch.multiple(config.TestingConfig, create=True, **settings):
+            app = create_app('TestingConfig')
+        self.addCleanup(app.extensions['tracing'].shutdown)
+        return app
+
+    def spans(self):
+        self.tracer.flush()
+        return self.exporter.spans
+
+    def test_request_spans_nest(self):
+        headers = {'Authorization': f'Bearer {encode_customer_token(1)}'}
+        response = self.client.get('/customers/my-tickets', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.client.get('/customers/')
+
+        spans = self.spans()
+        first, second = [s for s in spans if s.parent_id is None]
+        self.assertEqual(first.name, 'GET /customers/my-tickets')
+        self.assertEqual(first.attributes['http.status_code'], 200)
+        self.assertEqual(first.attributes['http.route'], 'customers_bp.get_my_tickets')
+        self.assertEqual(response.headers['traceparent'], first.traceparent)
+        self.assertNotEqual(first.trace_id, second.trace_id)
+
+        children = {s.name for s in spans if s.parent_id == first.span_id}
+        self.assertIn('auth.verify_token', children)
+        self.assertIn('db.execute', children)
+        statements = [s for s in spans if s.name == 'db.execute' and s.trace_id == first.trace_id]
+        self.assertTrue(all(s.kind == tracing.KIND_CLIENT and s.attributes['db.system'] == 'sqlite' for s in statements))
+        # The list endpoint is cached: a miss, then the response is stored
+        cache_spans = [(s.name, s.attributes.get('cache.hit')) for s in spans if s.parent_id == second.span_id and s.name.startswith('cache.')]
+        self.assertEqual(cache_spans[:2], [('cache.get', False), ('cache.set', None)])
+        self.assertTrue(all(s.end_ns >= s.start_ns for s in spans))
+
+    def test_bcrypt_spans_follow_into_the_hash_pool(self):
+        response = self.client.post('/customers/login', json={'email': 'traced@email.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context(), tracing.span('import') as parent:
+            hash_passwords(['one', 'two'])
+
+        spans = self.spans()
+        self.assertIn('bcrypt.checkpw', [s.name for s in spans])
+        hashes = [s for s in spans if s.name == 'bcrypt.hashpw']
+        self.assertEqual([s.parent_id for s in hashes], [parent.span_id] * 2)
+
+    def test_errors_mark_the_span(self):
+        with self.app.app_context(), self.assertRaises(ZeroDivisionError):
+            with tracing.span('divide'):
+                1 / 0
+        span, = self.spans()
+        self.assertEqual((span.status, span.message), (tracing.STATUS_ERROR, 'division by zero'))
+        self.assertEqual(span.attributes['exception.type'], 'ZeroDivisionError')
+
+    def test_sampling(self):
+        parent = {'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'}
+        # A sampled traceparent is continued, but doesn't decide sampling by default
+        response = self.client.get('/customers/1', headers=parent)
+        self.assertTrue(response.headers['traceparent'].startswith(f'00-{TRACE_ID}-'))
+
+        self.app = self.create_app(0.0)
+        client = self.app.test_client()
+        self.tracer = self.app.extensions['tracing']
+        self.exporter = self.tracer.exporter
+        for headers in ({}, parent):
+            response = client.get('/customers/1', headers=headers)
+            self.assertNotIn('traceparent', response.headers)
+        self.assertEqual(self.spans(), [])
+
+        # With TRACING_TRUST_PARENT, a caller that sampled the trace has it traced here
+        self.app = self.create_app(0.0, TRACING_TRUST_PARENT=True)
+        client = self.app.test_client()
+        self.tracer = self.app.extensions['tracing']
+        self.exporter = self.tracer.exporter
+        response = client.get('/customers/1', headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'})
+        spans = self.spans()
+        request_span = next(s for s in spans if s.kind == tracing.KIND_SERVER)
+        self.assertEqual((request_span.trace_id, request_span.parent_id), (TRACE_ID, '00f067aa0ba902b7'))
+        self.assertTrue(response.headers['traceparent'].startswith(f'00-{TRACE_ID}-'))
+        self.assertTrue(all(s.trace_id == TRACE_ID for s in spans))
+
+        self.exporter.clear()
+        client.get('/customers/1', headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-00'})
+        self.assertEqual(self.spans(), [])
+
+    def test_full_queue_drops_spans(self):
+        exporter = tracing.InMemoryExporter()
+        processor = tracing.SpanProcessor(exporter, queue_size=2)
+        processor._pid = os.getpid()  # Hold back the worker thread
+        for name in ('a', 'b', 'c'):
+            processor.submit(tracing.Span(name, TRACE_ID, None, tracing.KIND_INTERNAL, {}))
+        self.assertEqual(processor.dropped, 1)
+        processor.flush()
+        self.assertEqual([s.name for s in exporter.spans], ['a', 'b'])
+
+    def test_apps_keep_their_own_tracer(self):
+        other = self.create_app(0.0)
+        self.assertIsNot(other.extensions['tracing'], self.tracer)
+        other.test_client().get('/customers/1')
+        self.client.get('/customers/1')
+        self.assertEqual(other.extensions['tracing'].exporter.spans, [])
+        self.assertTrue(self.spans())
+
+        # Shutting a tracer down stops its export thread, and later spans are dropped
+        exporters = [t for t in threading.enumerate() if t.name == 'span-exporter']
+        self.tracer.shutdown()
+        self.assertEqual(len([t for t in threading.enumerate() if t.name == 'span-exporter']), len(exporters) - 1)
+        self.exporter.clear()
+        self.client.get('/customers/1')
+        self.assertEqual(len(self.tracer.processor._spans), 0)
+        self.assertEqual(self.spans(), [])
+
+    def test_otlp_file_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            app = self.create_app(1.0, 'otlp-file', TRACING_FILE=path, TRACING_SERVICE_NAME='autoful-test')
+            with app.app_context():
+                with tracing.span('outer', retries=2, cached=True):
+                    with tracing.span('inner', ratio=0.5, key='k'):
+                        pass
+            app.extensions['tracing'].flush()
+            self.assertEqual(os.listdir(directory), [f'traces.{os.getpid()}.jsonl'])
+            with open(app.extensions['tracing'].exporter.file) as f:
+                lines = [json.loads(line) for line in f]
+
+        resource_spans = [r for line in lines for r in line['resourceSpans']]
+        self.assertEqual(resource_spans[0]['resource']['attributes'],
+                         [{'key': 'service.name', 'value': {'stringValue': 'autoful-test'}}])
+        inner, outer = [s for r in resource_spans for scope in r['scopeSpans'] for s in scope['spans']]
+        self.assertEqual(inner['parentSpanId'], outer['spanId'])
+        self.assertNotIn('parentSpanId', outer)
+        self.assertEqual(len(outer['traceId']), 32)
+        self.assertEqual(outer['attributes'], [{'key': 'retries', 'value': {'intValue': '2'}},
+                                               {'key': 'cached', 'value': {'boolValue': True}}])
+        self.assertEqual(inner['attributes'][0], {'key': 'ratio', 'value': {'doubleValue': 0.5}})
+        self.assertEqual(outer['status'], {'code': tracing.STATUS_OK})
+        self.assertLessEqual(int(outer['startTimeUnixNano']), int(inner['startTimeUnixNano']))
+
+    def test_otlp_file_rotates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            exporter = tracing.OTLPFileExporter(path, max_bytes=2000, backups=2)
+            batch = [tracing.Span('x' * 500, TRACE_ID, None, tracing.KIND_INTERNAL, {})]
+            for span in batch:
+                span.end_ns = span.start_ns
+            for _ in range(10):
+                exporter.export(batch)
+            file = f'traces.{os.getpid()}.jsonl'
+            self.assertEqual(sorted(os.listdir(directory)), [file, f'{file}.1', f'{file}.2'])
+            for name in os.listdir(directory):
+                self.assertLessEqual(os.path.getsize(os.path.join(directory, name)), 2000)
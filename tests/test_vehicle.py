@@ -0,0 +1,148 @@
+from app import create_app
+from app.models import Customer, Mechanic, Vehicle, ServiceTicket, Inventory, ServiceInventory, db
+from datetime import date
+from app.utils.util import encode_mechanic_token
+from bcrypt import hashpw, gensalt
+import unittest
+
+class TestVehicle(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        hashed_pw = hashpw('mechanicpass'.encode('utf-8'), gensalt()).decode('utf-8')
+        self.mechanic = Mechanic(name='vehicle_mechanic', email='vehicle_mechanic@email.com', phone='1234567890', salary=50000.0, password=hashed_pw)
+        self.customer = Customer(name='vehicle_customer', email='vehicle_customer@email.com', phone='1234567890', password=hashed_pw)
+        self.vehicle = Vehicle(vin='1HGCM82633A123456', make='Honda', model='Accord', year=2003, customer_id=1)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([self.mechanic, self.customer, self.vehicle])
+            db.session.commit()
+            self.token = encode_mechanic_token(1)
+            self.client = self.app.test_client()
+
+    def test_create_vehicle(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        payload = {'vin': '2t1bu4ee9dc123456', 'make': 'Toyota', 'model': 'Corolla', 'year': 2013, 'customer_id': 1}
+        response = self.client.post('/vehicles/', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['vin'], '2T1BU4EE9DC123456')
+
+        self.assertEqual(self.client.post('/vehicles/', json=payload, headers=headers).status_code, 400)
+        self.assertEqual(self.client.post('/vehicles/', json=dict(payload, vin='2T1BU4EE9DC65432O'), headers=headers).status_code, 400)
+        self.assertEqual(self.client.post('/vehicles/', json=dict(payload, vin='2T1BU4EE9DC654321', customer_id=99), headers=headers).status_code, 404)
+        self.assertEqual(self.client.post('/vehicles/', json=payload).status_code, 401)
+
+    def test_get_vehicles(self):
+        response = self.client.get('/vehicles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['vin'], '1HGCM82633A123456')
+        self.assertEqual(self.client.get('/vehicles/1hgcm82633a123456').json['make'], 'Honda')
+        self.assertEqual(self.client.get('/vehicles/?ids=1,2').json['missing'], [2])
+        self.assertEqual(self.client.get('/vehicles/1HGCM82633A000000').status_code, 404)
+
+    def test_update_vehicle_vin_updates_tickets(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 1, 1), service_desc='Oil', customer_id=1, vehicle_id=1))
+            db.session.commit()
+
+        response = self.client.put('/vehicles/1HGCM82633A123456', json={'vin': '1HGCM82633A654321', 'color': 'Blue'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['color'], 'Blue')
+        self.assertEqual(self.client.get('/service_tickets/1').json['VIN'], '1HGCM82633A654321')
+        self.assertEqual(self.client.put('/vehicles/1HGCM82633A654321', json={'customer_id': 99}, headers=headers).status_code, 404)
+        self.assertEqual(self.client.put('/vehicles/1HGCM82633A123456', json={'color': 'Red'}, headers=headers).status_code, 404)
+
+    def test_delete_vehicle(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        with self.app.app_context():
+            db.session.add(ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 1, 1), service_desc='Oil', customer_id=1, vehicle_id=1))
+            db.session.commit()
+        self.assertEqual(self.client.delete('/vehicles/1HGCM82633A123456', headers=headers).status_code, 400)
+
+        with self.app.app_context():
+            db.session.delete(db.session.get(ServiceTicket, 1))
+            db.session.commit()
+        self.assertEqual(self.client.delete('/vehicles/1HGCM82633A123456', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get('/vehicles/1HGCM82633A123456').status_code, 404)
+
+    def test_vehicle_history(self):
+        with self.app.app_context():
+            part = Inventory(part_name='Oil Filter', price=12.5, quantity_in_stock=10)
+            for day in (1, 3, 2):
+                ticket = ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 1, day), service_desc=f'Visit {day}', customer_id=1, vehicle_id=1)
+                ticket.service_inventories.append(ServiceInventory(inventory=part, quantity_used=1))
+                db.session.add(ticket)
+            # Same VIN string but never linked to the vehicle: not part of its history
+            db.session.add(ServiceTicket(VIN='1HGCM82633A123456', service_date=date(2024, 1, 4), service_desc='Unlinked', customer_id=1))
+            db.session.commit()
+
+        response = self.client.get('/vehicles/1HGCM82633A123456/history?per_page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['vehicle']['make'], 'Honda')
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Visit 3', 'Visit 2'])
+        self.assertEqual(response.json['tickets'][0]['service_inventories'][0]['inventory']['part_name'], 'Oil Filter')
+
+        response = self.client.get(f"/vehicles/1HGCM82633A123456/history?per_page=2&after={response.json['next']}")
+        self.assertEqual([t['service_desc'] for t in response.json['tickets']], ['Visit 1'])
+        self.assertIsNone(response.json['next'])
+        self.assertEqual(self.client.get('/vehicles/1HGCM82633A123456/history?after=garbage').status_code, 400)
+        self.assertEqual(self.client.get('/vehicles/1HGCM82633A000000/history').status_code, 404)
+
+    def test_reconcile_ticket_vehicles(self):
+        from app.blueprints.vehicles.reconcile import reconcile_ticket_vehicles
+        with self.app.app_context():
+            other = Customer(name='other', email='other@email.com', phone='1234567890', password='x')
+            db.session.add(other)
+            db.session.flush()
+            db.session.add(Vehicle(vin='JH4KA7561PC008269', make='Acura', model='Legend', year=1993, customer_id=other.id))
+            db.session.add_all([
+                # Linked, but the VIN copy disagrees with the vehicle
+                ServiceTicket(VIN='WRONGVIN000000000', service_date=date(2024, 1, 1), service_desc='Stale', customer_id=1, vehicle_id=1),
+                # Unlinked, VIN belongs to the same customer's vehicle
+                ServiceTicket(VIN='1hgcm82633a123456', service_date=date(2024, 1, 2), service_desc='Link me', customer_id=1),
+                # Unlinked, VIN belongs to another customer's vehicle
+                ServiceTicket(VIN='JH4KA7561PC008269', service_date=date(2024, 1, 3), service_desc='Conflict', customer_id=1),
+                ServiceTicket(VIN='5YJSA1E26HF000001', service_date=date(2024, 1, 4), service_desc='Unknown', customer_id=1),
+            ])
+            db.session.commit()
+
+            summary = reconcile_ticket_vehicles(batch_size=2, dry_run=True)
+            self.assertEqual(
+                [summary[k] for k in ('checked', 'vin_fixed', 'linked', 'conflicts', 'unmatched')], [4, 1, 1, 1, 1]
+            )
+            self.assertEqual(db.session.get(ServiceTicket, 1).VIN, 'WRONGVIN000000000')
+
+            reconcile_ticket_vehicles(batch_size=2)
+            db.session.expire_all()
+            self.assertEqual(db.session.get(ServiceTicket, 1).VIN, '1HGCM82633A123456')
+            linked = db.session.get(ServiceTicket, 2)
+            self.assertEqual((linked.vehicle_id, linked.VIN), (1, '1HGCM82633A123456'))
+            self.assertIsNone(db.session.get(ServiceTicket, 3).vehicle_id)
+
+            summary = reconcile_ticket_vehicles()
+            self.assertEqual((summary['vin_fixed'], summary['linked']), (0, 0))
+
+    def test_decode_vin(self):
+        from app.utils.vin import decode_vin
+        self.assertEqual(decode_vin('1hgcm82633a123456'), ('1HG', 'Honda', 2003))
+        self.assertEqual(decode_vin('JH4KA7561PC008269'), ('JH4', 'Acura', 1993))
+        # A letter in position 7 puts the year code in the 2010+ cycle
+        self.assertEqual(decode_vin('2T1BU4EE9DC123456'), ('2T1', 'Toyota', 2013))
+        self.assertEqual(decode_vin('9ZZAA11119A000000').make, None)
+        self.assertIsNone(decode_vin('NOT-A-VIN'))
+
+    def test_create_vehicle_decodes_make_and_year(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        payload = {'vin': '5YJSA1E26HF000001', 'model': 'Model S', 'customer_id': 1}
+        response = self.client.post('/vehicles/', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json['make'], response.json['year']), ('Tesla', 2017))
+
+        # Values the client sends win over the decoder
+        response = self.client.post('/vehicles/', json={'vin': '1FTFW1ET5DFC10312', 'make': 'Ford Motor', 'year': 2012, 'model': 'F-150', 'customer_id': 1}, headers=headers)
+        self.assertEqual((response.json['make'], response.json['year']), ('Ford Motor', 2012))
+
+        response = self.client.post('/vehicles/', json={'vin': '9ZZAA11119A000000', 'model': 'Mystery', 'customer_id': 1}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('make', response.json)